@@ -8,7 +8,8 @@ from sqlalchemy.orm import Session
 from backend.config import settings
 from backend.database.db import get_db
 from backend.models.user import User
-from backend.models.file import FolderAssignment
+from backend.services.permissions import has_permission
+from backend.services.tracing import traced
 
 security = HTTPBearer()
 
@@ -39,6 +40,8 @@ def decode_token(token: str):
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
+    # Always the primary: deactivation, the admin flag and the quota counters
+    # must not lag behind a replica. Write handlers share this same session.
     db: Session = Depends(get_db)
 ) -> User:
     credentials_exception = HTTPException(
@@ -74,47 +77,12 @@ async def get_current_admin_user(current_user: User = Depends(get_current_user))
         )
     return current_user
 
+@traced("acl.check_permission")
 def check_permission(user: User, permission: str, db: Session = None) -> bool:
+    """User-level check: a role grants the permission or, for read/write/delete, any folder assignment does."""
     if user.is_admin:
         return True
-    
-    # Check role-based permissions first
-    for role in user.roles:
-        if permission == "read" and role.can_read:
-            return True
-        elif permission == "write" and role.can_write:
-            return True
-        elif permission == "copy" and role.can_copy:
-            return True
-        elif permission == "delete" and role.can_delete:
-            return True
-        elif permission == "share" and role.can_share:
-            return True
-    
-    # For users without roles, check if they have folder assignments
-    # This allows folder-assigned users to access their assigned folders
-    if db is not None and permission == "read":
-        has_folder_access = db.query(FolderAssignment).filter(
-            FolderAssignment.user_id == user.id,
-            FolderAssignment.can_read == True
-        ).first()
-        if has_folder_access:
-            return True
-    
-    if db is not None and permission == "write":
-        has_write_access = db.query(FolderAssignment).filter(
-            FolderAssignment.user_id == user.id,
-            FolderAssignment.can_write == True
-        ).first()
-        if has_write_access:
-            return True
-    
-    if db is not None and permission == "delete":
-        has_delete_access = db.query(FolderAssignment).filter(
-            FolderAssignment.user_id == user.id,
-            FolderAssignment.can_delete == True
-        ).first()
-        if has_delete_access:
-            return True
-    
-    return False
+    if db is not None:
+        return has_permission(db, user, permission)
+    # Without a session only the role flags can be consulted
+    return any(getattr(role, f"can_{permission}") for role in user.roles)
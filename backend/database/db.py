@@ -1,25 +1,60 @@
-from sqlalchemy import create_engine
+from contextvars import ContextVar
+from fastapi import Depends
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 from backend.config import settings
 
-# Add connection pooling settings to prevent SSL connection issues
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # Verify connections before using them
-    pool_recycle=300,    # Recycle connections after 5 minutes
-    connect_args={
-        "connect_timeout": 10,
-        "keepalives": 1,
-        "keepalives_idle": 30,
-        "keepalives_interval": 10,
-        "keepalives_count": 5,
+def engine_options(database_url: str) -> dict:
+    """Pool and driver options for a database URL (SQLite gets none of the Postgres settings)."""
+    if database_url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_pre_ping": True,  # Verify connections before using them
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,  # Recycle connections to prevent SSL connection issues
+        "connect_args": {
+            "connect_timeout": 10,
+            "keepalives": 1,
+            "keepalives_idle": 30,
+            "keepalives_interval": 10,
+            "keepalives_count": 5,
+        }
     }
-)
+
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_engine(settings.DATABASE_REPLICA_URL, **engine_options(settings.DATABASE_REPLICA_URL))
+else:
+    replica_engine = engine
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+# Per-request routing state set by DatabaseRoutingMiddleware:
+# {"pinned": reads must use the primary, "wrote": this request wrote to the primary}
+request_db_state: ContextVar[dict | None] = ContextVar("request_db_state", default=None)
+
+def _mark_write():
+    state = request_db_state.get()
+    if state is not None:
+        state["wrote"] = True
+
+@event.listens_for(SessionLocal, "after_flush")
+def _flush_wrote(session, flush_context):
+    _mark_write()
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _statement_wrote(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_write()
+
 def get_db():
     db = SessionLocal()
     try:
@@ -27,5 +62,31 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db(primary=Depends(get_db)):
+    """Session for read-only dependencies: the replica, unless this client recently wrote.
+    
+    Without a replica (or while pinned) this is the request's primary session,
+    the one get_current_user already holds, so no second connection is used.
+    """
+    state = request_db_state.get()
+    pinned = state is not None and state.get("pinned")
+    if pinned or replica_engine is engine:
+        yield primary
+        return
+    db = ReplicaSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+
+def dialect_insert(db):
+    """The dialect's insert() construct, which supports ON CONFLICT upserts."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return pg_insert
+    if dialect == "sqlite":
+        return sqlite_insert
+    raise NotImplementedError(f"ON CONFLICT upserts are not supported on {dialect}")
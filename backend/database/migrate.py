@@ -0,0 +1,295 @@
+"""
+Schema migration runner
+Run once per deploy, not in every worker: creates tables for new models,
+applies pending db/migrations/*.sql files in order (recorded with a checksum
+in schema_migrations) and seeds the default roles and admin user. Workers
+only run check_schema_version() at startup.
+
+    python -m backend.database.migrate               # upgrade + seed
+    python -m backend.database.migrate --dry-run     # print what would run
+    python -m backend.database.migrate status
+
+Directive comments at the top of a migration file:
+    -- dialect: postgresql    skip it (recorded as applied) on other databases
+    -- transaction: none      run in autocommit, required for CREATE INDEX CONCURRENTLY
+On databases other than Postgres, CONCURRENTLY is dropped and the file runs
+in a normal transaction.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from datetime import datetime
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, insert, inspect, select, text, update
+from sqlalchemy.exc import DBAPIError
+from backend.database.db import Base, SessionLocal, engine, init_db
+from backend.database.seeds import ensure_seed_data
+import backend.models  # noqa: F401  (registers every model for create_all)
+
+MIGRATIONS_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "db", "migrations"))
+DIRECTIVE_PATTERN = re.compile(r"^--\s*([a-z_]+):\s*(\S+)\s*$")
+CONCURRENTLY_PATTERN = re.compile(r"\b(CREATE\s+(?:UNIQUE\s+)?INDEX|DROP\s+INDEX)\s+CONCURRENTLY\b", re.IGNORECASE)
+# Arbitrary key for pg_advisory_lock so concurrent deploys migrate one at a time
+MIGRATION_LOCK_ID = 7_274_431
+
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", String, primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+    Column("checksum", String),
+)
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    def __init__(self, path: str):
+        self.path = path
+        self.version = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding="utf-8") as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+        self.directives = parse_directives(self.sql)
+
+    @property
+    def transactional(self) -> bool:
+        return self.directives.get("transaction") != "none"
+
+    def applies_to(self, dialect_name: str) -> bool:
+        dialect = self.directives.get("dialect")
+        return dialect is None or dialect == dialect_name
+
+    def statements(self, dialect_name: str) -> list[str]:
+        statements = split_statements(self.sql)
+        if dialect_name != "postgresql":
+            statements = [CONCURRENTLY_PATTERN.sub(r"\1", statement) for statement in statements]
+        return statements
+
+
+def parse_directives(sql: str) -> dict[str, str]:
+    """`-- key: value` comment lines at the top of a migration file."""
+    directives = {}
+    for line in sql.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = DIRECTIVE_PATTERN.match(line)
+        if not match:
+            if line.startswith("--"):
+                continue
+            break
+        directives[match.group(1)] = match.group(2).lower()
+    return directives
+
+
+def split_statements(sql: str) -> list[str]:
+    """Split a migration into statements (SQLite executes one per call).
+
+    Comment lines are dropped and statements end at ';'. Migrations must
+    not contain semicolons inside string literals or function bodies.
+    """
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+
+def discover_migrations(directory: str = MIGRATIONS_DIR) -> list[Migration]:
+    if not os.path.isdir(directory):
+        return []
+    return [Migration(os.path.join(directory, name)) for name in sorted(os.listdir(directory)) if name.endswith(".sql")]
+
+
+def ensure_migrations_table():
+    migration_metadata.create_all(bind=engine)
+    # Tables created before checksums were recorded
+    columns = {column["name"] for column in inspect(engine).get_columns("schema_migrations")}
+    if "checksum" not in columns:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ALTER TABLE schema_migrations ADD COLUMN checksum VARCHAR")
+
+
+def applied_checksums(conn) -> dict[str, str | None]:
+    """version -> checksum of every recorded migration; empty if the table does not exist yet."""
+    if not inspect(conn).has_table("schema_migrations"):
+        return {}
+    return dict(conn.execute(select(schema_migrations.c.version, schema_migrations.c.checksum)).all())
+
+
+def verify_checksums(migrations: list[Migration], recorded: dict[str, str | None]) -> list[str]:
+    """Versions whose file changed after it was applied."""
+    return [
+        m.version for m in migrations
+        if m.version in recorded and recorded[m.version] is not None and recorded[m.version] != m.checksum
+    ]
+
+
+def record(conn, migration: Migration):
+    conn.execute(insert(schema_migrations).values(
+        version=migration.version, applied_at=datetime.utcnow(), checksum=migration.checksum
+    ))
+
+
+def apply_migration(migration: Migration) -> bool:
+    """Apply one migration; False when skipped for this dialect.
+
+    Transactional migrations are all-or-nothing. `transaction: none` ones run
+    statement by statement in autocommit; a failure there can leave earlier
+    statements applied (and an INVALID index behind), so write them to be
+    re-runnable with IF NOT EXISTS.
+    """
+    dialect_name = engine.dialect.name
+    applies = migration.applies_to(dialect_name)
+    statements = migration.statements(dialect_name) if applies else []
+
+    if migration.transactional or dialect_name != "postgresql":
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.exec_driver_sql(statement)
+            record(conn, migration)
+        return applies
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for statement in statements:
+            conn.exec_driver_sql(statement)
+        record(conn, migration)
+    return applies
+
+
+def run_migrations() -> list[str]:
+    """Bring the schema up to date; returns the versions applied by this run."""
+    # Autocommit so the lock holder never sits idle in a transaction
+    # (CREATE INDEX CONCURRENTLY waits for every open transaction)
+    lock_conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        if lock_conn.dialect.name == "postgresql":
+            lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+
+        # New tables come from the models; changes to existing tables come from the SQL files
+        init_db()
+        ensure_migrations_table()
+
+        migrations = discover_migrations()
+        with engine.begin() as conn:
+            recorded = applied_checksums(conn)
+            modified = verify_checksums(migrations, recorded)
+            if modified:
+                raise MigrationError(f"Applied migrations were edited: {', '.join(modified)}. Add a new migration instead.")
+            # Rows recorded before checksums existed
+            for m in migrations:
+                if m.version in recorded and recorded[m.version] is None:
+                    conn.execute(update(schema_migrations).where(schema_migrations.c.version == m.version).values(checksum=m.checksum))
+
+        applied = []
+        for migration in migrations:
+            if migration.version in recorded:
+                continue
+            if apply_migration(migration):
+                print(f"✓ Applied {migration.version}")
+            else:
+                print(f"- Skipped {migration.version} (dialect: {migration.directives['dialect']})")
+            applied.append(migration.version)
+        return applied
+    finally:
+        if lock_conn.dialect.name == "postgresql":
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+        lock_conn.close()
+
+
+def dry_run():
+    """Print the tables and statements an upgrade would run, without changing anything."""
+    dialect_name = engine.dialect.name
+    with engine.connect() as conn:
+        inspector = inspect(conn)
+        new_tables = [table.name for table in Base.metadata.sorted_tables if not inspector.has_table(table.name)]
+        recorded = applied_checksums(conn)
+
+    migrations = discover_migrations()
+    for version in verify_checksums(migrations, recorded):
+        print(f"✗ {version} was edited after it was applied; upgrade will refuse to run")
+    if new_tables:
+        print(f"create tables: {', '.join(new_tables)}")
+
+    pending = [m for m in migrations if m.version not in recorded]
+    for migration in pending:
+        if not migration.applies_to(dialect_name):
+            print(f"-- {migration.version}: skipped on {dialect_name}")
+            continue
+        mode = "transaction" if migration.transactional or dialect_name != "postgresql" else "autocommit"
+        print(f"-- {migration.version} ({mode})")
+        for statement in migration.statements(dialect_name):
+            print(f"{statement};")
+    if not pending and not new_tables:
+        print("✓ Schema already up to date")
+
+
+def status():
+    with engine.connect() as conn:
+        recorded = applied_checksums(conn)
+    migrations = discover_migrations()
+    modified = set(verify_checksums(migrations, recorded))
+    for migration in migrations:
+        if migration.version in modified:
+            state = "modified"
+        elif migration.version in recorded:
+            state = "applied"
+        else:
+            state = "pending"
+        print(f"{state:<9} {migration.version}")
+    for version in sorted(set(recorded) - {m.version for m in migrations}):
+        print(f"{'unknown':<9} {version} (recorded but no file)")
+
+
+def check_schema_version():
+    """Cheap worker startup check: one query comparing the newest applied migration with the newest file."""
+    migrations = discover_migrations()
+    if not migrations:
+        return
+    expected = migrations[-1].version
+    try:
+        with engine.connect() as conn:
+            current = conn.execute(select(func.max(schema_migrations.c.version))).scalar()
+    except DBAPIError:
+        current = None
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at {current or 'no version'}, expected {expected}. "
+            "Run `python -m backend.database.migrate` before starting the API."
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Apply database migrations and seed data")
+    parser.add_argument("command", nargs="?", choices=["upgrade", "status"], default="upgrade")
+    parser.add_argument("--dry-run", action="store_true", help="print pending work without applying it")
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        status()
+        return 0
+    if args.dry_run:
+        dry_run()
+        return 0
+
+    print("Migrating database...")
+    try:
+        applied = run_migrations()
+    except MigrationError as e:
+        print(f"✗ {e}")
+        return 1
+    print(f"✓ {len(applied)} migration(s) applied" if applied else "✓ Schema already up to date")
+
+    db = SessionLocal()
+    try:
+        ensure_seed_data(db)
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
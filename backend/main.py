@@ -1,21 +1,47 @@
 
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import Response
 from fastapi.exceptions import RequestValidationError
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from starlette.exceptions import HTTPException as StarletteHTTPException
+import asyncio
 import os
-
-from backend.routes import auth, users, roles, files, folder_assignments
-from backend.database.db import init_db, SessionLocal
-from backend.database.seeds import ensure_seed_data
+import secrets
+
+from backend.routes import auth, users, roles, files, folder_assignments, search, audit, analytics
+from backend.database.db import engine, replica_engine
+from backend.database.migrate import check_schema_version
+from backend.auth.security import get_current_admin_user
+from backend.models.user import User
+from backend.config import settings
+from backend.middleware.rate_limit import RateLimitMiddleware
+from backend.middleware.db_routing import DatabaseRoutingMiddleware
+from backend.middleware.metrics import MetricsMiddleware
+from backend.middleware.tracing import TracingMiddleware
+from backend.middleware.profiling import ProfilingMiddleware
+from backend.middleware.compression import CompressionMiddleware
+from backend.services.s3_service import s3_service
+from backend.services.audit import audit_log
+from backend.services import metrics, tracing
+from backend.static_assets import static_assets
+
+tracing.setup_tracing()
 
 app = FastAPI(title="EnlitEDU SFTP API", version="1.0.0")
 
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 
+# Middleware added later wraps earlier ones; registering these before CORS keeps
+# preflights unthrottled and lets 429 responses carry CORS headers
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(DatabaseRoutingMiddleware)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -30,27 +56,70 @@ app.include_router(users.router)
 app.include_router(roles.router)
 app.include_router(files.router)
 app.include_router(folder_assignments.router)
+app.include_router(search.router)
+app.include_router(audit.router)
+app.include_router(analytics.router)
+
+for db_engine in {engine, replica_engine}:
+    metrics.instrument_engine(db_engine)
+    tracing.instrument_engine(db_engine)
+metrics.register_gauge("s3_pool_in_flight", "S3 calls currently holding a pooled connection",
+                       lambda: s3_service.pool_stats.in_flight)
+metrics.register_gauge("s3_pool_saturated_calls", "S3 calls started while the connection pool was full",
+                       lambda: s3_service.pool_stats.saturated_calls, multiprocess_mode="sum")
+metrics.register_gauge("audit_queue_depth", "Audit events waiting to be flushed", lambda: audit_log.queue_depth)
+metrics.register_gauge("audit_events_dropped", "Audit events discarded by the overflow policy or failed flushes",
+                       lambda: audit_log.dropped, multiprocess_mode="sum")
 
 @app.on_event("startup")
 async def startup_event():
-    # Create database tables
-    init_db()
-    print("✓ Database tables initialized")
+    # Tables, migrations and seed data are handled once per deploy by
+    # `python -m backend.database.migrate`; workers only verify the version
+    check_schema_version()
+    
+    # The SPA build is served from memory; nothing is stat-ed per request
+    count = static_assets.load("dist/public")
+    print(f"✓ Loaded {count} static assets")
     
-    # Seed initial data (roles and admin user)
-    db = SessionLocal()
-    try:
-        ensure_seed_data(db)
-    finally:
-        db.close()
+    app.state.loop_lag_monitor = asyncio.create_task(metrics.monitor_event_loop_lag())
+    app.state.gauge_refresher = asyncio.create_task(metrics.refresh_gauges())
+    audit_log.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Flush queued audit events before the worker exits
+    await audit_log.stop()
+
+metrics_auth = HTTPBearer(auto_error=False)
 
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy", "service": "EnlitEDU SFTP"}
 
-# Static file serving - mount assets directory
-if os.path.exists("dist/public"):
-    app.mount("/assets", StaticFiles(directory="dist/public/assets"), name="assets")
+@app.get("/api/health/s3-pool")
+async def s3_pool_health(current_user: User = Depends(get_current_admin_user)):
+    # Connection pool usage for sizing S3_MAX_POOL_CONNECTIONS under load
+    return s3_service.pool_stats.snapshot()
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(credentials: HTTPAuthorizationCredentials | None = Depends(metrics_auth)):
+    # Scrapers cannot log in, so they present a static token instead of a user's JWT
+    if not settings.METRICS_TOKEN:
+        raise StarletteHTTPException(status_code=404, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(credentials.credentials, settings.METRICS_TOKEN):
+        return Response("Unauthorized\n", status_code=401, headers={"WWW-Authenticate": "Bearer"}, media_type="text/plain")
+    if not metrics.ENABLED:
+        return Response("prometheus_client is not installed\n", status_code=503, media_type="text/plain")
+    body, content_type = metrics.render_latest()
+    return Response(body, media_type=content_type)
+
+# Hashed Vite bundles (served with immutable caching)
+@app.api_route("/assets/{asset_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_asset(request: Request, asset_path: str):
+    response = static_assets.response(request, f"assets/{asset_path}")
+    if response is None:
+        raise StarletteHTTPException(status_code=404, detail="Not Found")
+    return response
 
 # Exception handlers for serving SPA on 404s (but not for API routes)
 @app.exception_handler(StarletteHTTPException)
@@ -65,8 +134,8 @@ async def custom_http_exception_handler(request, exc):
         )
     
     # For non-API routes with 404, serve the SPA
-    if exc.status_code == 404 and os.path.exists("dist/public/index.html"):
-        return FileResponse("dist/public/index.html")
+    if exc.status_code == 404 and "index.html" in static_assets:
+        return static_assets.response(request, "index.html")
     
     # Otherwise, return JSON error
     return JSONResponse(
@@ -85,32 +154,22 @@ async def validation_exception_handler(request, exc):
 
 # Serve static files at root level
 @app.get("/favicon.png")
-async def serve_favicon():
-    if os.path.exists("dist/public/favicon.png"):
-        return FileResponse("dist/public/favicon.png", media_type="image/png")
-    return {"message": "Favicon not found"}
+async def serve_favicon(request: Request):
+    return static_assets.response(request, "favicon.png") or {"message": "Favicon not found"}
 
 @app.get("/achu-logo.png")
-async def serve_logo():
-    if os.path.exists("dist/public/achu-logo.png"):
-        return FileResponse("dist/public/achu-logo.png", media_type="image/png")
-    return {"message": "Logo not found"}
+async def serve_logo(request: Request):
+    return static_assets.response(request, "achu-logo.png") or {"message": "Logo not found"}
 
 @app.get("/achu-logo-dark.png")
-async def serve_logo_dark():
-    if os.path.exists("dist/public/achu-logo-dark.png"):
-        return FileResponse("dist/public/achu-logo-dark.png", media_type="image/png")
-    return {"message": "Dark logo not found"}
+async def serve_logo_dark(request: Request):
+    return static_assets.response(request, "achu-logo-dark.png") or {"message": "Dark logo not found"}
 
 @app.get("/enlitedu-logo.png")
-async def serve_enlitedu_logo():
-    if os.path.exists("dist/public/enlitedu-logo.png"):
-        return FileResponse("dist/public/enlitedu-logo.png", media_type="image/png")
-    return {"message": "Logo not found"}
+async def serve_enlitedu_logo(request: Request):
+    return static_assets.response(request, "enlitedu-logo.png") or {"message": "Logo not found"}
 
 # Serve index.html for the root path
 @app.get("/")
-async def serve_root():
-    if os.path.exists("dist/public/index.html"):
-        return FileResponse("dist/public/index.html")
-    return {"message": "Frontend not built"}
+async def serve_root(request: Request):
+    return static_assets.response(request, "index.html") or {"message": "Frontend not built"}
@@ -0,0 +1,175 @@
+"""
+Response compression middleware
+Negotiates zstd, brotli or gzip from Accept-Encoding (zstd and brotli only
+when their packages are installed). Single-chunk bodies under
+COMPRESSION_MIN_SIZE go out as-is; streamed bodies are compressed chunk by
+chunk. Endpoints decorated with @skip_compression (byte streams, SSE,
+presigned-URL responses) are passed through untouched.
+"""
+
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from backend.config import settings
+from backend.responses import preferred_encoding
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/msgpack",
+    "application/x-msgpack",
+    "image/svg+xml",
+)
+
+
+def skip_compression(endpoint):
+    """Mark a route endpoint whose responses must never be compressed."""
+    endpoint.skip_compression = True
+    return endpoint
+
+
+class GzipCompressor:
+    def __init__(self):
+        # wbits=31 writes the gzip header and trailer
+        self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+COMPRESSORS = {"gzip": GzipCompressor}
+if brotli is not None:
+    COMPRESSORS["br"] = BrotliCompressor
+if zstandard is not None:
+    COMPRESSORS["zstd"] = ZstdCompressor
+
+
+def should_compress(headers: Headers, status: int) -> bool:
+    if status < 200 or status in (204, 206, 304):
+        return False
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    if not content_type.startswith(COMPRESSIBLE_TYPES):
+        return False
+    content_length = headers.get("content-length")
+    return content_length is None or int(content_length) >= settings.COMPRESSION_MIN_SIZE
+
+
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = preferred_encoding(Headers(scope=scope).get("accept-encoding", ""), COMPRESSORS)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                # Routing has happened by now, so the endpoint's opt-out is visible
+                if getattr(scope.get("endpoint"), "skip_compression", False) or not should_compress(Headers(raw=message["headers"]), message["status"]):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether compression pays off
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body and len(body) < settings.COMPRESSION_MIN_SIZE:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = COMPRESSORS[encoding]()
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers and not headers["etag"].startswith("W/"):
+                    # The compressed bytes differ, so the validator can only be weak
+                    headers["ETag"] = "W/" + headers["etag"]
+                if more_body:
+                    del headers["content-length"]
+                    await send(start_message)
+                else:
+                    compressed = compressor.compress(body) + compressor.finish()
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+            if more_body:
+                # Flush per chunk so streamed responses reach the client incrementally
+                chunk = compressor.compress(body) + compressor.flush()
+            else:
+                chunk = compressor.compress(body) + compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
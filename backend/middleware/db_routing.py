@@ -0,0 +1,59 @@
+"""
+Read-your-writes pinning for replica routing
+A request that writes sets a short-lived cookie; while it is valid, that
+client's read-only dependencies use the primary instead of the replica.
+"""
+
+import time
+from http.cookies import SimpleCookie
+from backend.config import settings
+from backend.database.db import request_db_state
+
+PIN_COOKIE = "db_pin"
+PIN_HEADER = b"x-db-pin"
+
+
+def _is_pinned(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        # API clients without cookies can force primary reads explicitly
+        if name == PIN_HEADER and value.lower() == b"primary":
+            return True
+        if name == b"cookie":
+            cookie = SimpleCookie()
+            try:
+                cookie.load(value.decode("latin-1"))
+            except Exception:
+                continue
+            morsel = cookie.get(PIN_COOKIE)
+            if morsel is not None:
+                try:
+                    return float(morsel.value) > time.time()
+                except ValueError:
+                    return False
+    return False
+
+
+class DatabaseRoutingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.DATABASE_REPLICA_URL:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"pinned": _is_pinned(scope), "wrote": False}
+        token = request_db_state.set(state)
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and state["wrote"]:
+                ttl = settings.DB_READ_YOUR_WRITES_SECONDS
+                cookie = f"{PIN_COOKIE}={time.time() + ttl:.0f}; Max-Age={ttl}; Path=/; HttpOnly; SameSite=Lax"
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_pin)
+        finally:
+            request_db_state.reset(token)
@@ -0,0 +1,36 @@
+"""
+Request metrics middleware
+Records latency per route template (not raw path, to bound label cardinality)
+and the DB statements issued while serving the request.
+"""
+
+import time
+from backend.services import metrics
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_holder = {"status": 500}
+        token = metrics.request_db_stats.set({"queries": 0, "seconds": 0.0})
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched APIRoute in the scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            metrics.observe_request(scope["method"], template, status_holder["status"], time.perf_counter() - start)
+            metrics.request_db_stats.reset(token)
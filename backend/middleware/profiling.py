@@ -0,0 +1,152 @@
+"""
+Per-request profiling for admins
+An admin adds ?profile=1 (or an X-Profile header) to any request and gets the
+profiler report back instead of the response body. cProfile is the default;
+?profile=pyinstrument uses pyinstrument when it is installed. Only work on
+the event loop thread is attributed, so threadpool work shows up as waiting.
+
+cProfile hooks the whole process, so any request the worker serves during a
+profile, across every await, lands in the report. It starts only when no
+other request is in flight (409 otherwise, which open change streams also
+trigger); for reliable reports profile a worker serving nothing else, e.g.
+a separate uvicorn started with --limit-concurrency 1. pyinstrument's async
+mode follows only the profiled request's task and has no such limit.
+"""
+
+import asyncio
+import cProfile
+import io
+import json
+import pstats
+from urllib.parse import parse_qs
+from starlette.concurrency import run_in_threadpool
+from backend.config import settings
+from backend.auth.security import decode_token
+from backend.database.db import SessionLocal
+from backend.models.user import User
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+CPROFILE_TOP_N = 60
+
+
+def requested_profiler(scope) -> str | None:
+    """'cprofile', 'pyinstrument' or None when the request did not ask to be profiled."""
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile", [])
+    for name, value in scope.get("headers", []):
+        if name == b"x-profile":
+            values.append(value.decode("latin-1"))
+    for value in values:
+        value = value.strip().lower()
+        if value == "pyinstrument":
+            return "pyinstrument"
+        if value in ("1", "true", "cprofile"):
+            return "cprofile"
+    return None
+
+
+def is_active_admin(username: str) -> bool:
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        return bool(user and user.is_active and user.is_admin)
+    finally:
+        db.close()
+
+
+async def is_admin_request(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            token = value.decode("latin-1")
+            if not token.lower().startswith("bearer "):
+                return False
+            payload = decode_token(token[7:])
+            if not payload or not payload.get("sub"):
+                return False
+            # The lookup is a blocking query; keep it off the event loop
+            return await run_in_threadpool(is_active_admin, payload["sub"])
+    return False
+
+
+async def send_json(send, status: int, content: dict):
+    body = json.dumps(content).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        # Only one profiler can be active per process at a time
+        self._lock = asyncio.Lock()
+        # Unprofiled requests running now; cProfile would attribute their work too
+        self._in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        mode = requested_profiler(scope)
+        if mode is None or not await is_admin_request(scope):
+            self._in_flight += 1
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self._in_flight -= 1
+            return
+
+        if mode == "pyinstrument" and Profiler is None:
+            mode = "cprofile"
+        if mode == "cprofile" and (self._in_flight or self._lock.locked()):
+            await send_json(send, 409, {
+                "detail": "cProfile needs an otherwise idle worker; retry, or use ?profile=pyinstrument"
+            })
+            return
+
+        status_holder = {"status": 500}
+
+        async def discard_response(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+
+        async with self._lock:
+            if mode == "pyinstrument":
+                profiler = Profiler(async_mode="enabled")
+                profiler.start()
+                try:
+                    await self.app(scope, receive, discard_response)
+                finally:
+                    profiler.stop()
+                body = profiler.output_html().encode("utf-8")
+                content_type = b"text/html; charset=utf-8"
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, discard_response)
+                finally:
+                    profiler.disable()
+                report = io.StringIO()
+                pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(CPROFILE_TOP_N)
+                body = report.getvalue().encode("utf-8")
+                content_type = b"text/plain; charset=utf-8"
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", content_type),
+                (b"content-length", str(len(body)).encode()),
+                (b"cache-control", b"no-store"),
+                (b"x-profiled-status", str(status_holder["status"]).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
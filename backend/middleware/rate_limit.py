@@ -0,0 +1,204 @@
+"""
+Rate limiting and concurrency admission control
+Token bucket + concurrent-request cap per (user, route class), answering 429
+with Retry-After. The in-memory backend is per worker; the Redis backend is
+shared by every worker.
+"""
+
+import json
+import math
+import time
+from backend.config import settings
+from backend.auth.security import decode_token
+
+
+def classify_route(method: str, path: str) -> str | None:
+    """Map a request to a rate-limit class; None means not limited."""
+    if not path.startswith("/api/") or path == "/api/health":
+        return None
+    if path.startswith("/api/auth/login"):
+        return "auth"
+    if path.endswith("/upload-url"):
+        return "upload"
+    if path.startswith("/api/files/changes"):
+        return "feed"
+    if "/download" in path or "/content" in path or path.startswith("/api/files/share/"):
+        return "download"
+    if method == "GET" and path.startswith(("/api/files", "/api/search")):
+        return "list"
+    if method in ("POST", "PUT", "PATCH", "DELETE"):
+        return "write"
+    return "default"
+
+
+def client_identity(scope) -> str:
+    """Identify the caller by JWT subject (no DB lookup), falling back to client IP."""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            token = value.decode("latin-1")
+            if token.lower().startswith("bearer "):
+                payload = decode_token(token[7:])
+                if payload and payload.get("sub"):
+                    return f"user:{payload['sub']}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class InMemoryBackend:
+    """Per-process limiter state; suitable for a single worker or as a per-worker cap."""
+
+    MAX_KEYS = 50000
+
+    def __init__(self):
+        # key -> [tokens, last update, time the bucket is full again under its own rule]
+        self._buckets: dict[str, list[float]] = {}
+        self._active: dict[str, int] = {}
+
+    async def take_token(self, key: str, rate: float, burst: float) -> float:
+        """Consume one token; returns 0 if allowed, else seconds until a token is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_KEYS:
+                self._prune(now)
+            bucket = self._buckets[key] = [burst, now, now]
+        tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate if rate > 0 else 60.0
+        bucket[0] = tokens
+        bucket[1] = now
+        bucket[2] = now + (burst - tokens) / rate if rate > 0 else math.inf
+        return wait
+
+    async def acquire_slot(self, key: str, limit: int) -> bool:
+        active = self._active.get(key, 0)
+        if active >= limit:
+            return False
+        self._active[key] = active + 1
+        return True
+
+    async def release_slot(self, key: str):
+        active = self._active.get(key, 0) - 1
+        if active > 0:
+            self._active[key] = active
+        else:
+            self._active.pop(key, None)
+
+    def _prune(self, now: float):
+        # Drop buckets that have refilled completely; they carry no state
+        for key in [k for k, (_, _, full_at) in self._buckets.items() if now >= full_at]:
+            del self._buckets[key]
+
+
+class RedisBackend:
+    """Shared limiter state in Redis so limits hold across all workers and hosts."""
+
+    TOKEN_BUCKET_SCRIPT = """
+    local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or ARGV[2])
+    local last = tonumber(redis.call('HGET', KEYS[1], 'last') or ARGV[3])
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    tokens = math.min(burst, tokens + math.max(0, now - last) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'last', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(wait)
+    """
+    # Safety net so a crashed worker cannot leak concurrency slots forever
+    SLOT_TTL_SECONDS = 300
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package") from e
+        self._redis = redis_asyncio.from_url(url)
+        self._token_bucket = self._redis.register_script(self.TOKEN_BUCKET_SCRIPT)
+
+    async def take_token(self, key: str, rate: float, burst: float) -> float:
+        wait = await self._token_bucket(keys=[f"rl:tb:{key}"], args=[rate, burst, time.time()])
+        return float(wait)
+
+    async def acquire_slot(self, key: str, limit: int) -> bool:
+        slot_key = f"rl:cc:{key}"
+        active = await self._redis.incr(slot_key)
+        await self._redis.expire(slot_key, self.SLOT_TTL_SECONDS)
+        if active > limit:
+            await self._redis.decr(slot_key)
+            return False
+        return True
+
+    async def release_slot(self, key: str):
+        await self._redis.decr(f"rl:cc:{key}")
+
+
+def create_backend():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisBackend(settings.RATE_LIMIT_REDIS_URL)
+    return InMemoryBackend()
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware so streamed responses keep their concurrency slot until finished."""
+
+    def __init__(self, app, backend=None, rules: dict | None = None):
+        self.app = app
+        self.backend = backend
+        self.rules = rules if rules is not None else settings.RATE_LIMIT_RULES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify_route(scope["method"], scope["path"])
+        rule = self.rules.get(route_class) if route_class else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        if self.backend is None:
+            self.backend = create_backend()
+
+        rate, burst, max_concurrency = rule[0], rule[1], int(rule[2])
+        key = f"{client_identity(scope)}:{route_class}"
+
+        retry_after = await self.backend.take_token(key, rate, burst)
+        if retry_after > 0:
+            await self._reject(send, retry_after, "Rate limit exceeded")
+            return
+
+        if max_concurrency <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.backend.acquire_slot(key, max_concurrency):
+            await self._reject(send, 1, "Too many concurrent requests")
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self.backend.release_slot(key)
+
+    async def _reject(self, send, retry_after: float, detail: str):
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
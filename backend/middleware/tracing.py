@@ -0,0 +1,45 @@
+"""
+Request tracing middleware
+Opens a server span per HTTP request, continuing an incoming W3C traceparent
+if present; route-level, S3, SQL and ACL spans nest under it.
+"""
+
+from backend.services import tracing
+
+
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        tracer = tracing.get_tracer()
+        if scope["type"] != "http" or tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        from opentelemetry import propagate, trace
+        from opentelemetry.trace import Status, StatusCode
+
+        carrier = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope.get("headers", [])}
+        method = scope["method"]
+        with tracer.start_as_current_span(
+            f"HTTP {method}",
+            context=propagate.extract(carrier),
+            kind=trace.SpanKind.SERVER,
+            attributes={"http.method": method, "http.target": scope["path"]}
+        ) as request_span:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        request_span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # The router stores the matched APIRoute in the scope
+                route = scope.get("route")
+                if route is not None:
+                    request_span.update_name(f"HTTP {method} {route.path}")
+                    request_span.set_attribute("http.route", route.path)
@@ -1,4 +1,12 @@
 from backend.models.user import User, Role
-from backend.models.file import File, ShareLink, FolderAssignment
+from backend.models.file import File, Blob, ShareLink, FolderAssignment
+from backend.models.folder import Folder
+from backend.models.index_version import IndexVersion
+from backend.models.folder_change import FolderChange
+from backend.models.folder_stats import FolderStats
+from backend.models.user_import_job import UserImportJob
+from backend.models.audit_event import AuditEvent
+from backend.models.usage_rollup import UsageRollup, RollupWatermark
+from backend.models.effective_permission import EffectivePermission
 
-__all__ = ["User", "Role", "File", "ShareLink", "FolderAssignment"]
+__all__ = ["User", "Role", "File", "Blob", "ShareLink", "FolderAssignment", "Folder", "IndexVersion", "FolderChange", "FolderStats", "UserImportJob", "AuditEvent", "UsageRollup", "RollupWatermark", "EffectivePermission"]
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, JSON, Index, func
+from datetime import datetime
+from backend.database.db import Base
+
+class AuditEvent(Base):
+    """Append-only record of who did what to which file; written in batches."""
+    __tablename__ = "audit_events"
+    
+    id = Column(Integer, primary_key=True)
+    # When the action happened, not when its batch was flushed
+    occurred_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Set by the database when the batch is written; usage rollups settle on this
+    inserted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    actor_id = Column(Integer)  # null for anonymous share-link access
+    action = Column(String, nullable=False)
+    folder_path = Column(String)
+    s3_key = Column(String)
+    file_id = Column(Integer)
+    bytes = Column(BigInteger)
+    detail = Column(JSON)
+    
+    __table_args__ = (
+        Index("ix_audit_events_occurred_at", "occurred_at"),
+        Index("ix_audit_events_actor_id_occurred_at", "actor_id", "occurred_at"),
+        Index("ix_audit_events_action_occurred_at", "action", "occurred_at"),
+        Index("ix_audit_events_file_id_occurred_at", "file_id", "occurred_at"),
+    )
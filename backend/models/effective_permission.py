@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from backend.database.db import Base
+
+class EffectivePermission(Base):
+    """Materialized permissions of a user on a folder subtree, as bit masks.
+
+    Every user has a "/" row plus one per folder they are assigned. A folder's
+    effective bits are the OR over its own and its ancestors' rows.
+    """
+    __tablename__ = "effective_permissions"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    folder_path = Column(String, nullable=False)
+    # Assignment flags on this folder and its ancestors
+    folder_bits = Column(Integer, nullable=False, default=0)
+    # Same on every row of the user: the OR of their roles' flags...
+    role_bits = Column(Integer, nullable=False, default=0)
+    # ...and of the flags of all their assignments, wherever they are
+    granted_bits = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        # Permission checks look up (user_id, each ancestor of the folder)
+        Index("uq_effective_permissions_user_id_folder_path", "user_id", "folder_path", unique=True),
+    )
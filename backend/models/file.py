@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, BigInteger, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, BigInteger, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from backend.database.db import Base
@@ -11,28 +11,54 @@ class File(Base):
     s3_key = Column(String, unique=True, nullable=False)
     file_size = Column(BigInteger)
     content_type = Column(String)
-    folder_path = Column(String, default="/")
-    owner_id = Column(Integer, ForeignKey('users.id'))
-    uploaded_at = Column(DateTime, default=datetime.utcnow)
+    folder_path = Column(String, default="/", index=True)
+    folder_id = Column(Integer, ForeignKey('folders.id'), nullable=True, index=True)
+    owner_id = Column(Integer, ForeignKey('users.id'), index=True)
+    uploaded_at = Column(DateTime, default=datetime.utcnow, index=True)
+    content_hash = Column(String, index=True)
+    blob_id = Column(Integer, ForeignKey('blobs.id'), nullable=True)
     
     owner = relationship("User", back_populates="files")
+    blob = relationship("Blob", back_populates="files")
     share_links = relationship("ShareLink", back_populates="file", cascade="all, delete-orphan")
 
+class Blob(Base):
+    """Content-addressed object shared by every File row with identical content."""
+    __tablename__ = "blobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String, unique=True, nullable=False)
+    s3_key = Column(String, unique=True, nullable=False)
+    size = Column(BigInteger)
+    ref_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    files = relationship("File", back_populates="blob")
+
 class FolderAssignment(Base):
     __tablename__ = "folder_assignments"
     
     id = Column(Integer, primary_key=True, index=True)
     folder_path = Column(String, nullable=False)
+    folder_id = Column(Integer, ForeignKey('folders.id'), nullable=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     can_read = Column(Boolean, default=True)
     can_write = Column(Boolean, default=False)
     can_delete = Column(Boolean, default=False)
     can_share = Column(Boolean, default=False)
+    quota_bytes = Column(BigInteger, nullable=True)
     assigned_by = Column(Integer, ForeignKey('users.id'))
     assigned_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", foreign_keys=[user_id], backref="folder_assignments")
     assigner = relationship("User", foreign_keys=[assigned_by])
+    
+    __table_args__ = (
+        # Every ACL check filters assignments by user
+        Index("ix_folder_assignments_user_id_folder_path", "user_id", "folder_path"),
+        # One assignment per user and folder; the conflict target of bulk upserts
+        Index("uq_folder_assignments_folder_path_user_id", "folder_path", "user_id", unique=True),
+    )
 
 class ShareLink(Base):
     __tablename__ = "share_links"
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from backend.database.db import Base
+
+class Folder(Base):
+    """A node of the folder tree: parent_id is the adjacency link, path the materialized "/a/b" form."""
+    __tablename__ = "folders"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    parent_id = Column(Integer, ForeignKey('folders.id'), nullable=True)  # null only for the root "/"
+    name = Column(String, nullable=False)
+    path = Column(String, unique=True, nullable=False)
+    depth = Column(Integer, nullable=False)
+    created_by = Column(Integer, ForeignKey('users.id'), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    parent = relationship("Folder", remote_side=[id], backref="children")
+    
+    __table_args__ = (
+        # Child listings; names are unique within a parent
+        Index("uq_folders_parent_id_name", "parent_id", "name", unique=True),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from datetime import datetime
+from backend.database.db import Base
+
+class FolderChange(Base):
+    """Append-only change log; the primary key doubles as the feed cursor."""
+    __tablename__ = "folder_changes"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    folder_path = Column(String, nullable=False)
+    operation = Column(String, nullable=False)
+    s3_key = Column(String)
+    filename = Column(String)
+    file_id = Column(Integer)
+    actor_id = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_folder_changes_folder_path_id", "folder_path", "id"),
+    )
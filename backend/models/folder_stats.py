@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime
+from datetime import datetime
+from backend.database.db import Base
+
+class FolderStats(Base):
+    """Materialized size/count of everything under a folder, subfolders included."""
+    __tablename__ = "folder_stats"
+    
+    folder_path = Column(String, primary_key=True)
+    total_bytes = Column(BigInteger, default=0, nullable=False)
+    object_count = Column(Integer, default=0, nullable=False)
+    last_modified = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from datetime import datetime
+from backend.database.db import Base
+
+class IndexVersion(Base):
+    """Monotonic version counter per listing scope (e.g. "folder:/docs", "users")."""
+    __tablename__ = "index_versions"
+    
+    scope = Column(String, primary_key=True)
+    version = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
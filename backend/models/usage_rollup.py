@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, Index
+from datetime import datetime
+from backend.database.db import Base
+
+class UsageRollup(Base):
+    """Event count and bytes per time bucket, user, folder and action, folded from audit_events."""
+    __tablename__ = "usage_rollups"
+    
+    id = Column(Integer, primary_key=True)
+    granularity = Column(String, nullable=False)  # "hour" or "day"
+    bucket_start = Column(DateTime, nullable=False)
+    actor_id = Column(Integer, nullable=False)  # 0 for anonymous share-link access
+    folder_path = Column(String, nullable=False)
+    action = Column(String, nullable=False)
+    event_count = Column(Integer, nullable=False, default=0)
+    bytes_total = Column(BigInteger, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index("uq_usage_rollups_bucket_key", "granularity", "bucket_start", "actor_id", "folder_path", "action", unique=True),
+        Index("ix_usage_rollups_granularity_action_bucket_start", "granularity", "action", "bucket_start"),
+        Index("ix_usage_rollups_granularity_actor_id_bucket_start", "granularity", "actor_id", "bucket_start"),
+    )
+
+class RollupWatermark(Base):
+    """Highest audit event id already folded into a rollup."""
+    __tablename__ = "rollup_watermarks"
+    
+    name = Column(String, primary_key=True)
+    last_event_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Table, BigInteger
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from backend.database.db import Base
@@ -21,6 +21,8 @@ class User(Base):
     is_admin = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     created_by = Column(Integer, ForeignKey('users.id'), nullable=True)
+    storage_quota_bytes = Column(BigInteger, nullable=True)
+    storage_used_bytes = Column(BigInteger, default=0, nullable=False)
     
     roles = relationship("Role", secondary=user_roles, back_populates="users")
     files = relationship("File", back_populates="owner")
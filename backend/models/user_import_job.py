@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from datetime import datetime
+from backend.database.db import Base
+
+class UserImportJob(Base):
+    """Progress and per-row errors of a background bulk user import."""
+    __tablename__ = "user_import_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, nullable=False, default="pending")  # pending, running, completed, failed
+    total_rows = Column(Integer, nullable=False, default=0)
+    processed_rows = Column(Integer, nullable=False, default=0)
+    created_count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    errors = Column(JSON, nullable=False, default=list)  # [{"row": n, "username": ..., "error": ...}]
+    created_by = Column(Integer, ForeignKey('users.id'))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
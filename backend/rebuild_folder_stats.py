@@ -0,0 +1,28 @@
+"""
+Folder aggregate rebuild job
+Recomputes folder_stats from a full bucket listing; run periodically (e.g. nightly cron)
+"""
+
+import sys
+from botocore.exceptions import BotoCoreError, ClientError
+from backend.database.db import SessionLocal, init_db
+from backend.services.folder_stats import rebuild_folder_stats
+
+def main() -> int:
+    print("Rebuilding folder aggregates...")
+    init_db()
+    
+    db = SessionLocal()
+    try:
+        count = rebuild_folder_stats(db)
+        print(f"✓ Rebuilt aggregates for {count} folders")
+        return 0
+    except (BotoCoreError, ClientError) as e:
+        db.rollback()
+        print(f"✗ Bucket listing failed, aggregates left unchanged: {e}")
+        return 1
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
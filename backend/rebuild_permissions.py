@@ -0,0 +1,22 @@
+"""
+Effective permissions rebuild job
+Recomputes effective_permissions for every user from roles and folder
+assignments. Run once after upgrading, or to repair drift. Safe to re-run.
+"""
+
+from backend.database.db import SessionLocal
+from backend.services.permissions import rebuild_all_permissions
+
+def main():
+    print("Rebuilding effective permissions...")
+    
+    db = SessionLocal()
+    try:
+        users = rebuild_all_permissions(db)
+        db.commit()
+        print(f"✓ Effective permissions rebuilt for {users} users")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
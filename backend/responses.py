@@ -0,0 +1,108 @@
+"""
+Content-negotiated and conditional responses for listing endpoints
+msgpack is served when the client asks for it, otherwise JSON (via orjson when installed)
+"""
+
+import hashlib
+from urllib.parse import quote
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from backend.services.metrics import record_cache
+from backend.services.tracing import span
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def content_disposition(filename: str) -> str:
+    """Attachment header value for any filename (RFC 6266 / RFC 5987).
+
+    Headers are latin-1, so filename= carries an ASCII fallback with quotes,
+    backslashes and control characters replaced, and filename*= carries the
+    exact name percent-encoded as UTF-8.
+    """
+    fallback = "".join(c if " " <= c <= "~" and c not in '"\\' else "_" for c in filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def wants_msgpack(request: Request) -> bool:
+    if msgpack is None:
+        return False
+    accept = request.headers.get("accept", "")
+    return any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def response_format(request: Request) -> str:
+    return "msgpack" if wants_msgpack(request) else "json"
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the values that fully determine a response."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def _cache_headers(etag: str | None) -> dict:
+    headers = {"Vary": "Accept", "Cache-Control": "private, no-cache"}
+    if etag:
+        headers["ETag"] = etag
+    return headers
+
+
+def preferred_encoding(accept_encoding: str, available, preference=("zstd", "br", "gzip")) -> str | None:
+    """First encoding in `preference` that we have and the client accepts (q=0 excluded)."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    for encoding in preference:
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+def is_not_modified(request: Request, etag: str, cache: str = "listing_etag") -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        hit = False
+    elif if_none_match.strip() == "*":
+        hit = True
+    else:
+        # If-None-Match uses weak comparison; compression middleware weakens ETags
+        hit = etag.removeprefix("W/") in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    record_cache(cache, hit)
+    return hit
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=_cache_headers(etag))
+
+
+def negotiated_response(request: Request, content, etag: str | None = None) -> Response:
+    headers = _cache_headers(etag)
+    # Responses render their body on construction, so this span is the serialization cost
+    with span("response.serialize"):
+        if wants_msgpack(request):
+            return MsgPackResponse(content, headers=headers)
+        if orjson is not None:
+            return ORJSONResponse(content, headers=headers)
+        return JSONResponse(content, headers=headers)
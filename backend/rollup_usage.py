@@ -0,0 +1,24 @@
+"""
+Usage rollup job
+Folds new audit events into the hourly/daily usage rollups; run every few
+minutes (e.g. cron). --rebuild refolds the whole audit log.
+"""
+
+import sys
+from backend.database.db import SessionLocal
+from backend.services.usage_rollups import rollup_pending, rebuild_rollups
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    rebuild = "--rebuild" in argv
+    print("Rebuilding usage rollups..." if rebuild else "Rolling up usage...")
+    
+    db = SessionLocal()
+    try:
+        count = rebuild_rollups(db) if rebuild else rollup_pending(db)
+        print(f"✓ Folded {count} audit events into the usage rollups")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from backend.database.db import get_read_db
+from backend.models.user import User
+from backend.models.usage_rollup import UsageRollup
+from backend.auth.security import get_current_admin_user
+from backend.services.folders import normalize_folder_path
+from backend.services.usage_rollups import GRANULARITIES, ANONYMOUS_ACTOR_ID, rollup_status
+
+router = APIRouter(prefix="/api/analytics", tags=["Usage Analytics"])
+
+DEFAULT_RANGE = timedelta(days=7)
+METRICS = {"events": UsageRollup.event_count, "bytes": UsageRollup.bytes_total}
+
+def rollup_query(db: Session, columns: list, granularity: str, start: datetime | None, end: datetime | None, action: str | None):
+    """Rollups of one granularity in [start, end); defaults to the last seven days."""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"granularity must be one of: {', '.join(GRANULARITIES)}"
+        )
+    end = end or datetime.utcnow()
+    start = start or end - DEFAULT_RANGE
+    query = db.query(*columns).filter(
+        UsageRollup.granularity == granularity,
+        UsageRollup.bucket_start >= start,
+        UsageRollup.bucket_start < end
+    )
+    if action is not None:
+        query = query.filter(UsageRollup.action == action)
+    return query
+
+def metric_column(metric: str):
+    if metric not in METRICS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"metric must be one of: {', '.join(METRICS)}"
+        )
+    return METRICS[metric]
+
+def usernames(db: Session, user_ids: set[int]) -> dict[int, str]:
+    user_ids = user_ids - {ANONYMOUS_ACTOR_ID}
+    return dict(db.query(User.id, User.username).filter(User.id.in_(user_ids)).all()) if user_ids else {}
+
+@router.get("/top-folders")
+async def top_folders(
+    action: str | None = None,
+    metric: str = "events",
+    granularity: str = "day",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = 20,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Folders ranked by event count or bytes, e.g. ?action=download for the most downloaded."""
+    order = metric_column(metric)
+    event_count = func.sum(UsageRollup.event_count).label("event_count")
+    bytes_total = func.sum(UsageRollup.bytes_total).label("bytes_total")
+    rows = (
+        rollup_query(db, [UsageRollup.folder_path, event_count, bytes_total], granularity, start, end, action)
+        .group_by(UsageRollup.folder_path)
+        .order_by(func.sum(order).desc())
+        .limit(min(max(limit, 1), 1000))
+        .all()
+    )
+    return [
+        {"folder_path": row.folder_path, "event_count": row.event_count, "bytes_total": row.bytes_total}
+        for row in rows
+    ]
+
+@router.get("/top-users")
+async def top_users(
+    action: str | None = None,
+    metric: str = "events",
+    granularity: str = "day",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = 20,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Users ranked by event count or bytes; anonymous share-link access is user_id 0."""
+    order = metric_column(metric)
+    event_count = func.sum(UsageRollup.event_count).label("event_count")
+    bytes_total = func.sum(UsageRollup.bytes_total).label("bytes_total")
+    rows = (
+        rollup_query(db, [UsageRollup.actor_id, event_count, bytes_total], granularity, start, end, action)
+        .group_by(UsageRollup.actor_id)
+        .order_by(func.sum(order).desc())
+        .limit(min(max(limit, 1), 1000))
+        .all()
+    )
+    names = usernames(db, {row.actor_id for row in rows})
+    return [
+        {
+            "user_id": row.actor_id,
+            "username": names.get(row.actor_id),
+            "event_count": row.event_count,
+            "bytes_total": row.bytes_total
+        }
+        for row in rows
+    ]
+
+@router.get("/usage")
+async def usage_series(
+    action: str | None = None,
+    granularity: str = "day",
+    user_id: int | None = None,
+    folder_path: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Per-bucket totals per user and action, e.g. ?action=upload for bytes uploaded per user per day."""
+    event_count = func.sum(UsageRollup.event_count).label("event_count")
+    bytes_total = func.sum(UsageRollup.bytes_total).label("bytes_total")
+    query = rollup_query(
+        db,
+        [UsageRollup.bucket_start, UsageRollup.actor_id, UsageRollup.action, event_count, bytes_total],
+        granularity, start, end, action
+    )
+    if user_id is not None:
+        query = query.filter(UsageRollup.actor_id == user_id)
+    if folder_path is not None:
+        query = query.filter(UsageRollup.folder_path == normalize_folder_path(folder_path))
+    rows = (
+        query.group_by(UsageRollup.bucket_start, UsageRollup.actor_id, UsageRollup.action)
+        .order_by(UsageRollup.bucket_start, UsageRollup.actor_id, UsageRollup.action)
+        .all()
+    )
+    names = usernames(db, {row.actor_id for row in rows})
+    return [
+        {
+            "bucket_start": row.bucket_start.isoformat(),
+            "user_id": row.actor_id,
+            "username": names.get(row.actor_id),
+            "action": row.action,
+            "event_count": row.event_count,
+            "bytes_total": row.bytes_total
+        }
+        for row in rows
+    ]
+
+@router.get("/status")
+async def analytics_status(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    # How far the rollups lag behind the audit log
+    return rollup_status(db)
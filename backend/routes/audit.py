@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from datetime import datetime
+from backend.database.db import get_read_db
+from backend.models.user import User
+from backend.models.audit_event import AuditEvent
+from backend.auth.security import get_current_admin_user
+from backend.services.audit import audit_log, serialize_event
+from backend.services.folders import normalize_folder_path, subtree_condition
+
+router = APIRouter(prefix="/api/audit", tags=["Audit Log"])
+
+MAX_PAGE_SIZE = 1000
+
+def events_page(query, before_id: int | None, limit: int) -> dict:
+    """Newest first, paged with the event id as a keyset cursor."""
+    if before_id is not None:
+        query = query.filter(AuditEvent.id < before_id)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    events = query.order_by(AuditEvent.id.desc()).limit(limit).all()
+    return {
+        "events": [serialize_event(event) for event in events],
+        "next_cursor": events[-1].id if len(events) == limit else None
+    }
+
+@router.get("/", include_in_schema=True)
+@router.get("", include_in_schema=False)
+async def query_audit_events(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    actor_id: int | None = None,
+    action: str | None = None,
+    folder_path: str | None = None,
+    recursive: bool = False,
+    before_id: int | None = None,
+    limit: int = 100,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Search the audit log; `start` (inclusive) and `end` (exclusive) bound occurred_at."""
+    query = db.query(AuditEvent)
+    if start is not None:
+        query = query.filter(AuditEvent.occurred_at >= start)
+    if end is not None:
+        query = query.filter(AuditEvent.occurred_at < end)
+    if actor_id is not None:
+        query = query.filter(AuditEvent.actor_id == actor_id)
+    if action is not None:
+        query = query.filter(AuditEvent.action == action)
+    if folder_path is not None:
+        scope = normalize_folder_path(folder_path)
+        if recursive:
+            query = query.filter(subtree_condition(AuditEvent.folder_path, scope))
+        else:
+            query = query.filter(AuditEvent.folder_path == scope)
+    return events_page(query, before_id, limit)
+
+@router.get("/files/{file_id}")
+async def file_audit_history(
+    file_id: int,
+    before_id: int | None = None,
+    limit: int = 100,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Everything that happened to one file, newest first."""
+    return events_page(db.query(AuditEvent).filter(AuditEvent.file_id == file_id), before_id, limit)
+
+@router.get("/status")
+async def audit_status(current_user: User = Depends(get_current_admin_user)):
+    # Queue depth and drop counts for this worker
+    return audit_log.snapshot()
@@ -1,142 +1,205 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from datetime import datetime, timedelta
+import asyncio
+import json
+import time
 import uuid
-from backend.database.db import get_db
+from backend.database.db import SessionLocal, get_db, get_read_db
 from backend.models.user import User
-from backend.models.file import File, ShareLink, FolderAssignment
-from backend.auth.security import get_current_user, check_permission
+from backend.models.file import File, ShareLink
+from backend.models.folder import Folder
+from backend.models.folder_stats import FolderStats
+from backend.auth.security import get_current_user, get_current_admin_user, check_permission
 from backend.services.s3_service import s3_service
+from backend.services.dedup_service import BLOB_PREFIX, is_blob_key, storage_key, compute_content_hash, attach_blob, add_blob_reference, release_blob
+from backend.services.index_versions import (
+    USERS_SCOPE,
+    ASSIGNMENTS_SCOPE,
+    get_versions,
+    subtree_version
+)
+from backend.services.change_feed import (
+    OP_UPLOAD,
+    OP_COMPLETE,
+    OP_COPY,
+    OP_DELETE,
+    OP_CREATE_FOLDER,
+    record_change,
+    current_cursor,
+    fetch_changes
+)
+from backend.services.folders import ensure_folder, child_folders, canonical_path, folder_ids, prune_candidates, prune_empty_folders
+from backend.services.permissions import READ, WRITE, DELETE, SHARE, FolderAccess, folder_access, permission_bits, has_folder_permission
+from backend.services.folder_stats import folder_of_key, file_added, file_removed, apply_delta, get_folder_stats
+from backend.services.quotas import usage_added, usage_removed, remaining_upload_budget, upload_size_limit, completion_exceeds_quota
+from backend.responses import make_etag, response_format, is_not_modified, not_modified_response, negotiated_response, content_disposition
+from backend.services.audit import (
+    AUDIT_UPLOAD,
+    AUDIT_DOWNLOAD,
+    AUDIT_COPY,
+    AUDIT_DELETE,
+    AUDIT_CREATE_FOLDER,
+    AUDIT_SHARE,
+    AUDIT_SHARE_ACCESS,
+    audit_log,
+    file_fields
+)
+from backend.services.tracing import traced, span
+from backend.middleware.compression import skip_compression
+from backend.config import settings
 
-def get_user_accessible_folders(db: Session, user: User) -> list[str]:
-    if user.is_admin:
-        return None
-    assignments = db.query(FolderAssignment).filter(
-        FolderAssignment.user_id == user.id,
-        FolderAssignment.can_read == True
-    ).all()
-    return [a.folder_path for a in assignments]
-
-def can_access_folder(folder_path: str, accessible_folders: list[str] | None) -> bool:
-    """Check if user can navigate to/view this folder (for navigation purposes)."""
-    if accessible_folders is None:
-        return True
-    normalized = "/" + folder_path.strip("/") if folder_path.strip("/") else "/"
-    for af in accessible_folders:
-        af_normalized = "/" + af.strip("/") if af.strip("/") else "/"
-        # User has direct access to this folder
-        if normalized == af_normalized:
-            return True
-        # This folder is a subfolder of an accessible folder
-        if normalized.startswith(af_normalized.rstrip("/") + "/"):
-            return True
-        # This folder is a parent of an accessible folder (allow navigation)
-        if af_normalized.startswith(normalized.rstrip("/") + "/"):
-            return True
-    return False
-
-def should_show_folder(folder_path: str, accessible_folders: list[str] | None) -> bool:
-    """Check if a folder should be displayed in the file listing.
-    
-    A folder is shown only if:
-    1. User has direct access to this folder, OR
-    2. This folder is a subfolder of an accessible folder, OR
-    3. This folder is the IMMEDIATE next step on the path to an accessible folder
-       (e.g., if user has /dept/team1, at root they see 'dept', at /dept they see 'team1' only)
-    """
-    if accessible_folders is None:
-        return True
-    normalized = "/" + folder_path.strip("/") if folder_path.strip("/") else "/"
-    
-    for af in accessible_folders:
-        af_normalized = "/" + af.strip("/") if af.strip("/") else "/"
-        
-        # Case 1: User has direct access to this folder
-        if normalized == af_normalized:
-            return True
-        
-        # Case 2: This folder is a subfolder of an accessible folder
-        if normalized.startswith(af_normalized.rstrip("/") + "/"):
-            return True
-        
-        # Case 3: This folder is the immediate next component on the path to accessible folder
-        # Split both paths into components and check if this folder is the next step
-        normalized_parts = [p for p in normalized.split("/") if p]
-        af_parts = [p for p in af_normalized.split("/") if p]
-        
-        # If accessible folder has more components than normalized folder
-        # and accessible folder path starts with normalized path
-        if len(af_parts) > len(normalized_parts):
-            # Check if this normalized path is a prefix of the accessible folder
-            is_prefix = all(normalized_parts[i] == af_parts[i] for i in range(len(normalized_parts)))
-            if is_prefix:
-                return True
-    
-    return False
+def normalize_folder_path(path: str) -> str:
+    stripped = path.strip("/")
+    return "/" + stripped if stripped else "/"
+
+def validate_key(key: str) -> str:
+    """Refuse keys and folder paths inside the blob store; blobs are reached only through their files."""
+    if is_blob_key(key):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This path is reserved"
+        )
+    return key
+
+@traced("acl.user_can_read_folder")
+def user_can_read_folder(db: Session, user: User, folder_path: str) -> bool:
+    """Read access to the folder's files (not just navigation through it)."""
+    return has_folder_permission(db, user, folder_path, READ)
 
+@traced("acl.user_can_write_folder")
 def user_can_write_folder(db: Session, user: User, folder_path: str) -> bool:
-    if user.is_admin:
-        return True
-    normalized = "/" + folder_path.strip("/") if folder_path.strip("/") else "/"
-    assignment = db.query(FolderAssignment).filter(
-        FolderAssignment.user_id == user.id,
-        FolderAssignment.folder_path == normalized,
-        FolderAssignment.can_write == True
-    ).first()
-    if assignment:
-        return True
-    for af in db.query(FolderAssignment).filter(
-        FolderAssignment.user_id == user.id,
-        FolderAssignment.can_write == True
-    ).all():
-        af_normalized = "/" + af.folder_path.strip("/") if af.folder_path.strip("/") else "/"
-        if normalized.startswith(af_normalized.rstrip("/") + "/") or normalized == af_normalized:
-            return True
-    return False
+    return has_folder_permission(db, user, folder_path, WRITE)
 
+@traced("acl.user_can_delete_folder")
 def user_can_delete_folder(db: Session, user: User, folder_path: str) -> bool:
-    if user.is_admin:
-        return True
-    normalized = "/" + folder_path.strip("/") if folder_path.strip("/") else "/"
-    assignment = db.query(FolderAssignment).filter(
-        FolderAssignment.user_id == user.id,
-        FolderAssignment.folder_path == normalized,
-        FolderAssignment.can_delete == True
-    ).first()
-    if assignment:
-        return True
-    for af in db.query(FolderAssignment).filter(
-        FolderAssignment.user_id == user.id,
-        FolderAssignment.can_delete == True
-    ).all():
-        af_normalized = "/" + af.folder_path.strip("/") if af.folder_path.strip("/") else "/"
-        if normalized.startswith(af_normalized.rstrip("/") + "/") or normalized == af_normalized:
-            return True
-    return False
+    return has_folder_permission(db, user, folder_path, DELETE)
 
+@traced("acl.user_can_share_folder")
+def user_can_share_folder(db: Session, user: User, folder_path: str) -> bool:
+    """Sharing requires read access to the folder plus a share grant from an assignment or a role."""
+    folder_bits, role_bits, _ = permission_bits(db, user, folder_path)
+    return bool(folder_bits & READ) and bool((folder_bits | role_bits) & SHARE)
+
+@traced("acl.user_can_read_file")
 def user_can_read_file(db: Session, user: User, s3_key: str) -> bool:
     """Check if user can read a file based on its s3_key path."""
-    if user.is_admin:
-        return True
+    return user_can_read_folder(db, user, folder_of_key(s3_key))
+
+# Bounds for the per-connection read buffer used by proxy downloads
+MIN_PROXY_CHUNK_SIZE = 8 * 1024
+MAX_PROXY_CHUNK_SIZE = 1024 * 1024
+
+def parse_range_header(range_header: str | None, size: int) -> tuple[int, int] | None:
+    """Parse a single-range "bytes=" header into an inclusive (start, end) pair.
     
-    # Extract folder path from s3_key
-    # s3_key format: "folder/subfolder/file.txt" or "file.txt"
-    parts = s3_key.split('/')
-    if len(parts) == 1:
-        # File at root level
-        folder_path = "/"
-    else:
-        # File in a folder
-        folder_path = "/" + "/".join(parts[:-1])
+    Returns None when the whole object should be served (no header, or a
+    multi-range/unsupported header, which HTTP allows servers to ignore).
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+    start_str, end_str = spec.split("-", 1)
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        else:
+            # Suffix range: last N bytes
+            suffix = int(end_str)
+            if suffix <= 0:
+                raise ValueError
+            start = max(size - suffix, 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, min(end, size - 1)
+
+def iter_object_body(body, chunk_size: int):
+    """Yield the object body in fixed-size chunks, closing the connection when done.
     
-    accessible_folders = get_user_accessible_folders(db, user)
+    StreamingResponse pulls one chunk at a time and waits for it to be sent,
+    so at most one chunk per connection is buffered in the API process.
+    """
+    try:
+        for chunk in body.iter_chunks(chunk_size=chunk_size):
+            yield chunk
+    finally:
+        body.close()
+
+def proxy_object_response(s3_key: str, filename: str, content_type: str | None, range_header: str | None):
+    metadata = s3_service.head_object(s3_key)
+    if metadata is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found in storage"
+        )
     
-    # If no folder assignments, deny access
-    if accessible_folders is not None and len(accessible_folders) == 0:
-        return False
+    size = metadata.get('ContentLength', 0)
+    byte_range = parse_range_header(range_header, size) if size else None
+    start, end = byte_range if byte_range else (None, None)
     
-    return can_access_folder(folder_path, accessible_folders)
+    body = s3_service.get_object_stream(s3_key, start, end)
+    if body is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to read file from storage"
+        )
+    
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": content_disposition(filename),
+    }
+    if metadata.get('ETag'):
+        headers["ETag"] = metadata['ETag']
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+    else:
+        headers["Content-Length"] = str(size)
+        status_code = status.HTTP_200_OK
+    
+    chunk_size = min(max(settings.PROXY_DOWNLOAD_CHUNK_SIZE, MIN_PROXY_CHUNK_SIZE), MAX_PROXY_CHUNK_SIZE)
+    return StreamingResponse(
+        iter_object_body(body, chunk_size),
+        status_code=status_code,
+        media_type=content_type or metadata.get('ContentType') or "application/octet-stream",
+        headers=headers
+    )
+
+def listing_etag(db: Session, request: Request, user: User, kind: str, folder_path: str) -> str:
+    """Strong ETag for a folder listing as seen by this user, without touching S3."""
+    versions = get_versions(db, [USERS_SCOPE, ASSIGNMENTS_SCOPE])
+    ttl = settings.LISTING_ETAG_TTL_SECONDS
+    ttl_bucket = int(time.time() // ttl) if ttl > 0 else 0
+    return make_etag(
+        kind,
+        user.id,
+        subtree_version(db, folder_path),
+        versions[USERS_SCOPE],
+        versions[ASSIGNMENTS_SCOPE],
+        ttl_bucket,
+        response_format(request)
+    )
+
+def require_proxy_download_enabled():
+    if not settings.PROXY_DOWNLOAD_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Proxy download is not enabled"
+        )
 
 router = APIRouter(prefix="/api/files", tags=["File Management"])
 
@@ -144,6 +207,7 @@ class UploadRequest(BaseModel):
     filename: str
     content_type: str
     folder_path: str = "/"
+    file_size: int | None = None
 
 class FileResponse(BaseModel):
     id: int
@@ -174,6 +238,8 @@ async def get_upload_url(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    validate_key(request.folder_path)
+    
     # Check folder-specific permissions first (allows folder assignments to work)
     if not user_can_write_folder(db, current_user, request.folder_path):
         # If no folder permission, fall back to role-based check
@@ -187,9 +253,19 @@ async def get_upload_url(
     folder_prefix = request.folder_path.strip('/')
     s3_key = f"{folder_prefix}/{request.filename}" if folder_prefix else request.filename
     
+    # Quotas are enforced by the storage policy itself: the presigned POST
+    # only accepts bodies up to the remaining budget
+    budget = remaining_upload_budget(db, current_user, request.folder_path)
+    if budget is not None and (budget == 0 or (request.file_size is not None and request.file_size > budget)):
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Storage quota exceeded"
+        )
+    
     presigned_data = s3_service.generate_presigned_upload_url(
         s3_key,
-        request.content_type
+        request.content_type,
+        max_content_length=upload_size_limit(budget)
     )
     
     if not presigned_data:
@@ -203,10 +279,13 @@ async def get_upload_url(
         s3_key=s3_key,
         content_type=request.content_type,
         folder_path=request.folder_path,
+        folder_id=ensure_folder(db, request.folder_path, current_user.id),
         owner_id=current_user.id
     )
     
     db.add(new_file)
+    db.flush()
+    record_change(db, request.folder_path, OP_UPLOAD, s3_key, request.filename, new_file.id, current_user.id)
     db.commit()
     db.refresh(new_file)
     
@@ -230,6 +309,8 @@ async def complete_upload(
             detail="File not found"
         )
     
+    previous_size = file.file_size
+    
     # Get file size from S3
     s3_objects = s3_service.list_objects(prefix=file.s3_key)
     for obj in s3_objects:
@@ -237,55 +318,95 @@ async def complete_upload(
             file.file_size = obj.get('Size')
             break
     
+    if completion_exceeds_quota(db, file, previous_size):
+        # Parallel uploads can overrun a budget that was checked only at presign time
+        object_key = release_blob(db, file)
+        s3_service.delete_object(file.s3_key)
+        if object_key and object_key != file.s3_key:
+            s3_service.delete_object(object_key)
+        file.file_size = previous_size
+        file_removed(db, file)
+        usage_removed(db, file)
+        record_change(db, file.folder_path, OP_DELETE, file.s3_key, file.filename, file.id, current_user.id)
+        db.delete(file)
+        db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Storage quota exceeded"
+        )
+    
+    if settings.DEDUP_ENABLED and file.blob_id is None and file.file_size is not None:
+        # Hashing streams the whole object; keep it off the event loop
+        content_hash = await asyncio.to_thread(compute_content_hash, file.s3_key)
+        if content_hash is not None:
+            attach_blob(db, file, content_hash)
+    
+    file_added(db, file, previous_size)
+    usage_added(db, file, previous_size)
+    record_change(db, file.folder_path, OP_COMPLETE, file.s3_key, file.filename, file.id, current_user.id)
     db.commit()
     db.refresh(file)
+    await audit_log.record_file(AUDIT_UPLOAD, file, current_user.id)
     
     return {"message": "Upload completed", "file_size": file.file_size}
 
 @router.get("/folders")
 async def list_folders(
+    http_request: Request,
     folder_path: str = "/",
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
+    validate_key(folder_path)
+    
     if not check_permission(current_user, "read", db):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to view folders"
         )
     
-    # Get user's accessible folders for filtering
-    accessible_folders = get_user_accessible_folders(db, current_user)
+    # Same effective permissions as downloads; folders on the way to a readable one are navigable
+    access = folder_access(db, current_user)
     
     # Check if user can access the requested folder path
-    if accessible_folders is not None and not can_access_folder(folder_path, accessible_folders):
+    if not access.can_navigate(folder_path):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this folder"
         )
     
-    # Convert UI folder path to S3 prefix (root "/" becomes empty string "")
-    prefix = folder_path.strip('/') + '/' if folder_path.strip('/') else ''
-    s3_objects = s3_service.list_objects(prefix=prefix)
+    etag = listing_etag(db, http_request, current_user, "folders", folder_path)
+    if is_not_modified(http_request, etag):
+        return not_modified_response(etag)
     
-    folders = set()
+    if settings.FOLDER_TREE_LISTING:
+        # Immediate children come from the folders table; the bucket is not listed
+        folders = {folder.name for folder in child_folders(db, folder_path, access.navigate_clause(Folder.path))}
+    else:
+        # Convert UI folder path to S3 prefix (root "/" becomes empty string "")
+        prefix = folder_path.strip('/') + '/' if folder_path.strip('/') else ''
+        s3_objects = s3_service.list_objects(prefix=prefix)
     
-    for obj in s3_objects:
-        s3_key = obj.get('Key', '')
-        relative_path = s3_key[len(prefix):] if prefix else s3_key
+        folders = set()
+    
+        for obj in s3_objects:
+            s3_key = obj.get('Key', '')
+            if s3_key.startswith(BLOB_PREFIX):
+                continue
+            relative_path = s3_key[len(prefix):] if prefix else s3_key
         
-        # Check if this is a folder marker (ends with /)
-        if s3_key.endswith('/'):
-            folder_name = s3_key.rstrip('/').split('/')[-1] if s3_key.rstrip('/') else '/'
-            if folder_name and len(relative_path.rstrip('/').split('/')) == 1:
-                folders.add(folder_name)
-            continue
+            # Check if this is a folder marker (ends with /)
+            if s3_key.endswith('/'):
+                folder_name = s3_key.rstrip('/').split('/')[-1] if s3_key.rstrip('/') else '/'
+                if folder_name and len(relative_path.rstrip('/').split('/')) == 1:
+                    folders.add(folder_name)
+                continue
         
-        # Extract folder names from file paths (first level only)
-        if '/' in relative_path:
-            folder_name = relative_path.split('/')[0]
-            if folder_name:
-                folders.add(folder_name)
+            # Extract folder names from file paths (first level only)
+            if '/' in relative_path:
+                folder_name = relative_path.split('/')[0]
+                if folder_name:
+                    folders.add(folder_name)
     
     # Convert folder named "/" to "slash" for display and filter by access
     folder_list = []
@@ -294,61 +415,24 @@ async def list_folders(
         actual_path = f"{folder_path.rstrip('/')}/{folder}"
         
         # Filter folders based on user access
-        if accessible_folders is not None and not should_show_folder(actual_path, accessible_folders):
+        if not access.can_navigate(actual_path):
             continue
         
         folder_list.append({"name": display_name, "path": actual_path})
     
-    return folder_list
-
-@router.get("/", include_in_schema=True)
-@router.get("", include_in_schema=False)
-async def list_files(
-    folder_path: str = "/",
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    if not check_permission(current_user, "read", db):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to view files"
-        )
-    
-    accessible_folders = get_user_accessible_folders(db, current_user)
-    
-    # Special case: users with no folder assignments can access root but see nothing
-    # This allows the frontend to show "No folders assigned" state
-    if accessible_folders is not None and len(accessible_folders) == 0:
-        if folder_path == "/" or folder_path == "":
-            return []  # Return empty list for root, frontend shows "no access" message
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have access to this folder"
-            )
-    
-    if accessible_folders is not None and not can_access_folder(folder_path, accessible_folders):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have access to this folder"
-        )
-    
-    # Get files from database for this folder
-    db_files = db.query(File).filter(File.folder_path == folder_path).all()
-    db_files_dict = {file.s3_key: file for file in db_files}
-    
-    # Convert UI folder path to S3 prefix
-    # Root "/" becomes empty string ""
-    # Other paths like "/arshak" become "arshak/"
-    if folder_path == "/":
-        prefix = ""
-    else:
-        prefix = folder_path.strip('/') + '/'
+    stats = get_folder_stats(db, [normalize_folder_path(f["path"]) for f in folder_list])
+    for folder in folder_list:
+        folder_stats = stats.get(normalize_folder_path(folder["path"]))
+        folder["total_bytes"] = folder_stats.total_bytes if folder_stats else None
+        folder["object_count"] = folder_stats.object_count if folder_stats else None
     
-    # List S3 objects with delimiter to get folders
-    # Returns items from both 'Contents' and 'CommonPrefixes'
-    s3_objects = s3_service.list_objects(prefix=prefix, delimiter='/')
+    return negotiated_response(http_request, folder_list, etag)
+
+def merge_listing(folder_path: str, prefix: str, s3_objects: list[dict], db_files_dict: dict[str, File]) -> tuple[list[dict], set[str]]:
+    """Merge a delimited S3 listing with the folder's DB rows.
     
+    Returns the file entries and the names of the immediate subfolders.
+    """
     files_result = []
     folders_result = set()
     seen_keys = set()
@@ -359,6 +443,9 @@ async def list_files(
         if 'Prefix' in obj and 'Key' not in obj:
             # This is a folder from CommonPrefixes
             folder_prefix = obj['Prefix']
+            # Deduplicated blob storage is not a user-visible folder
+            if folder_prefix == BLOB_PREFIX:
+                continue
             # Extract just the folder name (last part before the trailing /)
             folder_name = folder_prefix.rstrip('/').split('/')[-1]
             if folder_name:
@@ -438,7 +525,12 @@ async def list_files(
                 "type": "file"
             })
     
+    return files_result, folders_result
+
+def build_folder_entries(folder_path: str, folders_result: set[str], access: FolderAccess) -> list[dict]:
+    """Folder rows for the listing, hiding siblings the user cannot see."""
     # Add folders to the result (filter by access for non-admin users)
+    folder_entries = []
     for folder_name in sorted(folders_result):
         # Calculate the actual folder path for navigation
         if folder_name == '/':
@@ -453,11 +545,10 @@ async def list_files(
                 actual_folder_path = f"{folder_path.rstrip('/')}/{folder_name}"
         
         # Check if user should see this folder (filter out sibling folders)
-        if accessible_folders is not None and not should_show_folder(actual_folder_path, accessible_folders):
+        if not access.can_navigate(actual_folder_path):
             continue
         
-        # Insert folders at the beginning
-        files_result.insert(0, {
+        folder_entries.append({
             "id": None,
             "filename": display_name,
             "s3_key": None,
@@ -469,9 +560,239 @@ async def list_files(
             "type": "folder"
         })
     
-    return files_result
+    return folder_entries
+
+@router.get("/", include_in_schema=True)
+@router.get("", include_in_schema=False)
+async def list_files(
+    http_request: Request,
+    folder_path: str = "/",
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    validate_key(folder_path)
+    
+    if not check_permission(current_user, "read", db):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to view files"
+        )
+    
+    access = folder_access(db, current_user)
+    
+    # Special case: users with no readable folders can access root but see nothing
+    # This allows the frontend to show "No folders assigned" state
+    no_assignments = access.readable == []
+    if no_assignments and folder_path not in ("/", ""):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this folder"
+        )
+    
+    if not no_assignments and not access.can_navigate(folder_path):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this folder"
+        )
+    
+    etag = listing_etag(db, http_request, current_user, "files", folder_path)
+    if is_not_modified(http_request, etag):
+        return not_modified_response(etag)
+    
+    if no_assignments:
+        # Empty list for root, frontend shows "no access" message
+        return negotiated_response(http_request, [], etag)
+    
+    # A folder the user only passes through lists its subfolders, not its files
+    readable = access.can_read(folder_path)
+    
+    # Get files from database for this folder
+    if not readable:
+        db_files = []
+    elif settings.FOLDER_TREE_LISTING:
+        # By folder id, so "/a" and "/a/" name the same folder
+        folder = canonical_path(folder_path)
+        folder_id = folder_ids(db, [folder]).get(folder)
+        db_files = db.query(File).filter(File.folder_id == folder_id).all() if folder_id else []
+    else:
+        db_files = db.query(File).filter(File.folder_path == folder_path).all()
+    db_files_dict = {file.s3_key: file for file in db_files}
+    
+    # Convert UI folder path to S3 prefix
+    # Root "/" becomes empty string ""
+    # Other paths like "/arshak" become "arshak/"
+    if folder_path == "/":
+        prefix = ""
+    else:
+        prefix = folder_path.strip('/') + '/'
+    
+    # List S3 objects with delimiter to get folders
+    # Returns items from both 'Contents' and 'CommonPrefixes'
+    s3_objects = s3_service.list_objects(prefix=prefix, delimiter='/')
+    
+    with span("list_files.merge", objects=len(s3_objects), db_files=len(db_files)):
+        files_result, folders_result = merge_listing(folder_path, prefix, s3_objects, db_files_dict)
+        if not readable:
+            files_result = []
+        folder_entries = build_folder_entries(folder_path, folders_result, access)
+    
+    # Folder sizes come from the materialized aggregates, not a recursive listing
+    stats = get_folder_stats(db, [normalize_folder_path(f["folder_path"]) for f in folder_entries if f["filename"] != "/"])
+    for entry in folder_entries:
+        folder_stats = stats.get(normalize_folder_path(entry["folder_path"])) if entry["filename"] != "/" else None
+        if folder_stats:
+            entry["file_size"] = folder_stats.total_bytes
+            entry["object_count"] = folder_stats.object_count
+            entry["uploaded_at"] = folder_stats.last_modified.isoformat() if folder_stats.last_modified else None
+        # Insert folders at the beginning
+        files_result.insert(0, entry)
+    
+    return negotiated_response(http_request, files_result, etag)
+
+def authorize_folder_read(db: Session, user: User, folder_path: str) -> FolderAccess:
+    """Apply the same read checks as list_files; returns the user's FolderAccess."""
+    if not check_permission(user, "read", db):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to view files"
+        )
+    
+    access = folder_access(db, user)
+    if not access.can_navigate(folder_path):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this folder"
+        )
+    return access
+
+def reauthorize_folder_read(user_id: int, folder_path: str) -> tuple[bool, FolderAccess | None]:
+    """Repeat authorize_folder_read on the primary for a long-lived feed connection.
+    
+    Returns (still allowed, folder access), so deactivation or a revoked
+    assignment takes effect on an open stream.
+    """
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        if user is None or not user.is_active:
+            return False, None
+        try:
+            return True, authorize_folder_read(db, user, folder_path)
+        except HTTPException:
+            return False, None
+    finally:
+        db.close()
+
+def visible_changes(changes: list[dict], access: FolderAccess) -> list[dict]:
+    """Changes the user would see in a listing: files in readable folders, navigable new folders."""
+    if access.everything:
+        return changes
+    visible = []
+    for change in changes:
+        if change["operation"] == OP_CREATE_FOLDER:
+            allowed = access.can_navigate(f"{change['folder_path'].rstrip('/')}/{change['filename']}")
+        else:
+            allowed = access.can_read(change["folder_path"])
+        if allowed:
+            visible.append(change)
+    return visible
+
+@router.get("/changes")
+async def poll_changes(
+    folder_path: str = "/",
+    cursor: int | None = None,
+    recursive: bool = False,
+    timeout: int = 25,
+    # The primary session shared with get_current_user, so closing it below
+    # releases the only pooled connection this request holds
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Long-poll for changes in a folder since `cursor`.
+    
+    Without a cursor, returns the current head cursor so the client can start
+    following the feed after its initial listing.
+    """
+    access = authorize_folder_read(db, current_user, folder_path)
+    # Release the pooled connection while waiting; polls use short-lived sessions
+    db.close()
+    
+    if cursor is None:
+        return {"cursor": await run_in_threadpool(current_cursor), "changes": []}
+    
+    deadline = time.monotonic() + min(max(timeout, 0), settings.CHANGE_FEED_MAX_WAIT_SECONDS)
+    while True:
+        changes = await run_in_threadpool(fetch_changes, folder_path, cursor, recursive)
+        if changes:
+            allowed, access = await run_in_threadpool(reauthorize_folder_read, current_user.id, folder_path)
+            if not allowed:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="You don't have access to this folder"
+                )
+            return {
+                "cursor": changes[-1]["cursor"],
+                "changes": visible_changes(changes, access)
+            }
+        if time.monotonic() >= deadline:
+            return {"cursor": cursor, "changes": []}
+        await asyncio.sleep(settings.CHANGE_FEED_POLL_INTERVAL_SECONDS)
+
+@router.get("/changes/stream")
+@skip_compression
+async def stream_changes(
+    request: Request,
+    folder_path: str = "/",
+    cursor: int | None = None,
+    recursive: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Server-Sent Events stream of folder changes; each event id is the feed cursor."""
+    authorize_folder_read(db, current_user, folder_path)
+    user_id = current_user.id
+    db.close()
+    
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        cursor = int(last_event_id)
+    
+    async def event_stream():
+        position = cursor if cursor is not None else await run_in_threadpool(current_cursor)
+        yield f"event: ready\ndata: {json.dumps({'cursor': position})}\n\n"
+        idle = 0.0
+        while not await request.is_disconnected():
+            changes = await run_in_threadpool(fetch_changes, folder_path, position, recursive)
+            if changes:
+                # Access is re-checked per batch; a revoked user gets no further filenames
+                allowed, access = await run_in_threadpool(reauthorize_folder_read, user_id, folder_path)
+                if not allowed:
+                    yield "event: revoked\ndata: {}\n\n"
+                    return
+                position = changes[-1]["cursor"]
+                for change in visible_changes(changes, access):
+                    yield f"id: {change['cursor']}\nevent: change\ndata: {json.dumps(change)}\n\n"
+                idle = 0.0
+                continue
+            idle += settings.CHANGE_FEED_POLL_INTERVAL_SECONDS
+            if idle >= settings.CHANGE_FEED_MAX_WAIT_SECONDS:
+                allowed, _ = await run_in_threadpool(reauthorize_folder_read, user_id, folder_path)
+                if not allowed:
+                    yield "event: revoked\ndata: {}\n\n"
+                    return
+                # Keep intermediaries from closing an idle connection
+                yield ": keepalive\n\n"
+                idle = 0.0
+            await asyncio.sleep(settings.CHANGE_FEED_POLL_INTERVAL_SECONDS)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/{file_id}/download-url")
+@skip_compression
 async def get_download_url(
     file_id: int,
     db: Session = Depends(get_db),
@@ -490,17 +811,17 @@ async def get_download_url(
             detail="File not found"
         )
     
-    accessible_folders = get_user_accessible_folders(db, current_user)
-    if accessible_folders is not None and not can_access_folder(file.folder_path, accessible_folders):
+    if not user_can_read_folder(db, current_user, file.folder_path):
         raise HTTPException(status_code=403, detail="You don't have access to this file")
     
-    download_url = s3_service.generate_presigned_download_url(file.s3_key)
+    download_url = s3_service.generate_presigned_download_url(storage_key(file), filename=file.filename)
     
     if not download_url:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to generate download URL"
         )
+    await audit_log.record_file(AUDIT_DOWNLOAD, file, current_user.id, {"via": "presigned"})
     
     return {
         "download_url": download_url,
@@ -508,11 +829,14 @@ async def get_download_url(
     }
 
 @router.get("/download-by-key/{s3_key:path}")
+@skip_compression
 async def get_download_url_by_key(
     s3_key: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    validate_key(s3_key)
+    
     if not check_permission(current_user, "read", db):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -522,22 +846,88 @@ async def get_download_url_by_key(
     if not user_can_read_file(db, current_user, s3_key):
         raise HTTPException(status_code=403, detail="You don't have access to this file")
     
-    download_url = s3_service.generate_presigned_download_url(s3_key)
+    # Extract filename from S3 key
+    filename = s3_key.split('/')[-1]
+    
+    file = db.query(File).filter(File.s3_key == s3_key).first()
+    object_key = storage_key(file) if file else s3_key
+    download_url = s3_service.generate_presigned_download_url(object_key, filename=filename)
     
     if not download_url:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to generate download URL"
         )
-    
-    # Extract filename from S3 key
-    filename = s3_key.split('/')[-1]
+    if file:
+        await audit_log.record_file(AUDIT_DOWNLOAD, file, current_user.id, {"via": "presigned"})
+    else:
+        await audit_log.record(AUDIT_DOWNLOAD, current_user.id, folder_of_key(s3_key), s3_key, detail={"via": "presigned"})
     
     return {
         "download_url": download_url,
         "filename": filename
     }
 
+@router.get("/{file_id}/content")
+@skip_compression
+async def proxy_download(
+    file_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream the file through the API (supports HTTP Range) for clients without direct storage access."""
+    require_proxy_download_enabled()
+    
+    if not check_permission(current_user, "read", db):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to download files"
+        )
+    
+    file = db.query(File).filter(File.id == file_id).first()
+    if not file:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    if not user_can_read_folder(db, current_user, file.folder_path):
+        raise HTTPException(status_code=403, detail="You don't have access to this file")
+    
+    await audit_log.record_file(AUDIT_DOWNLOAD, file, current_user.id, {"via": "proxy", "range": request.headers.get("range")})
+    return proxy_object_response(storage_key(file), file.filename, file.content_type, request.headers.get("range"))
+
+@router.get("/content-by-key/{s3_key:path}")
+@skip_compression
+async def proxy_download_by_key(
+    s3_key: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    validate_key(s3_key)
+    
+    require_proxy_download_enabled()
+    
+    if not check_permission(current_user, "read", db):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to download files"
+        )
+    
+    if not user_can_read_file(db, current_user, s3_key):
+        raise HTTPException(status_code=403, detail="You don't have access to this file")
+    
+    filename = s3_key.split('/')[-1]
+    file = db.query(File).filter(File.s3_key == s3_key).first()
+    detail = {"via": "proxy", "range": request.headers.get("range")}
+    if file:
+        await audit_log.record_file(AUDIT_DOWNLOAD, file, current_user.id, detail)
+        return proxy_object_response(storage_key(file), file.filename, file.content_type, request.headers.get("range"))
+    await audit_log.record(AUDIT_DOWNLOAD, current_user.id, folder_of_key(s3_key), s3_key, detail=detail)
+    return proxy_object_response(s3_key, filename, None, request.headers.get("range"))
+
 @router.post("/{file_id}/copy")
 async def copy_file(
     file_id: int,
@@ -558,35 +948,55 @@ async def copy_file(
             detail="File not found"
         )
     
-    accessible_folders = get_user_accessible_folders(db, current_user)
-    if accessible_folders is not None and not can_access_folder(original_file.folder_path, accessible_folders):
+    if not user_can_read_folder(db, current_user, original_file.folder_path):
         raise HTTPException(status_code=403, detail="You don't have access to this file")
     
+    validate_key(request.destination_folder)
     if not user_can_write_folder(db, current_user, request.destination_folder):
         raise HTTPException(status_code=403, detail="You don't have write permission for the destination folder")
     
-    new_s3_key = f"{request.destination_folder.strip('/')}/{original_file.filename}"
-    
-    success = s3_service.copy_object(original_file.s3_key, new_s3_key)
-    
-    if not success:
+    budget = remaining_upload_budget(db, current_user, request.destination_folder)
+    if budget is not None and (original_file.file_size or 0) > budget:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to copy file in S3"
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Storage quota exceeded"
         )
     
+    new_s3_key = f"{request.destination_folder.strip('/')}/{original_file.filename}"
+    
+    # Deduplicated files are copied by reference; no bytes move in the bucket
+    if original_file.blob is None:
+        success = s3_service.copy_object(original_file.s3_key, new_s3_key)
+        
+        if not success:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to copy file in S3"
+            )
+    
     new_file = File(
         filename=original_file.filename,
         s3_key=new_s3_key,
         file_size=original_file.file_size,
         content_type=original_file.content_type,
         folder_path=request.destination_folder,
+        folder_id=ensure_folder(db, request.destination_folder, current_user.id),
         owner_id=current_user.id
     )
+    if original_file.blob is not None and not add_blob_reference(db, new_file, original_file):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
     
     db.add(new_file)
+    db.flush()
+    file_added(db, new_file)
+    usage_added(db, new_file)
+    record_change(db, request.destination_folder, OP_COPY, new_s3_key, new_file.filename, new_file.id, current_user.id)
     db.commit()
     db.refresh(new_file)
+    await audit_log.record_file(AUDIT_COPY, new_file, current_user.id, {"source_file_id": file_id})
     
     return {
         "id": new_file.id,
@@ -596,6 +1006,7 @@ async def copy_file(
 @router.delete("/{file_id}")
 async def delete_file(
     file_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -615,19 +1026,32 @@ async def delete_file(
     if not user_can_delete_folder(db, current_user, file.folder_path):
         raise HTTPException(status_code=403, detail="You don't have delete permission for this folder")
     
-    s3_service.delete_object(file.s3_key)
+    object_key = release_blob(db, file)
+    if object_key:
+        s3_service.delete_object(object_key)
     
+    file_removed(db, file)
+    usage_removed(db, file)
+    record_change(db, file.folder_path, OP_DELETE, file.s3_key, file.filename, file.id, current_user.id)
+    audited = file_fields(file)
     db.delete(file)
+    emptied = prune_candidates(db, [file.folder_path])
     db.commit()
+    if emptied:
+        background_tasks.add_task(prune_empty_folders, emptied)
+    await audit_log.record(AUDIT_DELETE, current_user.id, **audited)
     
     return {"message": "File deleted successfully"}
 
 @router.delete("/by-key/{s3_key:path}")
 async def delete_file_by_key(
     s3_key: str,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    validate_key(s3_key)
+    
     if not check_permission(current_user, "delete", db):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -644,26 +1068,45 @@ async def delete_file_by_key(
     if not user_can_delete_folder(db, current_user, folder_path):
         raise HTTPException(status_code=403, detail="You don't have delete permission for this folder")
     
-    # Delete from S3
-    success = s3_service.delete_object(s3_key)
-    
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to delete file from S3"
-        )
+    file = db.query(File).filter(File.s3_key == s3_key).first()
+    if file:
+        file_removed(db, file)
+        usage_removed(db, file)
+    else:
+        # Untracked object: read its size so the folder aggregates stay accurate
+        metadata = s3_service.head_object(s3_key)
+        if metadata is not None:
+            apply_delta(db, folder_of_key(s3_key), -metadata.get('ContentLength', 0), -1)
+    object_key = release_blob(db, file) if file else s3_key
+    
+    # Delete from S3 (skipped when a shared blob is still referenced)
+    if object_key:
+        success = s3_service.delete_object(object_key)
+        
+        if not success:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to delete file from S3"
+            )
     
     # Also delete from DB if it exists
-    file = db.query(File).filter(File.s3_key == s3_key).first()
+    audited = file_fields(file) if file else {"folder_path": folder_path, "s3_key": s3_key}
     if file:
         db.delete(file)
-        db.commit()
+    emptied = prune_candidates(db, [folder_path], marker_deleted=parts[-1] == ".keep")
+    record_change(db, folder_path, OP_DELETE, s3_key, parts[-1], file.id if file else None, current_user.id)
+    db.commit()
+    if emptied:
+        background_tasks.add_task(prune_empty_folders, emptied)
+    await audit_log.record(AUDIT_DELETE, current_user.id, **audited)
     
     return {"message": "File deleted successfully"}
 
 @router.post("/bulk-delete")
 async def bulk_delete_files(
     request: BulkDeleteRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -685,13 +1128,23 @@ async def bulk_delete_files(
         if not user_can_delete_folder(db, current_user, file.folder_path):
             raise HTTPException(status_code=403, detail=f"You don't have delete permission for file: {file.filename}")
     
-    s3_keys = [file.s3_key for file in files]
-    s3_service.delete_multiple_objects(s3_keys)
+    s3_keys = [key for key in (release_blob(db, file) for file in files) if key]
+    if s3_keys:
+        s3_service.delete_multiple_objects(s3_keys)
     
+    audited = [file_fields(file) for file in files]
     for file in files:
+        file_removed(db, file)
+        usage_removed(db, file)
+        record_change(db, file.folder_path, OP_DELETE, file.s3_key, file.filename, file.id, current_user.id)
         db.delete(file)
+    emptied = prune_candidates(db, [file.folder_path for file in files])
     
     db.commit()
+    if emptied:
+        background_tasks.add_task(prune_empty_folders, emptied)
+    for fields in audited:
+        await audit_log.record(AUDIT_DELETE, current_user.id, detail={"bulk": True}, **fields)
     
     return {"message": f"Deleted {len(files)} files successfully"}
 
@@ -716,7 +1169,7 @@ async def create_folder(
     # Create folder marker in S3 (folder + .keep file)
     parent_prefix = request.parent_folder.strip('/')
     folder_path = f"{parent_prefix}/{request.folder_name}" if parent_prefix else request.folder_name
-    folder_marker_key = f"{folder_path}/.keep"
+    folder_marker_key = validate_key(f"{folder_path}/.keep")
     
     # Upload empty .keep file to create the folder
     success = s3_service.create_folder(folder_marker_key)
@@ -727,11 +1180,42 @@ async def create_folder(
             detail="Failed to create folder in S3"
         )
     
+    ensure_folder(db, folder_path, current_user.id)
+    record_change(db, request.parent_folder, OP_CREATE_FOLDER, folder_marker_key, request.folder_name, None, current_user.id)
+    db.commit()
+    await audit_log.record(AUDIT_CREATE_FOLDER, current_user.id, f"/{folder_path}", folder_marker_key)
+    
     return {
         "message": "Folder created successfully",
         "folder_path": f"/{folder_path}"
     }
 
+@router.get("/storage-report")
+async def storage_report(
+    folder_path: str = "/",
+    limit: int = 100,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Largest folders under `folder_path` by stored bytes, from the materialized aggregates."""
+    scope = normalize_folder_path(folder_path)
+    query = db.query(FolderStats)
+    if scope != "/":
+        query = query.filter(
+            (FolderStats.folder_path == scope)
+            | FolderStats.folder_path.startswith(scope + "/", autoescape=True)
+        )
+    rows = query.order_by(FolderStats.total_bytes.desc()).limit(min(max(limit, 1), 1000)).all()
+    return [
+        {
+            "folder_path": row.folder_path,
+            "total_bytes": row.total_bytes,
+            "object_count": row.object_count,
+            "last_modified": row.last_modified.isoformat() if row.last_modified else None
+        }
+        for row in rows
+    ]
+
 @router.post("/{file_id}/share")
 async def create_share_link(
     file_id: int,
@@ -747,12 +1231,7 @@ async def create_share_link(
             detail="File not found"
         )
     
-    # Check if user has folder access first
-    accessible_folders = get_user_accessible_folders(db, current_user)
-    has_folder_access = accessible_folders is None or can_access_folder(file.folder_path, accessible_folders)
-    
-    # If no folder access and no role permission, deny
-    if not has_folder_access and not check_permission(current_user, "share", db):
+    if not user_can_share_folder(db, current_user, file.folder_path):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to share files"
@@ -763,7 +1242,7 @@ async def create_share_link(
     
     # Generate S3 presigned URL directly
     expiration_seconds = expires_in_hours * 3600
-    presigned_url = s3_service.generate_presigned_download_url(file.s3_key, expiration=expiration_seconds)
+    presigned_url = s3_service.generate_presigned_download_url(storage_key(file), expiration=expiration_seconds, filename=file.filename)
     
     if not presigned_url:
         raise HTTPException(
@@ -772,6 +1251,7 @@ async def create_share_link(
         )
     
     expires_at = datetime.utcnow() + timedelta(hours=expires_in_hours)
+    await audit_log.record_file(AUDIT_SHARE, file, current_user.id, {"expires_in_hours": expires_in_hours})
     
     return {
         "share_url": presigned_url,
@@ -780,6 +1260,7 @@ async def create_share_link(
     }
 
 @router.get("/share/{share_token}")
+@skip_compression
 async def get_shared_file(
     share_token: str,
     db: Session = Depends(get_db)
@@ -799,7 +1280,8 @@ async def get_shared_file(
         )
     
     file = share_link.file
-    download_url = s3_service.generate_presigned_download_url(file.s3_key, expiration=3600)
+    download_url = s3_service.generate_presigned_download_url(storage_key(file), expiration=3600, filename=file.filename)
+    await audit_log.record_file(AUDIT_SHARE_ACCESS, file, None, {"share_link_id": share_link.id})
     
     return {
         "filename": file.filename,
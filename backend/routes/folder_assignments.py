@@ -1,17 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, status
+from fastapi import File as FormFile
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List
-from backend.database.db import get_db
+import csv
+import io
+from backend.database.db import get_db, get_read_db
 from backend.models.user import User
 from backend.models.file import FolderAssignment
 from backend.auth.security import get_current_admin_user, get_current_user
+from backend.services.index_versions import ASSIGNMENTS_SCOPE, bump_versions, get_versions
+from backend.services.folder_assignments import (
+    ASSIGNMENT_FIELDS,
+    canonical_path,
+    upsert_assignments,
+    remove_unlisted_assignments,
+)
+from backend.services.folders import ensure_folder
+from backend.services.permissions import refresh_permissions
+from backend.responses import make_etag, response_format, is_not_modified, not_modified_response, negotiated_response
 
 router = APIRouter(prefix="/api/folder-assignments", tags=["Folder Assignments"])
 
-def normalize_folder_path(path: str) -> str:
-    stripped = path.strip("/")
-    return "/" + stripped if stripped else "/"
+MAX_CSV_ROWS = 50000
+CSV_TRUE_VALUES = {"1", "true", "yes", "y", "x"}
+CSV_FALSE_VALUES = {"0", "false", "no", "n", ""}
 
 class AssignFolderRequest(BaseModel):
     folder_path: str
@@ -20,6 +33,7 @@ class AssignFolderRequest(BaseModel):
     can_write: bool = False
     can_delete: bool = False
     can_share: bool = False
+    quota_bytes: int | None = None
 
 class FolderAssignmentResponse(BaseModel):
     id: int
@@ -38,6 +52,16 @@ class BulkAssignRequest(BaseModel):
     can_write: bool = False
     can_delete: bool = False
     can_share: bool = False
+    quota_bytes: int | None = None
+
+class BulkMatrixAssignRequest(BaseModel):
+    folder_paths: List[str]
+    user_ids: List[int]
+    can_read: bool = True
+    can_write: bool = False
+    can_delete: bool = False
+    can_share: bool = False
+    quota_bytes: int | None = None
 
 @router.post("/")
 async def assign_folder(
@@ -52,18 +76,24 @@ async def assign_folder(
             detail="User not found"
         )
     
-    normalized_path = normalize_folder_path(request.folder_path)
+    normalized_path = canonical_path(request.folder_path)
     
     existing = db.query(FolderAssignment).filter(
         FolderAssignment.folder_path == normalized_path,
         FolderAssignment.user_id == request.user_id
     ).first()
     
+    folder_id = ensure_folder(db, normalized_path, current_user.id)
+    
     if existing:
+        existing.folder_id = folder_id
         existing.can_read = request.can_read
         existing.can_write = request.can_write
         existing.can_delete = request.can_delete
         existing.can_share = request.can_share
+        existing.quota_bytes = request.quota_bytes
+        refresh_permissions(db, [request.user_id])
+        bump_versions(db, [ASSIGNMENTS_SCOPE])
         db.commit()
         db.refresh(existing)
         return {
@@ -76,15 +106,19 @@ async def assign_folder(
     
     new_assignment = FolderAssignment(
         folder_path=normalized_path,
+        folder_id=folder_id,
         user_id=request.user_id,
         can_read=request.can_read,
         can_write=request.can_write,
         can_delete=request.can_delete,
         can_share=request.can_share,
+        quota_bytes=request.quota_bytes,
         assigned_by=current_user.id
     )
     
     db.add(new_assignment)
+    refresh_permissions(db, [request.user_id])
+    bump_versions(db, [ASSIGNMENTS_SCOPE])
     db.commit()
     db.refresh(new_assignment)
     
@@ -109,48 +143,176 @@ async def bulk_assign_folder(
             detail="No users found"
         )
     
-    normalized_path = normalize_folder_path(request.folder_path)
-    
-    results = []
-    for user in users:
-        existing = db.query(FolderAssignment).filter(
-            FolderAssignment.folder_path == normalized_path,
-            FolderAssignment.user_id == user.id
-        ).first()
-        
-        if existing:
-            existing.can_read = request.can_read
-            existing.can_write = request.can_write
-            existing.can_delete = request.can_delete
-            existing.can_share = request.can_share
-            results.append({"user_id": user.id, "username": user.username, "status": "updated"})
-        else:
-            new_assignment = FolderAssignment(
-                folder_path=normalized_path,
-                user_id=user.id,
-                can_read=request.can_read,
-                can_write=request.can_write,
-                can_delete=request.can_delete,
-                can_share=request.can_share,
-                assigned_by=current_user.id
-            )
-            db.add(new_assignment)
-            results.append({"user_id": user.id, "username": user.username, "status": "assigned"})
+    normalized_path = canonical_path(request.folder_path)
+    permissions = request.model_dump(include=set(ASSIGNMENT_FIELDS))
+    statuses = upsert_assignments(db, [
+        {"folder_path": normalized_path, "user_id": user.id, **permissions}
+        for user in users
+    ], current_user.id)
     
+    bump_versions(db, [ASSIGNMENTS_SCOPE])
     db.commit()
     
     return {
         "folder_path": normalized_path,
-        "assignments": results
+        "assignments": [
+            {"user_id": user.id, "username": user.username, "status": statuses[(normalized_path, user.id)]}
+            for user in users
+        ]
+    }
+
+@router.post("/bulk-matrix")
+async def bulk_assign_folders(
+    request: BulkMatrixAssignRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Assign every listed folder to every listed user with the same permissions."""
+    users = db.query(User).filter(User.id.in_(request.user_ids)).all()
+    if not users:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No users found"
+        )
+    
+    folder_paths = sorted({canonical_path(f) for f in request.folder_paths})
+    if not folder_paths:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No folders given"
+        )
+    
+    permissions = request.model_dump(include=set(ASSIGNMENT_FIELDS))
+    statuses = upsert_assignments(db, [
+        {"folder_path": folder_path, "user_id": user.id, **permissions}
+        for folder_path in folder_paths
+        for user in users
+    ], current_user.id)
+    
+    bump_versions(db, [ASSIGNMENTS_SCOPE])
+    db.commit()
+    
+    found_ids = {user.id for user in users}
+    return {
+        "folder_paths": folder_paths,
+        "assigned": sum(1 for s in statuses.values() if s == "assigned"),
+        "updated": sum(1 for s in statuses.values() if s == "updated"),
+        "missing_user_ids": sorted(set(request.user_ids) - found_ids)
+    }
+
+def parse_csv_flag(value: str | None, default: bool) -> bool:
+    if value is None or not value.strip():
+        return default
+    normalized = value.strip().lower()
+    if normalized in CSV_TRUE_VALUES:
+        return True
+    if normalized in CSV_FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid boolean '{value}'")
+
+def parse_assignment_csv(content: str) -> tuple[list[dict], list[dict]]:
+    """Parse roster rows; returns (rows, errors). Rows reference users by username or user_id."""
+    reader = csv.DictReader(io.StringIO(content))
+    columns = {c.strip().lower() for c in reader.fieldnames or []}
+    if "folder_path" not in columns or not columns & {"username", "user_id"}:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV needs a folder_path column and a username or user_id column"
+        )
+    
+    rows, errors = [], []
+    for line, raw in enumerate(reader, start=2):
+        if line - 1 > MAX_CSV_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"CSV has more than {MAX_CSV_ROWS} rows"
+            )
+        record = {(k or "").strip().lower(): (v or "").strip() for k, v in raw.items()}
+        try:
+            if not record.get("folder_path"):
+                raise ValueError("Missing folder_path")
+            quota = record.get("quota_bytes")
+            rows.append({
+                "line": line,
+                "folder_path": record["folder_path"],
+                "username": record.get("username") or None,
+                "user_id": int(record["user_id"]) if record.get("user_id") else None,
+                "can_read": parse_csv_flag(record.get("can_read"), True),
+                "can_write": parse_csv_flag(record.get("can_write"), False),
+                "can_delete": parse_csv_flag(record.get("can_delete"), False),
+                "can_share": parse_csv_flag(record.get("can_share"), False),
+                "quota_bytes": int(quota) if quota else None,
+            })
+        except ValueError as e:
+            errors.append({"line": line, "error": str(e)})
+    return rows, errors
+
+@router.post("/import-csv")
+async def import_assignments_csv(
+    file: UploadFile = FormFile(...),
+    sync: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Upsert assignments from a roster CSV.
+    
+    Columns: folder_path, username or user_id, and optional can_read,
+    can_write, can_delete, can_share, quota_bytes. With sync=true, users not
+    in the file lose their assignments on the folders the file mentions.
+    """
+    try:
+        content = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV must be UTF-8 encoded"
+        )
+    
+    rows, errors = parse_assignment_csv(content)
+    
+    # Resolve every referenced user in two queries, not one per row
+    usernames = {row["username"] for row in rows if row["username"]}
+    user_ids = {row["user_id"] for row in rows if row["user_id"] is not None}
+    by_name = dict(db.query(User.username, User.id).filter(User.username.in_(usernames)).all()) if usernames else {}
+    known_ids = {uid for (uid,) in db.query(User.id).filter(User.id.in_(user_ids)).all()} if user_ids else set()
+    
+    resolved = []
+    for row in rows:
+        user_id = row["user_id"] if row["user_id"] is not None else by_name.get(row["username"])
+        if user_id is None or (row["user_id"] is not None and user_id not in known_ids):
+            errors.append({"line": row["line"], "error": f"Unknown user '{row['username'] or row['user_id']}'"})
+            continue
+        resolved.append({**row, "user_id": user_id})
+    
+    statuses = upsert_assignments(db, resolved, current_user.id)
+    removed = 0
+    if sync:
+        # Folders with only invalid rows are left alone rather than emptied
+        removed = remove_unlisted_assignments(db, [row["folder_path"] for row in resolved], list(statuses))
+    
+    bump_versions(db, [ASSIGNMENTS_SCOPE])
+    db.commit()
+    
+    return {
+        "assigned": sum(1 for s in statuses.values() if s == "assigned"),
+        "updated": sum(1 for s in statuses.values() if s == "updated"),
+        "removed": removed,
+        "errors": sorted(errors, key=lambda e: e["line"])
     }
 
 @router.get("/")
 async def list_all_assignments(
-    db: Session = Depends(get_db),
+    http_request: Request,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
+    versions = get_versions(db, [ASSIGNMENTS_SCOPE])
+    etag = make_etag("assignments", versions[ASSIGNMENTS_SCOPE], response_format(http_request))
+    if is_not_modified(http_request, etag):
+        return not_modified_response(etag)
+    
     assignments = db.query(FolderAssignment).all()
-    return [
+    return negotiated_response(http_request, [
         {
             "id": a.id,
             "folder_path": a.folder_path,
@@ -160,18 +322,19 @@ async def list_all_assignments(
             "can_write": a.can_write,
             "can_delete": a.can_delete,
             "can_share": a.can_share,
+            "quota_bytes": a.quota_bytes,
             "assigned_at": a.assigned_at.isoformat() if a.assigned_at else None
         }
         for a in assignments
-    ]
+    ], etag)
 
 @router.get("/folder/{folder_path:path}")
 async def get_folder_assignments(
     folder_path: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    normalized_path = "/" + folder_path.strip("/") if folder_path else "/"
+    normalized_path = canonical_path(folder_path)
     assignments = db.query(FolderAssignment).filter(
         FolderAssignment.folder_path == normalized_path
     ).all()
@@ -193,7 +356,7 @@ async def get_folder_assignments(
 @router.get("/user/{user_id}")
 async def get_user_assignments(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     assignments = db.query(FolderAssignment).filter(
@@ -214,7 +377,7 @@ async def get_user_assignments(
 
 @router.get("/my-folders")
 async def get_my_folder_assignments(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.is_admin:
@@ -257,6 +420,8 @@ async def remove_assignment(
         )
     
     db.delete(assignment)
+    refresh_permissions(db, [assignment.user_id])
+    bump_versions(db, [ASSIGNMENTS_SCOPE])
     db.commit()
     
     return {"message": "Assignment removed successfully"}
@@ -268,7 +433,7 @@ async def remove_user_from_folder(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    normalized_path = "/" + folder_path.strip("/") if folder_path else "/"
+    normalized_path = canonical_path(folder_path)
     assignment = db.query(FolderAssignment).filter(
         FolderAssignment.folder_path == normalized_path,
         FolderAssignment.user_id == user_id
@@ -281,6 +446,8 @@ async def remove_user_from_folder(
         )
     
     db.delete(assignment)
+    refresh_permissions(db, [assignment.user_id])
+    bump_versions(db, [ASSIGNMENTS_SCOPE])
     db.commit()
     
     return {"message": "User removed from folder successfully"}
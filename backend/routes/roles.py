@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from backend.database.db import get_db
+from backend.database.db import get_db, get_read_db
 from backend.models.user import User, Role
 from backend.auth.security import get_current_admin_user
+from backend.services.index_versions import USERS_SCOPE, bump_versions
+from backend.services.permissions import refresh_permissions, refresh_role_members
 
 router = APIRouter(prefix="/api/roles", tags=["Role Management"])
 
@@ -64,7 +66,7 @@ async def create_role(
 
 @router.get("/", include_in_schema=True)
 @router.get("", include_in_schema=False)
-async def list_roles(db: Session = Depends(get_db)):
+async def list_roles(db: Session = Depends(get_read_db)):
     roles = db.query(Role).all()
     return [
         {
@@ -106,7 +108,10 @@ async def update_role(
         role.can_delete = request.can_delete
     if request.can_share is not None:
         role.can_share = request.can_share
+    refresh_role_members(db, role_id)
     
+    # Role flags are embedded in the user listing
+    bump_versions(db, [USERS_SCOPE])
     db.commit()
     db.refresh(role)
     
@@ -134,7 +139,10 @@ async def delete_role(
             detail="Role not found"
         )
     
+    member_ids = [user.id for user in role.users]
     db.delete(role)
+    refresh_permissions(db, member_ids)
+    bump_versions(db, [USERS_SCOPE])
     db.commit()
     
     return {"message": "Role deleted successfully"}
@@ -0,0 +1,130 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, joinedload
+from datetime import datetime
+from backend.database.db import get_read_db
+from backend.models.user import User
+from backend.models.file import File
+from backend.models.folder import Folder
+from backend.auth.security import get_current_user, check_permission
+from backend.routes.files import normalize_folder_path
+from backend.services.folders import subtree_condition
+from backend.services.permissions import folder_access
+from backend.responses import negotiated_response
+
+router = APIRouter(prefix="/api/search", tags=["Search"])
+
+MAX_SEARCH_LIMIT = 200
+MAX_FOLDER_RESULTS = 20
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+@router.get("/", include_in_schema=True)
+@router.get("", include_in_schema=False)
+async def search_files(
+    http_request: Request,
+    q: str = "",
+    prefix: bool = False,
+    folder_path: str | None = None,
+    content_type: str | None = None,
+    min_size: int | None = None,
+    max_size: int | None = None,
+    owner: str | None = None,
+    uploaded_after: datetime | None = None,
+    uploaded_before: datetime | None = None,
+    limit: int = Query(50, ge=1, le=MAX_SEARCH_LIMIT),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Search file names and folder paths across the bucket.
+
+    Matching uses the trigram/pattern indexes from
+    db/migrations/0004_add_file_search_indexes.sql and
+    0015_add_folder_search_index.sql; results are filtered in
+    SQL by the user's effective permissions, the same rule as listings and
+    downloads: files in readable folders, and folders the user can navigate.
+    """
+    if not check_permission(current_user, "read", db):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to view files"
+        )
+
+    access = folder_access(db, current_user)
+    if access.readable == []:
+        return negotiated_response(http_request, {"files": [], "folders": []})
+
+    term = q.strip()
+    pattern = f"{escape_like(term)}%" if prefix else f"%{escape_like(term)}%"
+
+    acl_clause = access.read_clause(File.folder_path)
+
+    query = db.query(File).options(joinedload(File.owner))
+    if term:
+        query = query.filter(or_(
+            File.filename.ilike(pattern, escape="\\"),
+            File.folder_path.ilike(pattern, escape="\\")
+        ))
+    if acl_clause is not None:
+        query = query.filter(acl_clause)
+    if folder_path:
+        scope = normalize_folder_path(folder_path)
+        if scope != "/":
+            query = query.filter(or_(
+                File.folder_path == scope,
+                File.folder_path.startswith(scope + "/", autoescape=True)
+            ))
+    if content_type:
+        # "image/" matches every image type, "image/png" only PNGs
+        query = query.filter(File.content_type.startswith(content_type, autoescape=True))
+    if min_size is not None:
+        query = query.filter(File.file_size >= min_size)
+    if max_size is not None:
+        query = query.filter(File.file_size <= max_size)
+    if owner:
+        query = query.join(User, File.owner_id == User.id).filter(User.username == owner)
+    if uploaded_after:
+        query = query.filter(File.uploaded_at >= uploaded_after)
+    if uploaded_before:
+        query = query.filter(File.uploaded_at <= uploaded_before)
+
+    files = query.order_by(File.uploaded_at.desc(), File.id.desc()).offset(offset).limit(limit).all()
+
+    # Folders come from the folder tree, so empty (.keep-only) folders match too
+    folders = []
+    if term and offset == 0:
+        folder_query = db.query(Folder.path).filter(Folder.path.ilike(pattern, escape="\\"))
+        folder_acl = access.navigate_clause(Folder.path)
+        if folder_acl is not None:
+            folder_query = folder_query.filter(folder_acl)
+        if folder_path:
+            folder_query = folder_query.filter(subtree_condition(Folder.path, folder_path))
+        folders = [row[0] for row in folder_query.order_by(Folder.path).limit(MAX_FOLDER_RESULTS).all()]
+
+    # Stored file folder paths are not always normalized; re-check with the canonical helper
+    if not access.everything:
+        files = [f for f in files if access.can_read(f.folder_path)]
+        folders = [f for f in folders if access.can_navigate(f)]
+
+    return negotiated_response(http_request, {
+        "files": [
+            {
+                "id": f.id,
+                "filename": f.filename,
+                "s3_key": f.s3_key,
+                "file_size": f.file_size,
+                "content_type": f.content_type,
+                "folder_path": f.folder_path,
+                "uploaded_at": f.uploaded_at.isoformat() if f.uploaded_at else None,
+                "owner_username": f.owner.username if f.owner else "Unknown",
+                "type": "file"
+            }
+            for f in files
+        ],
+        "folders": [
+            {"name": path.rstrip("/").split("/")[-1] or "/", "path": path}
+            for path in sorted(folders)
+        ]
+    })
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, UploadFile, status
+from fastapi import File as FormFile
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from backend.database.db import get_db
+from backend.database.db import get_db, get_read_db
 from backend.models.user import User, Role
+from backend.models.user_import_job import UserImportJob
 from backend.auth.security import (
     get_password_hash,
     get_current_admin_user
 )
+from backend.services.permissions import refresh_permissions, clear_permissions
+from backend.services.index_versions import USERS_SCOPE, ASSIGNMENTS_SCOPE, USAGE_SCOPE, bump_versions, get_versions
+from backend.services.user_import import MAX_IMPORT_ROWS, csv_records, validate_records, create_import_job, run_import_job, serialize_job
+from backend.responses import make_etag, response_format, is_not_modified, not_modified_response, negotiated_response
 
 router = APIRouter(prefix="/api/users", tags=["User Management"])
 
@@ -16,12 +22,19 @@ class CreateUserRequest(BaseModel):
     email: str | None = None
     is_admin: bool = False
     role_ids: list[int] = []
+    storage_quota_bytes: int | None = None
+
+class ImportUsersRequest(BaseModel):
+    # Plain dicts so a malformed row is reported as a row error, not a 422 for the whole file
+    users: list[dict]
 
 class UpdateUserRequest(BaseModel):
     email: str | None = None
     is_active: bool | None = None
     is_admin: bool | None = None
     role_ids: list[int] | None = None
+    # Sending null explicitly removes the quota
+    storage_quota_bytes: int | None = None
 
 @router.post("/")
 async def create_user(
@@ -41,7 +54,8 @@ async def create_user(
         email=request.email,
         hashed_password=get_password_hash(request.password),
         is_admin=request.is_admin,
-        created_by=current_user.id
+        created_by=current_user.id,
+        storage_quota_bytes=request.storage_quota_bytes
     )
     
     if request.role_ids:
@@ -49,6 +63,9 @@ async def create_user(
         new_user.roles = roles
     
     db.add(new_user)
+    db.flush()
+    refresh_permissions(db, [new_user.id])
+    bump_versions(db, [USERS_SCOPE])
     db.commit()
     db.refresh(new_user)
     
@@ -63,17 +80,25 @@ async def create_user(
 @router.get("/", include_in_schema=True)
 @router.get("", include_in_schema=False)
 async def list_users(
-    db: Session = Depends(get_db),
+    http_request: Request,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
+    versions = get_versions(db, [USERS_SCOPE, USAGE_SCOPE])
+    etag = make_etag("users", versions[USERS_SCOPE], versions[USAGE_SCOPE], response_format(http_request))
+    if is_not_modified(http_request, etag):
+        return not_modified_response(etag)
+    
     users = db.query(User).all()
-    return [
+    return negotiated_response(http_request, [
         {
             "id": user.id,
             "username": user.username,
             "email": user.email,
             "is_admin": user.is_admin,
             "is_active": user.is_active,
+            "storage_quota_bytes": user.storage_quota_bytes,
+            "storage_used_bytes": user.storage_used_bytes,
             "roles": [
                 {
                     "id": role.id,
@@ -88,8 +113,95 @@ async def list_users(
             ]
         }
         for user in users
+    ], etag)
+
+@router.get("/quota-report")
+async def quota_report(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Per-user storage usage against quota, read from the incremental counters."""
+    users = db.query(User).order_by(User.storage_used_bytes.desc()).all()
+    return [
+        {
+            "id": user.id,
+            "username": user.username,
+            "storage_used_bytes": user.storage_used_bytes,
+            "storage_quota_bytes": user.storage_quota_bytes,
+            "usage_ratio": (
+                user.storage_used_bytes / user.storage_quota_bytes
+                if user.storage_quota_bytes else None
+            )
+        }
+        for user in users
     ]
 
+def start_import(records: list[dict], background_tasks: BackgroundTasks, db: Session, current_user: User) -> dict:
+    if len(records) > MAX_IMPORT_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Import is limited to {MAX_IMPORT_ROWS} rows"
+        )
+    
+    rows, errors = validate_records(db, records)
+    job = create_import_job(db, len(records), errors, current_user.id)
+    if rows:
+        # Runs after the response is sent; hashing 10k bcrypt passwords takes minutes
+        background_tasks.add_task(run_import_job, job.id, rows, current_user.id)
+    else:
+        job.status = "completed"
+        db.commit()
+    return serialize_job(job)
+
+@router.post("/import", status_code=status.HTTP_202_ACCEPTED)
+async def import_users(
+    request: ImportUsersRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Create users in bulk as a background job; poll GET /api/users/import/{job_id}.
+    
+    Each row takes the CreateUserRequest fields, plus optional role names in "roles".
+    """
+    return start_import(request.users, background_tasks, db, current_user)
+
+@router.post("/import-csv", status_code=status.HTTP_202_ACCEPTED)
+async def import_users_csv(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = FormFile(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Create users in bulk from a CSV as a background job.
+    
+    Columns: username, password and optional email, is_admin,
+    storage_quota_bytes, roles (names separated by ';').
+    """
+    try:
+        content = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV must be UTF-8 encoded"
+        )
+    
+    return start_import(csv_records(content), background_tasks, db, current_user)
+
+@router.get("/import/{job_id}")
+async def get_import_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    job = db.query(UserImportJob).filter(UserImportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    return serialize_job(job)
+
 @router.put("/{user_id}")
 async def update_user(
     user_id: int,
@@ -113,7 +225,11 @@ async def update_user(
     if request.role_ids is not None:
         roles = db.query(Role).filter(Role.id.in_(request.role_ids)).all()
         user.roles = roles
+        refresh_permissions(db, [user.id])
+    if "storage_quota_bytes" in request.model_fields_set:
+        user.storage_quota_bytes = request.storage_quota_bytes
     
+    bump_versions(db, [USERS_SCOPE])
     db.commit()
     db.refresh(user)
     
@@ -144,7 +260,9 @@ async def delete_user(
             detail="User not found"
         )
     
+    clear_permissions(db, [user.id])
     db.delete(user)
+    bump_versions(db, [USERS_SCOPE, ASSIGNMENTS_SCOPE])
     db.commit()
     
     return {"message": "User deleted successfully"}
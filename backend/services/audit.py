@@ -0,0 +1,179 @@
+"""
+Audit log of file operations
+Handlers enqueue events in memory without touching the database; a
+background task flushes them to audit_events in batches. The queue is
+bounded and AUDIT_OVERFLOW_POLICY decides what happens when it is full.
+"""
+
+import asyncio
+from datetime import datetime
+from sqlalchemy import insert
+from backend.config import settings
+from backend.database.db import SessionLocal
+from backend.models.audit_event import AuditEvent
+from backend.services.folders import normalize_folder_path
+
+AUDIT_UPLOAD = "upload"
+AUDIT_DOWNLOAD = "download"
+AUDIT_COPY = "copy"
+AUDIT_DELETE = "delete"
+AUDIT_CREATE_FOLDER = "create_folder"
+AUDIT_SHARE = "share"
+AUDIT_SHARE_ACCESS = "share_access"
+
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+WRITE_ATTEMPTS = 3
+
+
+class AuditLog:
+    def __init__(self):
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        # Events taken off the queue but not yet handed to a flush
+        self._batch: list[dict] = []
+        self._in_flight: asyncio.Future | None = None
+        self.dropped = 0
+        self.written = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Create the queue and flusher on the running loop; safe to call repeatedly."""
+        if self._task is not None or not settings.AUDIT_ENABLED:
+            return
+        if settings.AUDIT_OVERFLOW_POLICY not in OVERFLOW_POLICIES:
+            raise ValueError(f"AUDIT_OVERFLOW_POLICY must be one of {', '.join(OVERFLOW_POLICIES)}")
+        self._queue = asyncio.Queue(maxsize=settings.AUDIT_QUEUE_SIZE)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still queued."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        if self._in_flight is not None:
+            await self._in_flight
+        remaining, self._batch = self._batch, []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        for start in range(0, len(remaining), settings.AUDIT_BATCH_SIZE):
+            await self._flush(remaining[start:start + settings.AUDIT_BATCH_SIZE])
+        self._task = None
+        self._queue = None
+
+    async def record(
+        self,
+        action: str,
+        actor_id: int | None,
+        folder_path: str = None,
+        s3_key: str = None,
+        file_id: int = None,
+        bytes: int = None,
+        detail: dict = None
+    ):
+        """Queue an event; only waits when the policy is "block" and the queue is full."""
+        if not settings.AUDIT_ENABLED:
+            return
+        self.start()
+        event = {
+            "occurred_at": datetime.utcnow(),
+            "actor_id": actor_id,
+            "action": action,
+            "folder_path": normalize_folder_path(folder_path) if folder_path is not None else None,
+            "s3_key": s3_key,
+            "file_id": file_id,
+            "bytes": bytes,
+            "detail": detail,
+        }
+        if not self._queue.full():
+            self._queue.put_nowait(event)
+            return
+
+        policy = settings.AUDIT_OVERFLOW_POLICY
+        if policy == "drop_oldest":
+            self._queue.get_nowait()
+            self._queue.put_nowait(event)
+            self.dropped += 1
+        elif policy == "block":
+            try:
+                await asyncio.wait_for(self._queue.put(event), settings.AUDIT_BLOCK_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+        else:
+            self.dropped += 1
+
+    async def record_file(self, action: str, file, actor_id: int | None, detail: dict = None):
+        await self.record(action, actor_id, detail=detail, **file_fields(file))
+
+    async def _run(self):
+        while True:
+            self._batch.append(await self._queue.get())
+            if self._queue.qsize() < settings.AUDIT_BATCH_SIZE - 1:
+                # Let a batch accumulate instead of writing one row per event
+                await asyncio.sleep(settings.AUDIT_FLUSH_INTERVAL_SECONDS)
+            while len(self._batch) < settings.AUDIT_BATCH_SIZE and not self._queue.empty():
+                self._batch.append(self._queue.get_nowait())
+            batch, self._batch = self._batch, []
+            # Shielded so shutdown cannot cancel a write halfway through
+            self._in_flight = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._in_flight)
+            self._in_flight = None
+
+    async def _flush(self, batch: list[dict]):
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                await asyncio.to_thread(self._write, batch)
+                self.written += len(batch)
+                return
+            except Exception as e:
+                print(f"✗ Audit flush of {len(batch)} events failed (attempt {attempt}/{WRITE_ATTEMPTS}): {e}")
+                if attempt < WRITE_ATTEMPTS:
+                    await asyncio.sleep(attempt)
+        self.dropped += len(batch)
+
+    @staticmethod
+    def _write(batch: list[dict]):
+        db = SessionLocal()
+        try:
+            db.execute(insert(AuditEvent), batch)
+            db.commit()
+        finally:
+            db.close()
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": settings.AUDIT_ENABLED,
+            "overflow_policy": settings.AUDIT_OVERFLOW_POLICY,
+            "queue_depth": self.queue_depth,
+            "queue_size": settings.AUDIT_QUEUE_SIZE,
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+
+def file_fields(file) -> dict:
+    """Event columns describing a File; read these before a delete is committed."""
+    return {"folder_path": file.folder_path, "s3_key": file.s3_key, "file_id": file.id, "bytes": file.file_size}
+
+
+def serialize_event(event: AuditEvent) -> dict:
+    return {
+        "id": event.id,
+        "occurred_at": event.occurred_at.isoformat() if event.occurred_at else None,
+        "actor_id": event.actor_id,
+        "action": event.action,
+        "folder_path": event.folder_path,
+        "s3_key": event.s3_key,
+        "file_id": event.file_id,
+        "bytes": event.bytes,
+        "detail": event.detail,
+    }
+
+
+audit_log = AuditLog()
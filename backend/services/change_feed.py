@@ -0,0 +1,103 @@
+"""
+Per-folder change feed
+Mutating file operations append a change row and bump the folder's listing
+version, so clients can fetch only the deltas since their cursor
+"""
+
+import itertools
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.database.db import SessionLocal
+from backend.models.folder_change import FolderChange
+from backend.services.index_versions import bump_folder_versions
+
+OP_UPLOAD = "upload"
+OP_COMPLETE = "complete"
+OP_COPY = "copy"
+OP_DELETE = "delete"
+OP_CREATE_FOLDER = "create_folder"
+
+
+def normalize_feed_path(folder_path: str) -> str:
+    stripped = (folder_path or "").strip("/")
+    return "/" + stripped if stripped else "/"
+
+
+def record_change(
+    db: Session,
+    folder_path: str,
+    operation: str,
+    s3_key: str = None,
+    filename: str = None,
+    file_id: int = None,
+    actor_id: int = None
+):
+    """Append a change for the folder; committed with the caller's transaction."""
+    db.add(FolderChange(
+        folder_path=normalize_feed_path(folder_path),
+        operation=operation,
+        s3_key=s3_key,
+        filename=filename,
+        file_id=file_id,
+        actor_id=actor_id
+    ))
+    bump_folder_versions(db, folder_path)
+
+
+def serialize_change(change: FolderChange) -> dict:
+    return {
+        "cursor": change.id,
+        "folder_path": change.folder_path,
+        "operation": change.operation,
+        "s3_key": change.s3_key,
+        "filename": change.filename,
+        "file_id": change.file_id,
+        "actor_id": change.actor_id,
+        "created_at": change.created_at.isoformat() if change.created_at else None
+    }
+
+
+def settle_cutoff(now: datetime = None) -> datetime:
+    """Changes created at or before this are assumed committed (see CHANGE_FEED_SETTLE_SECONDS)."""
+    return (now or datetime.utcnow()) - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+
+
+def current_cursor() -> int:
+    """Where clients start following the feed: just before the oldest unsettled change."""
+    db = SessionLocal()
+    try:
+        unsettled = db.query(func.min(FolderChange.id)).filter(FolderChange.created_at > settle_cutoff()).scalar()
+        if unsettled is not None:
+            return unsettled - 1
+        return db.query(func.max(FolderChange.id)).scalar() or 0
+    finally:
+        db.close()
+
+
+def fetch_changes(folder_path: str, cursor: int, recursive: bool = False, limit: int = 500) -> list[dict]:
+    """Return settled changes after the cursor using a short-lived session.
+
+    Changes are returned in id order up to the first one still inside the
+    settle window, so a lower id that commits late is never skipped. Long-poll
+    and streaming handlers call this repeatedly while waiting, so it must not
+    hold a pooled connection between polls.
+    """
+    normalized = normalize_feed_path(folder_path)
+    cutoff = settle_cutoff()
+    db = SessionLocal()
+    try:
+        query = db.query(FolderChange).filter(FolderChange.id > cursor)
+        if recursive and normalized != "/":
+            query = query.filter(
+                (FolderChange.folder_path == normalized)
+                | FolderChange.folder_path.startswith(normalized + "/", autoescape=True)
+            )
+        elif not recursive:
+            query = query.filter(FolderChange.folder_path == normalized)
+        changes = query.order_by(FolderChange.id).limit(limit).all()
+        settled = itertools.takewhile(lambda change: change.created_at <= cutoff, changes)
+        return [serialize_change(change) for change in settled]
+    finally:
+        db.close()
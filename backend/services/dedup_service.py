@@ -0,0 +1,132 @@
+"""
+Content-addressed deduplication of uploaded files
+Identical content is stored once under BLOB_PREFIX and shared by reference
+"""
+
+import hashlib
+import uuid
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from backend.models.file import File, Blob
+from backend.services.s3_service import s3_service
+
+# Hidden prefix holding deduplicated objects; excluded from folder listings
+BLOB_PREFIX = ".blobs/"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def is_blob_key(key: str) -> bool:
+    """True for keys and folder paths inside the blob store (leading slashes ignored)."""
+    return (key.lstrip("/") + "/").startswith(BLOB_PREFIX)
+
+
+def storage_key(file: File) -> str:
+    """Return the S3 key that actually holds the file's bytes."""
+    if file.blob is not None:
+        return file.blob.s3_key
+    return file.s3_key
+
+
+def compute_content_hash(s3_key: str) -> str | None:
+    """Stream the object and hash it with SHA-256.
+
+    ETags are not used even when they are plain MD5s: multipart uploads never
+    have one, so the same content would hash differently per upload mode.
+    Blocking; call it from a worker thread.
+    """
+    body = s3_service.get_object_stream(s3_key)
+    if body is None:
+        return None
+    digest = hashlib.sha256()
+    try:
+        for chunk in body.iter_chunks(chunk_size=HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    finally:
+        body.close()
+    return f"sha256:{digest.hexdigest()}"
+
+
+def lock_blob(db: Session, *criteria) -> Blob | None:
+    """The matching blob, row-locked so reference counts change one transaction at a time."""
+    return db.query(Blob).filter(*criteria).with_for_update().first()
+
+
+def add_reference(db: Session, blob: Blob):
+    db.execute(update(Blob).where(Blob.id == blob.id).values(ref_count=Blob.ref_count + 1))
+
+
+def keep_folder(s3_key: str):
+    """Write the folder's .keep marker so the folder stays listed once its object moves to a blob."""
+    folder, _, _ = s3_key.rpartition('/')
+    if folder:
+        s3_service.create_folder(f"{folder}/.keep")
+
+
+def attach_blob(db: Session, file: File, content_hash: str) -> bool:
+    """Move a freshly uploaded file's bytes into shared blob storage.
+
+    If a blob with the same content already exists, the uploaded copy is
+    dropped and the file just references the existing blob.
+    """
+    blob = lock_blob(db, Blob.content_hash == content_hash)
+    if blob is None:
+        # Keys are unique per blob row, so a released blob's key is never reused
+        blob_key = f"{BLOB_PREFIX}{content_hash.replace(':', '/')}/{uuid.uuid4().hex}"
+        if not s3_service.copy_object(file.s3_key, blob_key):
+            return False
+        try:
+            with db.begin_nested():
+                blob = Blob(content_hash=content_hash, s3_key=blob_key, size=file.file_size, ref_count=0)
+                db.add(blob)
+        except IntegrityError:
+            # Another upload with the same content created the blob concurrently
+            s3_service.delete_object(blob_key)
+            blob = lock_blob(db, Blob.content_hash == content_hash)
+            if blob is None:
+                return False
+
+    add_reference(db, blob)
+    keep_folder(file.s3_key)
+    s3_service.delete_object(file.s3_key)
+    file.blob = blob
+    file.content_hash = content_hash
+    return True
+
+
+def add_blob_reference(db: Session, file: File, source: File) -> bool:
+    """Point a copied file at the source's blob (metadata-only copy).
+
+    Returns False if the blob was released concurrently (the source is gone).
+    """
+    blob = lock_blob(db, Blob.id == source.blob_id)
+    if blob is None:
+        return False
+    add_reference(db, blob)
+    file.blob = blob
+    file.content_hash = source.content_hash
+    return True
+
+
+def release_blob(db: Session, file: File) -> str | None:
+    """Drop a file's blob reference.
+
+    Returns the S3 key that should be deleted, or None if the bytes are
+    still referenced by other files.
+    """
+    if file.blob is None:
+        return file.s3_key
+
+    blob_id, blob_key = file.blob.id, file.blob.s3_key
+    # Decremented in SQL: the UPDATE holds the row lock until commit, so
+    # concurrent releases and new references cannot lose a count
+    remaining = db.execute(
+        update(Blob).where(Blob.id == blob_id).values(ref_count=Blob.ref_count - 1).returning(Blob.ref_count)
+    ).scalar()
+    file.blob = None
+    if remaining is None or remaining > 0:
+        return None
+
+    db.flush()
+    db.execute(delete(Blob).where(Blob.id == blob_id, Blob.ref_count <= 0))
+    return blob_key
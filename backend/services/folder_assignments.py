@@ -0,0 +1,92 @@
+"""
+Set-based folder assignment writes
+Assignments are upserted with INSERT ... ON CONFLICT (folder_path, user_id)
+in a fixed number of statements, however many users or folders are involved
+"""
+
+from datetime import datetime
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.orm import Session
+from backend.database.db import dialect_insert
+from backend.models.file import FolderAssignment
+from backend.services.folders import canonical_path, ensure_folders
+from backend.services.permissions import refresh_permissions
+
+ASSIGNMENT_FIELDS = ("can_read", "can_write", "can_delete", "can_share", "quota_bytes")
+# Rows per INSERT statement; keeps SQLite under its bound-parameter limit
+UPSERT_BATCH_SIZE = 1000
+
+
+def existing_pairs(db: Session, pairs: list[tuple[str, int]]) -> set[tuple[str, int]]:
+    """(folder_path, user_id) pairs that already have an assignment, in one query per batch."""
+    found = set()
+    for start in range(0, len(pairs), UPSERT_BATCH_SIZE):
+        batch = pairs[start:start + UPSERT_BATCH_SIZE]
+        found.update(db.execute(
+            select(FolderAssignment.folder_path, FolderAssignment.user_id)
+            .where(tuple_(FolderAssignment.folder_path, FolderAssignment.user_id).in_(batch))
+        ).tuples())
+    return found
+
+
+def upsert_assignments(db: Session, rows: list[dict], assigned_by: int) -> dict[tuple[str, int], str]:
+    """Insert or update assignments and refresh the users' effective permissions;
+    committed with the caller's transaction.
+
+    Each row has folder_path, user_id and the ASSIGNMENT_FIELDS. Later rows
+    for the same (folder_path, user_id) win. Returns "assigned" or "updated"
+    per pair.
+    """
+    merged: dict[tuple[str, int], dict] = {}
+    for row in rows:
+        folder_path = canonical_path(row["folder_path"])
+        merged[(folder_path, row["user_id"])] = {
+            "folder_path": folder_path,
+            "user_id": row["user_id"],
+            **{field: row.get(field) for field in ASSIGNMENT_FIELDS},
+        }
+    if not merged:
+        return {}
+
+    pairs = list(merged)
+    already = existing_pairs(db, pairs)
+
+    folder_ids = ensure_folders(db, [folder_path for folder_path, _ in pairs], assigned_by)
+    insert = dialect_insert(db)
+    now = datetime.utcnow()
+    values = [
+        {**value, "folder_id": folder_ids[value["folder_path"]], "assigned_by": assigned_by, "assigned_at": now}
+        for value in merged.values()
+    ]
+    for start in range(0, len(values), UPSERT_BATCH_SIZE):
+        statement = insert(FolderAssignment).values(values[start:start + UPSERT_BATCH_SIZE])
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["folder_path", "user_id"],
+            # Re-assigning changes permissions and quota only; the original assigner and time are kept
+            set_={field: statement.excluded[field] for field in (*ASSIGNMENT_FIELDS, "folder_id")}
+        ))
+    refresh_permissions(db, {user_id for _, user_id in pairs})
+
+    return {pair: "updated" if pair in already else "assigned" for pair in pairs}
+
+
+def remove_unlisted_assignments(db: Session, folder_paths: list[str], keep: list[tuple[str, int]]) -> int:
+    """Delete assignments on `folder_paths` whose (folder_path, user_id) is not in `keep`."""
+    folder_paths = sorted({canonical_path(f) for f in folder_paths})
+    if not folder_paths:
+        return 0
+    keep = set(keep)
+    current = db.execute(
+        select(FolderAssignment.id, FolderAssignment.folder_path, FolderAssignment.user_id)
+        .where(FolderAssignment.folder_path.in_(folder_paths))
+    ).all()
+    stale = [row for row in current if (row.folder_path, row.user_id) not in keep]
+    stale_ids = [row.id for row in stale]
+    for start in range(0, len(stale_ids), UPSERT_BATCH_SIZE):
+        db.execute(
+            delete(FolderAssignment)
+            .where(FolderAssignment.id.in_(stale_ids[start:start + UPSERT_BATCH_SIZE]))
+            .execution_options(synchronize_session=False)
+        )
+    refresh_permissions(db, {row.user_id for row in stale})
+    return len(stale_ids)
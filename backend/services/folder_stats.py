@@ -0,0 +1,148 @@
+"""
+Incrementally maintained folder aggregates
+Each folder's row holds the totals of its whole subtree. A change updates
+the row of every folder on the object's path, root first, in one upsert, so
+reading a folder's size is a single-row lookup and never lists the bucket.
+"""
+
+from datetime import datetime
+from typing import NamedTuple
+from sqlalchemy import case, or_
+from sqlalchemy.orm import Session
+from backend.database.db import dialect_insert
+from backend.models.file import File
+from backend.models.folder_stats import FolderStats
+from backend.services.s3_service import s3_service
+from backend.services.dedup_service import BLOB_PREFIX
+
+# Folders per lookup query; keeps SQLite under its bound-parameter limit
+STATS_BATCH_SIZE = 1000
+
+
+class FolderTotals(NamedTuple):
+    """Size and count of everything under a folder."""
+    total_bytes: int
+    object_count: int
+    last_modified: datetime | None
+
+
+def folder_with_ancestors(folder_path: str) -> list[str]:
+    parts = [p for p in (folder_path or "").strip("/").split("/") if p]
+    return ["/" + "/".join(parts[:i]) for i in range(len(parts) + 1)]
+
+
+def folder_of_key(s3_key: str) -> str:
+    parts = s3_key.split("/")
+    return "/" + "/".join(parts[:-1]) if len(parts) > 1 else "/"
+
+
+def apply_delta(db: Session, folder_path: str, bytes_delta: int, count_delta: int, modified_at: datetime = None):
+    """Add the deltas to the folder and each ancestor; committed with the caller's transaction.
+
+    Rows are upserted root first, so concurrent writers lock them in the same
+    order. The root row is therefore held by every writer until it commits.
+    """
+    if not bytes_delta and not count_delta:
+        return
+    insert = dialect_insert(db)
+    statement = insert(FolderStats).values([
+        {
+            "folder_path": path,
+            "total_bytes": bytes_delta,
+            "object_count": count_delta,
+            "last_modified": modified_at,
+        }
+        for path in folder_with_ancestors(folder_path)
+    ])
+    values = {
+        "total_bytes": FolderStats.total_bytes + statement.excluded.total_bytes,
+        "object_count": FolderStats.object_count + statement.excluded.object_count,
+        "updated_at": datetime.utcnow(),
+    }
+    if modified_at is not None:
+        values["last_modified"] = case(
+            (or_(FolderStats.last_modified.is_(None), FolderStats.last_modified < modified_at), modified_at),
+            else_=FolderStats.last_modified
+        )
+    db.execute(statement.on_conflict_do_update(index_elements=["folder_path"], set_=values))
+
+
+def file_added(db: Session, file: File, previous_size: int | None = None):
+    """Account for a file whose size just became known (complete or copy).
+
+    A file is counted once it has a size; re-completing only applies the difference.
+    """
+    if file.file_size is None:
+        return
+    count_delta = 1 if previous_size is None else 0
+    apply_delta(db, file.folder_path, file.file_size - (previous_size or 0), count_delta, datetime.utcnow())
+
+
+def file_removed(db: Session, file: File):
+    if file.file_size is None:
+        return
+    apply_delta(db, file.folder_path, -file.file_size, -1)
+
+
+def get_folder_stats(db: Session, folder_paths: list[str]) -> dict[str, FolderTotals]:
+    """Subtree totals per normalized folder path; folders with no row are absent."""
+    totals = {}
+    folder_paths = sorted(set(folder_paths))
+    for start in range(0, len(folder_paths), STATS_BATCH_SIZE):
+        rows = db.query(FolderStats.folder_path, FolderStats.total_bytes, FolderStats.object_count, FolderStats.last_modified).filter(
+            FolderStats.folder_path.in_(folder_paths[start:start + STATS_BATCH_SIZE])
+        )
+        totals.update({row.folder_path: FolderTotals(row.total_bytes, row.object_count, row.last_modified) for row in rows})
+    return totals
+
+
+def lock_folder_stats(db: Session, folder_path: str):
+    """Lock the rows a write into `folder_path` will update, in apply_delta's order."""
+    db.query(FolderStats.folder_path).filter(
+        FolderStats.folder_path.in_(folder_with_ancestors(folder_path))
+    ).order_by(FolderStats.folder_path).with_for_update().all()
+
+
+def rebuild_folder_stats(db: Session) -> int:
+    """Recompute every aggregate from a full bucket listing plus blob-backed files.
+
+    Corrects drift from objects written or removed outside the API.
+    Returns the number of folders written. If the listing fails the error
+    propagates before any aggregate is touched.
+    """
+    totals: dict[str, list] = {}
+
+    def add(folder_path: str, size: int, modified_at: datetime | None):
+        for path in folder_with_ancestors(folder_path):
+            entry = totals.setdefault(path, [0, 0, None])
+            entry[0] += size
+            entry[1] += 1
+            if modified_at is not None and (entry[2] is None or modified_at > entry[2]):
+                entry[2] = modified_at
+
+    for obj in s3_service.iter_objects():
+        key = obj.get('Key', '')
+        if not key or key.startswith(BLOB_PREFIX) or key.endswith('/'):
+            continue
+        if key == '.keep' or key.endswith('/.keep'):
+            # Folder markers make the folder exist but are not counted
+            for path in folder_with_ancestors(folder_of_key(key)):
+                totals.setdefault(path, [0, 0, None])
+            continue
+        modified_at = obj.get('LastModified')
+        if modified_at is not None:
+            modified_at = modified_at.replace(tzinfo=None)
+        add(folder_of_key(key), obj.get('Size', 0), modified_at)
+
+    # Deduplicated files have no object at their logical key
+    blob_backed = db.query(File).filter(File.blob_id.isnot(None), File.file_size.isnot(None)).all()
+    for file in blob_backed:
+        add(folder_of_key(file.s3_key), file.file_size, file.uploaded_at)
+
+    db.query(FolderStats).delete()
+    db.add_all([
+        FolderStats(folder_path=path, total_bytes=size, object_count=count, last_modified=modified_at)
+        for path, (size, count, modified_at) in totals.items()
+    ])
+    db.commit()
+    return len(totals)
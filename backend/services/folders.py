@@ -0,0 +1,207 @@
+"""
+Folder tree
+Folders are rows linked by parent_id with their materialized path, so child
+listings and subtree queries are indexed lookups instead of prefix scans
+over S3 keys. Writes create missing ancestors a whole tree level at a time.
+"""
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+from backend.database.db import SessionLocal, dialect_insert
+from backend.models.folder import Folder
+from backend.models.folder_stats import FolderStats
+from backend.models.file import File, FolderAssignment
+from backend.services.s3_service import s3_service
+
+ROOT_PATH = "/"
+# Paths per lookup query; keeps SQLite under its bound-parameter limit
+LOOKUP_BATCH_SIZE = 1000
+
+
+def normalize_folder_path(path: str) -> str:
+    stripped = path.strip("/")
+    return "/" + stripped if stripped else "/"
+
+
+def canonical_path(path: str) -> str:
+    """Like normalize_folder_path, but also collapses empty segments ("/a//b" -> "/a/b")."""
+    parts = [part for part in (path or "").split("/") if part]
+    return "/" + "/".join(parts)
+
+
+def path_with_ancestors(path: str) -> list[str]:
+    """Root first: "/a/b" -> ["/", "/a", "/a/b"]."""
+    parts = [part for part in path.split("/") if part]
+    return [ROOT_PATH] + ["/" + "/".join(parts[:n]) for n in range(1, len(parts) + 1)]
+
+
+def parent_path(path: str) -> str | None:
+    if path == ROOT_PATH:
+        return None
+    return path.rsplit("/", 1)[0] or ROOT_PATH
+
+
+def subtree_condition(column, path: str):
+    """`column` (a materialized path) is `path` or lies below it."""
+    path = normalize_folder_path(path)
+    if path == ROOT_PATH:
+        return column.isnot(None)
+    return or_(column == path, column.startswith(path + "/", autoescape=True))
+
+
+def folder_ids(db: Session, paths: list[str], lock: bool = False) -> dict[str, int]:
+    """Folder id per existing path. With `lock`, the rows are held FOR KEY SHARE in path
+    order, so prune_folders cannot delete a folder a write is about to reference."""
+    found = {}
+    paths = sorted(set(paths))
+    for start in range(0, len(paths), LOOKUP_BATCH_SIZE):
+        query = select(Folder.path, Folder.id).where(Folder.path.in_(paths[start:start + LOOKUP_BATCH_SIZE]))
+        if lock:
+            query = query.order_by(Folder.path).with_for_update(read=True, key_share=True)
+        found.update(db.execute(query).all())
+    return found
+
+
+def ensure_folders(db: Session, paths: list[str], created_by: int = None) -> dict[str, int]:
+    """Folder id per normalized path, creating missing folders and ancestors.
+
+    One INSERT ... ON CONFLICT DO NOTHING per tree level, so concurrent
+    writers creating the same folder both succeed. Committed with the
+    caller's transaction.
+    """
+    wanted = {normalize_folder_path(path): canonical_path(path) for path in paths}
+    if not wanted:
+        return {}
+    needed = {ancestor for path in wanted.values() for ancestor in path_with_ancestors(path)}
+    ids = folder_ids(db, list(needed), lock=True)
+    missing = needed - ids.keys()
+    if missing:
+        insert = dialect_insert(db)
+        by_depth: dict[int, list[str]] = {}
+        for path in missing:
+            by_depth.setdefault(len(path_with_ancestors(path)) - 1, []).append(path)
+        for depth in sorted(by_depth):
+            level = sorted(by_depth[depth])
+            values = [
+                {
+                    "parent_id": ids[parent_path(path)] if depth else None,
+                    "name": path.rsplit("/", 1)[-1],
+                    "path": path,
+                    "depth": depth,
+                    "created_by": created_by,
+                }
+                for path in level
+            ]
+            for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+                db.execute(insert(Folder).values(values[start:start + LOOKUP_BATCH_SIZE]).on_conflict_do_nothing(index_elements=["path"]))
+            ids.update(folder_ids(db, level, lock=True))
+    return {path: ids[canonical] for path, canonical in wanted.items()}
+
+
+def ensure_folder(db: Session, path: str, created_by: int = None) -> int:
+    return ensure_folders(db, [path], created_by)[normalize_folder_path(path)]
+
+
+def folder_is_empty(db: Session, folder: Folder) -> bool:
+    """No child folder, file or assignment references the folder, and its stats count no objects.
+
+    The database does not record .keep markers, so a folder it finds empty
+    costs one HEAD to learn whether it was created explicitly and still exists.
+    """
+    if db.query(Folder.id).filter(Folder.parent_id == folder.id).first():
+        return False
+    for model in (File, FolderAssignment):
+        if db.query(model.id).filter(or_(model.folder_id == folder.id, model.folder_path == folder.path)).first():
+            return False
+    if (db.query(FolderStats.object_count).filter(FolderStats.folder_path == folder.path).scalar() or 0) > 0:
+        return False
+    return not s3_service.object_exists(folder.path.strip("/") + "/.keep")
+
+
+def prune_candidates(db: Session, folder_paths: list[str], marker_deleted: bool = False) -> list[str]:
+    """Folders a delete may have emptied: their .keep marker went, or their stats count reached zero.
+
+    Reads one folder_stats row per folder, which the delete has just updated.
+    """
+    paths = {canonical_path(path) for path in folder_paths} - {ROOT_PATH}
+    if marker_deleted or not paths:
+        return sorted(paths)
+    counts = dict(db.query(FolderStats.folder_path, FolderStats.object_count).filter(FolderStats.folder_path.in_(paths)).all())
+    return sorted(path for path in paths if (counts.get(path) or 0) <= 0)
+
+
+def prune_folders(db: Session, paths: list[str]) -> int:
+    """Delete the given folders if empty, then any ancestors that leaves empty.
+
+    The chain is locked FOR UPDATE in path order, the order ensure_folders
+    locks in, so a concurrent write either keeps the folder alive or
+    recreates it. Committed with the caller's transaction; returns folders deleted.
+    """
+    pruned = 0
+    for path in sorted({canonical_path(path) for path in paths}, reverse=True):
+        if path == ROOT_PATH:
+            continue
+        folder = db.query(Folder).filter(Folder.path == path).first()
+        if folder is None or not folder_is_empty(db, folder):
+            continue
+        chain = (
+            db.query(Folder)
+            .filter(Folder.path.in_(path_with_ancestors(path)[1:]))
+            .order_by(Folder.path)
+            .with_for_update()
+            .all()
+        )
+        for folder in sorted(chain, key=lambda folder: folder.depth, reverse=True):
+            if not folder_is_empty(db, folder):
+                break
+            db.delete(folder)
+            db.flush()
+            pruned += 1
+    return pruned
+
+
+def prune_empty_folders(paths: list[str]):
+    """Background task queued by the delete routes once their transaction has committed."""
+    db = SessionLocal()
+    try:
+        pruned = prune_folders(db, paths)
+        db.commit()
+        if pruned:
+            print(f"✓ Pruned {pruned} empty folder(s)")
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Pruning folders {paths} failed: {e}")
+    finally:
+        db.close()
+
+
+def child_folders(db: Session, path: str, condition=None) -> list[Folder]:
+    """Immediate subfolders of `path`, by name, optionally filtered by `condition` (e.g. an ACL clause)."""
+    parent = db.query(Folder.id).filter(Folder.path == normalize_folder_path(path)).scalar()
+    if parent is None:
+        return []
+    query = db.query(Folder).filter(Folder.parent_id == parent)
+    if condition is not None:
+        query = query.filter(condition)
+    return query.order_by(Folder.name).all()
+
+
+def backfill_folder_ids(db: Session) -> int:
+    """Point files and assignments without a folder_id at their folder; returns rows updated."""
+    updated = 0
+    for model in (File, FolderAssignment):
+        paths = [
+            path for (path,) in db.query(model.folder_path)
+            .filter(model.folder_id.is_(None), model.folder_path.isnot(None))
+            .distinct()
+        ]
+        ids = ensure_folders(db, paths)
+        for path in paths:
+            result = db.execute(
+                update(model)
+                .where(model.folder_id.is_(None), model.folder_path == path)
+                .values(folder_id=ids[normalize_folder_path(path)])
+                .execution_options(synchronize_session=False)
+            )
+            updated += result.rowcount
+    return updated
@@ -0,0 +1,76 @@
+"""
+Listing index versions
+Every mutation bumps the version of the scopes it affects, so listing
+endpoints can derive strong ETags without re-reading S3 or serializing.
+A folder write bumps that folder and its ancestors, so a listing's ETag
+check reads the single row of its own folder.
+"""
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from backend.models.index_version import IndexVersion
+
+USERS_SCOPE = "users"
+ASSIGNMENTS_SCOPE = "assignments"
+# Storage usage counters on users; kept apart so uploads do not invalidate every USERS_SCOPE reader
+USAGE_SCOPE = "usage"
+
+
+def folder_scope(folder_path: str) -> str:
+    stripped = (folder_path or "").strip("/")
+    return "folder:/" + stripped
+
+
+def bump_versions(db: Session, scopes: list[str]):
+    """Increment the version of each scope; committed with the caller's transaction."""
+    for scope in sorted(set(scopes)):
+        result = db.execute(
+            update(IndexVersion)
+            .where(IndexVersion.scope == scope)
+            .values(version=IndexVersion.version + 1)
+        )
+        if result.rowcount:
+            continue
+        try:
+            with db.begin_nested():
+                db.add(IndexVersion(scope=scope, version=1))
+        except IntegrityError:
+            # Created concurrently; increment the row that now exists
+            db.execute(
+                update(IndexVersion)
+                .where(IndexVersion.scope == scope)
+                .values(version=IndexVersion.version + 1)
+            )
+
+
+def folder_scopes_with_ancestors(folder_path: str) -> list[str]:
+    """"/a/b" -> ["folder:/", "folder:/a", "folder:/a/b"]."""
+    parts = [part for part in (folder_path or "").split("/") if part]
+    return [folder_scope("/" + "/".join(parts[:n])) for n in range(len(parts) + 1)]
+
+
+def bump_folder_versions(db: Session, *folder_paths: str):
+    """Bump each folder and its ancestors: a change deep in the tree can add a
+    subfolder (or change a size) in any ancestor's listing.
+
+    bump_versions takes the rows in scope order, root first, so concurrent
+    writers lock them in the same order and cannot deadlock. The ancestor
+    rows, "folder:/" above all, are locked until the writer commits.
+    """
+    bump_versions(db, [scope for folder_path in folder_paths for scope in folder_scopes_with_ancestors(folder_path)])
+
+
+def subtree_version(db: Session, folder_path: str) -> int:
+    """Version of the folder's listing, covering every change below it."""
+    scope = folder_scope(folder_path)
+    return get_versions(db, [scope])[scope]
+
+
+def get_versions(db: Session, scopes: list[str]) -> dict[str, int]:
+    rows = db.query(IndexVersion.scope, IndexVersion.version).filter(
+        IndexVersion.scope.in_(scopes)
+    ).all()
+    versions = {scope: 0 for scope in scopes}
+    versions.update({scope: version for scope, version in rows})
+    return versions
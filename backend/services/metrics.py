@@ -0,0 +1,203 @@
+"""
+Prometheus metrics
+Hot paths only do a perf_counter() and a dict update per event; histograms
+are observed once per request/call. Without prometheus_client installed
+every recorder is a no-op.
+
+With several workers, set PROMETHEUS_MULTIPROC_DIR (an empty directory,
+cleared on deploy) so any worker's /metrics reports all of them. Callback
+gauges are not supported in that mode: each worker instead pushes the
+values of register_gauge callbacks every GAUGE_REFRESH_SECONDS, and the
+scrape combines workers by the gauge's multiprocess_mode.
+"""
+
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        REGISTRY,
+        generate_latest,
+        multiprocess,
+    )
+except ImportError:
+    Counter = None
+
+ENABLED = Counter is not None
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+GAUGE_REFRESH_SECONDS = 5.0
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+# Per-request DB accumulator: {"queries": int, "seconds": float}
+request_db_stats: ContextVar[dict | None] = ContextVar("request_db_stats", default=None)
+# (gauge, callback) pairs pushed by refresh_gauges in multiprocess mode
+callback_gauges: list[tuple] = []
+
+if ENABLED:
+    HTTP_REQUEST_DURATION = Histogram(
+        "http_request_duration_seconds", "HTTP request latency by route template",
+        ["method", "route", "status"], buckets=LATENCY_BUCKETS
+    )
+    S3_CALL_DURATION = Histogram(
+        "s3_call_duration_seconds", "Object storage call latency by operation",
+        ["operation", "outcome"], buckets=LATENCY_BUCKETS
+    )
+    DB_QUERIES_PER_REQUEST = Histogram(
+        "db_queries_per_request", "SQL statements executed per HTTP request",
+        ["route"], buckets=QUERY_COUNT_BUCKETS
+    )
+    DB_TIME_PER_REQUEST = Histogram(
+        "db_query_seconds_per_request", "Total SQL execution time per HTTP request",
+        ["route"], buckets=LATENCY_BUCKETS
+    )
+    DB_QUERIES = Counter("db_queries_total", "SQL statements executed")
+    CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and result", ["cache", "result"])
+    # Across workers, the most lagging live one
+    EVENT_LOOP_LAG = Gauge("event_loop_lag_seconds", "Most recent event loop scheduling delay", multiprocess_mode="livemax")
+    EVENT_LOOP_LAG_HISTOGRAM = Histogram(
+        "event_loop_lag_seconds_distribution", "Event loop scheduling delay",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+    )
+
+
+def observe_request(method: str, route: str, status: int, duration: float):
+    if not ENABLED:
+        return
+    HTTP_REQUEST_DURATION.labels(method, route, str(status)).observe(duration)
+    stats = request_db_stats.get()
+    if stats is not None:
+        DB_QUERIES_PER_REQUEST.labels(route).observe(stats["queries"])
+        DB_TIME_PER_REQUEST.labels(route).observe(stats["seconds"])
+
+
+def observe_s3(operation: str, duration: float, outcome: str = "ok"):
+    if ENABLED:
+        S3_CALL_DURATION.labels(operation, outcome).observe(duration)
+
+
+@contextmanager
+def time_s3(operation: str):
+    """Time S3 work that does not go over the wire (e.g. presigning)."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        observe_s3(operation, time.perf_counter() - start, outcome)
+
+
+def record_cache(cache: str, hit: bool):
+    if ENABLED:
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def instrument_s3_client(client):
+    """Time every API call through botocore's before/after-call events."""
+    if not ENABLED:
+        return
+
+    def before_call(context, **kwargs):
+        context["metrics_start"] = time.perf_counter()
+        context["metrics_operation"] = kwargs["model"].name
+
+    def after_call(context, http_response=None, **kwargs):
+        start = context.get("metrics_start")
+        if start is not None:
+            status = getattr(http_response, "status_code", 200)
+            outcome = "ok" if status < 400 else "error"
+            observe_s3(context["metrics_operation"], time.perf_counter() - start, outcome)
+
+    def after_call_error(context, **kwargs):
+        start = context.get("metrics_start")
+        if start is not None:
+            observe_s3(context["metrics_operation"], time.perf_counter() - start, "error")
+
+    client.meta.events.register('before-call.s3', before_call)
+    client.meta.events.register('after-call.s3', after_call)
+    client.meta.events.register('after-call-error.s3', after_call_error)
+
+
+def instrument_engine(engine):
+    """Count statements and accumulate their time into the current request."""
+    if not ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_query_start")
+        if not starts:
+            return
+        duration = time.perf_counter() - starts.pop()
+        DB_QUERIES.inc()
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats["queries"] += 1
+            stats["seconds"] += duration
+
+
+def register_gauge(name: str, description: str, func, multiprocess_mode: str = "livesum"):
+    """Expose a callback-driven gauge (e.g. S3 pool usage).
+
+    In a single process `func` runs at scrape time. In multiprocess mode it
+    runs in every worker from refresh_gauges, so values lag by up to
+    GAUGE_REFRESH_SECONDS; use "livesum" for levels (in-flight calls, queue
+    depth) and "sum" for running totals, which then keep the counts of
+    workers that have exited.
+    """
+    if not ENABLED:
+        return
+    gauge = Gauge(name, description, multiprocess_mode=multiprocess_mode)
+    if MULTIPROCESS:
+        callback_gauges.append((gauge, func))
+    else:
+        gauge.set_function(func)
+
+
+async def refresh_gauges(interval: float = GAUGE_REFRESH_SECONDS):
+    """Background task setting this worker's callback gauges (multiprocess mode only)."""
+    if not (ENABLED and MULTIPROCESS):
+        return
+    while True:
+        for gauge, func in callback_gauges:
+            gauge.set(func())
+        await asyncio.sleep(interval)
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Background task measuring how late the loop wakes up from a fixed sleep."""
+    if not ENABLED:
+        return
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(loop.time() - expected, 0.0)
+        EVENT_LOOP_LAG.set(lag)
+        EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Serialize all metrics; aggregates across workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
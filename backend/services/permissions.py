@@ -0,0 +1,207 @@
+"""
+Effective permissions
+Role flags and folder assignments are folded into bit masks per (user,
+assigned folder) in effective_permissions, so a permission check is one
+indexed lookup instead of walking roles and prefix-matching assignments.
+Rows are rebuilt for the affected users whenever roles, role membership or
+folder assignments change.
+"""
+
+from sqlalchemy import delete, false, or_, select
+from sqlalchemy.orm import Session
+from backend.models.user import User, Role, user_roles
+from backend.models.file import FolderAssignment
+from backend.models.effective_permission import EffectivePermission
+from backend.services.folders import ROOT_PATH, canonical_path, path_with_ancestors, subtree_condition
+
+READ = 1
+WRITE = 2
+DELETE = 4
+SHARE = 8
+COPY = 16
+ALL_BITS = READ | WRITE | DELETE | SHARE | COPY
+
+ACTION_BITS = {"read": READ, "write": WRITE, "delete": DELETE, "share": SHARE, "copy": COPY}
+ROLE_FLAGS = (("can_read", READ), ("can_write", WRITE), ("can_copy", COPY), ("can_delete", DELETE), ("can_share", SHARE))
+ASSIGNMENT_FLAGS = (("can_read", READ), ("can_write", WRITE), ("can_delete", DELETE), ("can_share", SHARE))
+# Assignments extend these role-level checks; copy and share need the role flag
+ASSIGNMENT_EXTENDS_ROLE = READ | WRITE | DELETE
+# Users per query and per DELETE; keeps SQLite under its bound-parameter limit
+REFRESH_BATCH_SIZE = 500
+
+
+def flag_bits(row, flags) -> int:
+    bits = 0
+    for flag, bit in flags:
+        if getattr(row, flag):
+            bits |= bit
+    return bits
+
+
+def compute_permissions(db: Session, user_ids: list[int]) -> list[dict]:
+    """effective_permissions rows for `user_ids`, derived from roles and assignments."""
+    role_bits = {user_id: 0 for user_id in user_ids}
+    for row in db.execute(
+        select(user_roles.c.user_id, *(getattr(Role, flag) for flag, _ in ROLE_FLAGS))
+        .join(Role, Role.id == user_roles.c.role_id)
+        .where(user_roles.c.user_id.in_(user_ids))
+    ):
+        role_bits[row.user_id] |= flag_bits(row, ROLE_FLAGS)
+
+    assigned: dict[int, dict[str, int]] = {user_id: {} for user_id in user_ids}
+    for row in db.execute(
+        select(FolderAssignment.user_id, FolderAssignment.folder_path, *(getattr(FolderAssignment, flag) for flag, _ in ASSIGNMENT_FLAGS))
+        .where(FolderAssignment.user_id.in_(user_ids))
+    ):
+        path = canonical_path(row.folder_path)
+        assigned[row.user_id][path] = assigned[row.user_id].get(path, 0) | flag_bits(row, ASSIGNMENT_FLAGS)
+
+    rows = []
+    for user_id in user_ids:
+        paths = assigned[user_id]
+        granted = 0
+        for bits in paths.values():
+            granted |= bits
+        for path in {ROOT_PATH, *paths}:
+            folder_bits = 0
+            for ancestor in path_with_ancestors(path):
+                folder_bits |= paths.get(ancestor, 0)
+            rows.append({
+                "user_id": user_id,
+                "folder_path": path,
+                "folder_bits": folder_bits,
+                "role_bits": role_bits[user_id],
+                "granted_bits": granted,
+            })
+    return rows
+
+
+def refresh_permissions(db: Session, user_ids):
+    """Rebuild the rows of `user_ids`; committed with the caller's transaction.
+
+    Call after any change to their roles, a role's flags, or their assignments
+    (flush first so the change is visible to the queries here). The users'
+    rows are locked first, in id order, so two transactions refreshing the
+    same user take turns instead of both inserting after the DELETE.
+    """
+    user_ids = sorted(set(user_ids))
+    db.flush()
+    for start in range(0, len(user_ids), REFRESH_BATCH_SIZE):
+        batch = user_ids[start:start + REFRESH_BATCH_SIZE]
+        db.execute(select(User.id).where(User.id.in_(batch)).order_by(User.id).with_for_update())
+        db.execute(delete(EffectivePermission).where(EffectivePermission.user_id.in_(batch)).execution_options(synchronize_session=False))
+        rows = compute_permissions(db, batch)
+        if rows:
+            db.execute(EffectivePermission.__table__.insert(), rows)
+
+
+def clear_permissions(db: Session, user_ids: list[int]):
+    """Drop the rows of users being deleted."""
+    db.execute(delete(EffectivePermission).where(EffectivePermission.user_id.in_(user_ids)).execution_options(synchronize_session=False))
+
+
+def refresh_role_members(db: Session, role_id: int):
+    """Rebuild the rows of every user holding the role."""
+    refresh_permissions(db, [user_id for (user_id,) in db.execute(select(user_roles.c.user_id).where(user_roles.c.role_id == role_id))])
+
+
+def rebuild_all_permissions(db: Session) -> int:
+    user_ids = [user_id for (user_id,) in db.execute(select(User.id))]
+    db.execute(delete(EffectivePermission))
+    refresh_permissions(db, user_ids)
+    return len(user_ids)
+
+
+def permission_bits(db: Session, user: User, folder_path: str) -> tuple[int, int, int]:
+    """(folder_bits, role_bits, granted_bits) of the user on the folder, in one indexed query."""
+    if user.is_admin:
+        return ALL_BITS, ALL_BITS, ALL_BITS
+    path = canonical_path(folder_path)
+    ancestors = path_with_ancestors(path)
+    rows = db.execute(
+        select(EffectivePermission.folder_bits, EffectivePermission.role_bits, EffectivePermission.granted_bits)
+        .where(EffectivePermission.user_id == user.id, EffectivePermission.folder_path.in_(ancestors))
+    ).all()
+    if not rows:
+        # Every materialized user has a "/" row; derive (without writing) for users created before this table
+        rows = [
+            (row["folder_bits"], row["role_bits"], row["granted_bits"])
+            for row in compute_permissions(db, [user.id]) if row["folder_path"] in ancestors
+        ]
+    folder_bits = 0
+    for bits, _, _ in rows:
+        folder_bits |= bits
+    return folder_bits, rows[0][1], rows[0][2]
+
+
+def has_folder_permission(db: Session, user: User, folder_path: str, bit: int) -> bool:
+    """Granted by an assignment on the folder or one of its ancestors."""
+    return bool(permission_bits(db, user, folder_path)[0] & bit)
+
+
+def has_permission(db: Session, user: User, permission: str) -> bool:
+    """The user-level check: a role grants it, or (read/write/delete) any assignment does."""
+    bit = ACTION_BITS[permission]
+    _, role_bits, granted_bits = permission_bits(db, user, ROOT_PATH)
+    return bool((role_bits | (granted_bits & ASSIGNMENT_EXTENDS_ROLE)) & bit)
+
+
+class FolderAccess:
+    """Which folders a user may read and navigate, for filtering listings and search.
+
+    Built from the same effective_permissions rows as has_folder_permission,
+    so a folder is listed exactly when its files can be downloaded. A folder
+    is navigable when it is readable or lies on the path to a readable one.
+    `readable` is None for admins, who see the whole tree.
+    """
+
+    def __init__(self, readable: list[str] | None):
+        self.readable = readable
+
+    @property
+    def everything(self) -> bool:
+        return self.readable is None or ROOT_PATH in self.readable
+
+    def can_read(self, folder_path: str) -> bool:
+        if self.everything:
+            return True
+        path = canonical_path(folder_path)
+        return any(path == root or path.startswith(root + "/") for root in self.readable)
+
+    def can_navigate(self, folder_path: str) -> bool:
+        if self.can_read(folder_path):
+            return True
+        path = canonical_path(folder_path)
+        if path == ROOT_PATH:
+            return bool(self.readable)
+        return any(root.startswith(path + "/") for root in self.readable)
+
+    def read_clause(self, column):
+        """SQL filter for `column` (a folder path) lying in a readable subtree; None when unrestricted."""
+        if self.everything:
+            return None
+        if not self.readable:
+            return false()
+        return or_(*(subtree_condition(column, root) for root in self.readable))
+
+    def navigate_clause(self, column):
+        """read_clause plus the folders on the path to a readable one."""
+        if self.everything:
+            return None
+        ancestors = {ancestor for root in self.readable for ancestor in path_with_ancestors(root)[:-1]}
+        if not ancestors:
+            return self.read_clause(column)
+        return or_(self.read_clause(column), column.in_(sorted(ancestors)))
+
+
+def folder_access(db: Session, user: User) -> FolderAccess:
+    """The user's FolderAccess, from one indexed query over their rows."""
+    if user.is_admin:
+        return FolderAccess(None)
+    rows = db.execute(
+        select(EffectivePermission.folder_path, EffectivePermission.folder_bits)
+        .where(EffectivePermission.user_id == user.id)
+    ).all()
+    if not rows:
+        rows = [(row["folder_path"], row["folder_bits"]) for row in compute_permissions(db, [user.id])]
+    return FolderAccess(sorted(path for path, bits in rows if bits & READ))
@@ -0,0 +1,105 @@
+"""
+Storage quota accounting
+Per-user usage is an incremental counter on users; folder usage comes from
+folder_stats. Quotas are checked when presigned upload URLs are issued and
+again, under row locks, when the upload completes.
+"""
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from backend.models.user import User
+from backend.models.file import File, FolderAssignment
+from backend.services.folder_stats import get_folder_stats, lock_folder_stats
+from backend.services.index_versions import USAGE_SCOPE, bump_versions
+from backend.services.s3_service import MAX_UPLOAD_BYTES
+
+
+def _normalize(path: str) -> str:
+    stripped = (path or "").strip("/")
+    return "/" + stripped if stripped else "/"
+
+
+def adjust_user_usage(db: Session, user_id: int | None, bytes_delta: int):
+    if user_id is None or not bytes_delta:
+        return
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(storage_used_bytes=User.storage_used_bytes + bytes_delta)
+    )
+    # The user listing shows usage, so its ETag must change with it
+    bump_versions(db, [USAGE_SCOPE])
+
+
+def usage_added(db: Session, file: File, previous_size: int | None = None):
+    if file.file_size is None:
+        return
+    adjust_user_usage(db, file.owner_id, file.file_size - (previous_size or 0))
+
+
+def usage_removed(db: Session, file: File):
+    if file.file_size is None:
+        return
+    adjust_user_usage(db, file.owner_id, -file.file_size)
+
+
+def remaining_upload_budget(db: Session, user: User, folder_path: str, lock: bool = False) -> int | None:
+    """Bytes the user may still add to the folder, or None when no quota applies.
+
+    The tightest of the user's own quota and any quota on the user's folder
+    assignments covering the target folder wins. With `lock`, the counters
+    are re-read under the locks the upload's own accounting takes anyway:
+    the target folder's stats rows (the covering quota folders are among
+    them) in apply_delta's order, then the user row. Only uploads into the
+    same folders or by the same user wait for each other.
+    """
+    target = _normalize(folder_path)
+    if lock:
+        lock_folder_stats(db, target)
+    limits = []
+    if user.storage_quota_bytes is not None:
+        used = user.storage_used_bytes
+        if lock:
+            used = db.query(User.storage_used_bytes).filter(User.id == user.id).with_for_update().scalar()
+        limits.append(user.storage_quota_bytes - (used or 0))
+
+    quota_assignments = db.query(FolderAssignment).filter(
+        FolderAssignment.user_id == user.id,
+        FolderAssignment.quota_bytes.isnot(None)
+    ).all()
+    covering = [
+        a for a in quota_assignments
+        if target == _normalize(a.folder_path) or target.startswith(_normalize(a.folder_path).rstrip("/") + "/")
+    ]
+    if covering:
+        stats = get_folder_stats(db, [_normalize(a.folder_path) for a in covering])
+        for assignment in covering:
+            folder_stats = stats.get(_normalize(assignment.folder_path))
+            used = folder_stats.total_bytes if folder_stats else 0
+            limits.append(assignment.quota_bytes - used)
+
+    if not limits:
+        return None
+    return max(min(limits), 0)
+
+
+def completion_exceeds_quota(db: Session, file: File, previous_size: int | None = None) -> bool:
+    """Whether the completed upload takes its owner over a quota.
+
+    Presigning reserves nothing, so parallel uploads can each have been
+    granted the whole remaining budget; this is the authoritative check.
+    """
+    if file.file_size is None or file.owner is None:
+        return False
+    growth = file.file_size - (previous_size or 0)
+    if growth <= 0:
+        return False
+    budget = remaining_upload_budget(db, file.owner, file.folder_path, lock=True)
+    return budget is not None and growth > budget
+
+
+def upload_size_limit(budget: int | None) -> int:
+    """Upper bound for the presigned POST content-length-range condition."""
+    if budget is None:
+        return MAX_UPLOAD_BYTES
+    return min(budget, MAX_UPLOAD_BYTES)
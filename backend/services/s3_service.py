@@ -4,62 +4,172 @@ os.environ['AWS_REQUEST_CHECKSUM_CALCULATION'] = 'when_required'
 os.environ['AWS_RESPONSE_CHECKSUM_VALIDATION'] = 'when_required'
 
 import boto3
+import threading
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from datetime import datetime, timedelta
 from backend.config import settings
+from backend.responses import content_disposition
+from backend.services import metrics
+from backend.services.tracing import traced
 import uuid
 
+# Largest single upload accepted by presigned POST policies (4 GiB)
+MAX_UPLOAD_BYTES = 4294967296
+
+class S3PoolStats:
+    """Tracks in-flight S3 calls against the connection pool size.
+    
+    Every in-flight call holds one pooled connection, so calls started while
+    in_flight >= max_pool_connections are running on overflow connections
+    that urllib3 opens and then discards.
+    """
+    
+    def __init__(self, max_pool_connections: int):
+        self._lock = threading.Lock()
+        self.max_pool_connections = max_pool_connections
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_calls = 0
+        self.saturated_calls = 0
+        self.failed_calls = 0
+    
+    def call_started(self, **kwargs):
+        with self._lock:
+            if self.in_flight >= self.max_pool_connections:
+                self.saturated_calls += 1
+            self.in_flight += 1
+            self.total_calls += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+    
+    def call_finished(self, **kwargs):
+        with self._lock:
+            self.in_flight -= 1
+    
+    def call_failed(self, **kwargs):
+        with self._lock:
+            self.in_flight -= 1
+            self.failed_calls += 1
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "max_pool_connections": self.max_pool_connections,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "total_calls": self.total_calls,
+                "saturated_calls": self.saturated_calls,
+                "failed_calls": self.failed_calls,
+            }
+
 class S3Service:
     def __init__(self):
         self._s3_client = None
+        self._client_lock = threading.Lock()
         self.bucket_name = settings.ORACLE_BUCKET_NAME
+        self.pool_stats = S3PoolStats(settings.S3_MAX_POOL_CONNECTIONS)
     
     @property
     def s3_client(self):
+        # boto3 clients are thread-safe once built; the lock only guards
+        # against several threads building separate clients (and pools) at once
         if self._s3_client is None:
-            if not settings.ORACLE_NAMESPACE:
-                raise ValueError("Oracle Cloud credentials not configured. Please set ORACLE_NAMESPACE, ORACLE_ACCESS_KEY, ORACLE_SECRET_KEY, and ORACLE_BUCKET_NAME.")
-            endpoint_url = f"https://{settings.ORACLE_NAMESPACE}.compat.objectstorage.{settings.ORACLE_REGION}.oraclecloud.com"
-            self._s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.ORACLE_ACCESS_KEY,
-                aws_secret_access_key=settings.ORACLE_SECRET_KEY,
-                region_name=settings.ORACLE_REGION,
-                endpoint_url=endpoint_url
-            )
+            with self._client_lock:
+                if self._s3_client is None:
+                    self._s3_client = self._create_client()
         return self._s3_client
+    
+    def _create_client(self):
+        if settings.S3_ENDPOINT_URL:
+            endpoint_url = settings.S3_ENDPOINT_URL
+        elif settings.ORACLE_NAMESPACE:
+            endpoint_url = f"https://{settings.ORACLE_NAMESPACE}.compat.objectstorage.{settings.ORACLE_REGION}.oraclecloud.com"
+        else:
+            raise ValueError("Oracle Cloud credentials not configured. Please set ORACLE_NAMESPACE, ORACLE_ACCESS_KEY, ORACLE_SECRET_KEY, and ORACLE_BUCKET_NAME.")
+        client_config = Config(
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+            retries={"mode": settings.S3_RETRY_MODE, "max_attempts": settings.S3_MAX_ATTEMPTS},
+            connect_timeout=settings.S3_CONNECT_TIMEOUT,
+            read_timeout=settings.S3_READ_TIMEOUT,
+            tcp_keepalive=settings.S3_TCP_KEEPALIVE,
+            # Local stand-ins are addressed by host:port, so bucket names go in the path
+            s3={"addressing_style": "path"} if settings.S3_ENDPOINT_URL else None
+        )
+        client = boto3.client(
+            's3',
+            aws_access_key_id=settings.ORACLE_ACCESS_KEY,
+            aws_secret_access_key=settings.ORACLE_SECRET_KEY,
+            region_name=settings.ORACLE_REGION,
+            endpoint_url=endpoint_url,
+            config=client_config
+        )
+        client.meta.events.register('before-call.s3', self.pool_stats.call_started)
+        client.meta.events.register('after-call.s3', self.pool_stats.call_finished)
+        client.meta.events.register('after-call-error.s3', self.pool_stats.call_failed)
+        metrics.instrument_s3_client(client)
+        return client
 
-    def generate_presigned_upload_url(self, s3_key: str, content_type: str, expiration: int = 3600):
+    @traced("s3.generate_presigned_upload_url")
+    def generate_presigned_upload_url(self, s3_key: str, content_type: str, expiration: int = 3600, max_content_length: int = MAX_UPLOAD_BYTES):
         try:
             # Use the exact s3_key provided (no UUID prefix)
             unique_key = s3_key
-            response = self.s3_client.generate_presigned_post(
-                Bucket=self.bucket_name,
-                Key=unique_key,
-                Fields={"Content-Type": content_type},
-                Conditions=[
-                    {"Content-Type": content_type},
-                    ["content-length-range", 0, 4294967296]
-                ],
-                ExpiresIn=expiration
-            )
+            with metrics.time_s3("generate_presigned_post"):
+                response = self.s3_client.generate_presigned_post(
+                    Bucket=self.bucket_name,
+                    Key=unique_key,
+                    Fields={"Content-Type": content_type},
+                    Conditions=[
+                        {"Content-Type": content_type},
+                        ["content-length-range", 0, max_content_length]
+                    ],
+                    ExpiresIn=expiration
+                )
             return response
         except ClientError as e:
             print(f"Error generating presigned upload URL: {e}")
             return None
 
-    def generate_presigned_download_url(self, key: str, expiration: int = 3600):
+    @traced("s3.generate_presigned_download_url")
+    def generate_presigned_download_url(self, key: str, expiration: int = 3600, filename: str = None):
         try:
-            response = self.s3_client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': self.bucket_name, 'Key': key},
-                ExpiresIn=expiration
-            )
+            params = {'Bucket': self.bucket_name, 'Key': key}
+            if filename:
+                # Deduplicated blobs are stored under their hash, so name the download explicitly
+                params['ResponseContentDisposition'] = content_disposition(filename)
+            with metrics.time_s3("generate_presigned_url"):
+                response = self.s3_client.generate_presigned_url(
+                    'get_object',
+                    Params=params,
+                    ExpiresIn=expiration
+                )
             return response
         except ClientError as e:
             print(f"Error generating presigned download URL: {e}")
             return None
 
+    @traced("s3.head_object")
+    def head_object(self, key: str):
+        try:
+            return self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            print(f"Error reading object metadata: {e}")
+            return None
+
+    @traced("s3.get_object_stream")
+    def get_object_stream(self, key: str, start: int = None, end: int = None):
+        """Open the object body for streaming, optionally limited to an inclusive byte range."""
+        try:
+            params = {'Bucket': self.bucket_name, 'Key': key}
+            if start is not None:
+                params['Range'] = f"bytes={start}-{end if end is not None else ''}"
+            response = self.s3_client.get_object(**params)
+            return response['Body']
+        except ClientError as e:
+            print(f"Error opening object stream: {e}")
+            return None
+
+    @traced("s3.list_objects")
     def list_objects(self, prefix: str = "", delimiter: str = None):
         try:
             params = {
@@ -87,6 +197,29 @@ class S3Service:
             print(f"Error listing objects: {e}")
             return []
 
+    @traced("s3.object_exists")
+    def object_exists(self, key: str) -> bool:
+        """Whether the object exists; errors other than not-found count as yes, so callers never prune on them."""
+        try:
+            self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            print(f"Error reading object metadata: {e}")
+            return True
+
+    def iter_objects(self, prefix: str = ""):
+        """Yield every object under the prefix, following pagination (list_objects stops at 1000).
+        
+        Unlike list_objects, errors are raised: callers rely on the listing being
+        complete, and a truncated one must not be mistaken for the whole bucket.
+        """
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            yield from page.get('Contents', [])
+
+    @traced("s3.delete_object")
     def delete_object(self, key: str):
         try:
             self.s3_client.delete_object(Bucket=self.bucket_name, Key=key)
@@ -95,6 +228,7 @@ class S3Service:
             print(f"Error deleting object: {e}")
             return False
 
+    @traced("s3.copy_object")
     def copy_object(self, source_key: str, destination_key: str):
         try:
             copy_source = {'Bucket': self.bucket_name, 'Key': source_key}
@@ -108,6 +242,7 @@ class S3Service:
             print(f"Error copying object: {e}")
             return False
 
+    @traced("s3.delete_multiple_objects")
     def delete_multiple_objects(self, keys: list):
         try:
             objects = [{'Key': key} for key in keys]
@@ -120,6 +255,7 @@ class S3Service:
             print(f"Error deleting multiple objects: {e}")
             return None
 
+    @traced("s3.create_folder")
     def create_folder(self, folder_marker_key: str):
         try:
             # Create a .keep file to represent the folder
@@ -0,0 +1,128 @@
+"""
+OpenTelemetry tracing
+Spans cover HTTP requests, S3Service calls, SQL statements and the folder
+ACL helpers. Spans are exported to the console or a JSON-lines file for
+offline analysis, with ratio sampling to bound production overhead.
+When TRACING_ENABLED is off (or the SDK is missing) the decorators return
+the original functions, so the hot paths pay nothing.
+"""
+
+import functools
+import inspect
+import threading
+from contextlib import nullcontext
+from sqlalchemy import event
+from backend.config import settings
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:
+    trace = None
+
+ENABLED = settings.TRACING_ENABLED and trace is not None
+
+_tracer = None
+
+
+if trace is not None:
+    class JsonLinesSpanExporter(SpanExporter):
+        """Appends one JSON document per finished span to a local file."""
+
+        def __init__(self, path: str):
+            self._path = path
+            self._lock = threading.Lock()
+
+        def export(self, spans):
+            with self._lock, open(self._path, "a", encoding="utf-8") as f:
+                for finished in spans:
+                    f.write(finished.to_json(indent=None) + "\n")
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+
+def setup_tracing():
+    """Install the tracer provider once per process."""
+    global _tracer
+    if not ENABLED or _tracer is not None:
+        return
+    if settings.TRACING_EXPORTER == "file":
+        exporter = JsonLinesSpanExporter(settings.TRACING_FILE_PATH)
+    else:
+        exporter = ConsoleSpanExporter()
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": "enlitedu-sftp"}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO))
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("backend")
+
+
+def get_tracer():
+    """The process tracer, or None when tracing is off."""
+    return _tracer
+
+
+def span(name: str, **attributes):
+    """Context manager for an ad-hoc span; a no-op when tracing is off."""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes or None)
+
+
+def traced(name: str):
+    """Decorator wrapping a sync or async function in a span."""
+    def decorator(func):
+        if not ENABLED:
+            return func
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_engine(engine):
+    """One span per SQL statement, parented to whatever span is current."""
+    if not ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _tracer is None:
+            return
+        db_span = _tracer.start_span("db.query", attributes={
+            "db.system": engine.dialect.name,
+            "db.statement": statement[:1000],
+        })
+        conn.info.setdefault("tracing_spans", []).append(db_span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("tracing_spans")
+        if spans:
+            spans.pop().end()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("tracing_spans") if conn is not None else None
+        if spans:
+            db_span = spans.pop()
+            db_span.set_status(Status(StatusCode.ERROR, str(exception_context.original_exception)))
+            db_span.end()
@@ -0,0 +1,146 @@
+"""
+Usage analytics rollups
+Audit events past a watermark are folded into hourly and daily buckets per
+user, folder and action. Analytics queries read only these rollups, never
+the raw event stream.
+"""
+
+import itertools
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.database.db import dialect_insert
+from backend.models.audit_event import AuditEvent
+from backend.models.usage_rollup import UsageRollup, RollupWatermark
+
+WATERMARK_NAME = "usage"
+GRANULARITIES = ("hour", "day")
+ANONYMOUS_ACTOR_ID = 0
+# Rows per INSERT statement; keeps SQLite under its bound-parameter limit
+UPSERT_BATCH_SIZE = 1000
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def get_watermark(db: Session) -> RollupWatermark:
+    """The watermark row, locked so concurrent runs take turns instead of double counting."""
+    query = db.query(RollupWatermark).filter(RollupWatermark.name == WATERMARK_NAME).with_for_update()
+    watermark = query.first()
+    if watermark is None:
+        try:
+            with db.begin_nested():
+                db.add(RollupWatermark(name=WATERMARK_NAME, last_event_id=0))
+        except IntegrityError:
+            pass
+        watermark = query.one()
+    return watermark
+
+
+def fold_events(events) -> dict[tuple, list[int]]:
+    """[event_count, bytes_total] per (granularity, bucket_start, actor_id, folder_path, action)."""
+    totals = defaultdict(lambda: [0, 0])
+    for event in events:
+        actor_id = event.actor_id if event.actor_id is not None else ANONYMOUS_ACTOR_ID
+        folder_path = event.folder_path or "/"
+        for granularity in GRANULARITIES:
+            entry = totals[(granularity, bucket_start(event.occurred_at, granularity), actor_id, folder_path, event.action)]
+            entry[0] += 1
+            entry[1] += event.bytes or 0
+    return totals
+
+
+def upsert_rollups(db: Session, totals: dict[tuple, list[int]]):
+    """Add the totals onto existing buckets; committed with the caller's transaction."""
+    values = [
+        {
+            "granularity": granularity,
+            "bucket_start": start,
+            "actor_id": actor_id,
+            "folder_path": folder_path,
+            "action": action,
+            "event_count": count,
+            "bytes_total": total_bytes,
+        }
+        for (granularity, start, actor_id, folder_path, action), (count, total_bytes) in totals.items()
+    ]
+    insert = dialect_insert(db)
+    columns = UsageRollup.__table__.c
+    for start in range(0, len(values), UPSERT_BATCH_SIZE):
+        statement = insert(UsageRollup).values(values[start:start + UPSERT_BATCH_SIZE])
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["granularity", "bucket_start", "actor_id", "folder_path", "action"],
+            set_={
+                "event_count": columns.event_count + statement.excluded.event_count,
+                "bytes_total": columns.bytes_total + statement.excluded.bytes_total,
+            }
+        ))
+
+
+def inserted_utc(event) -> datetime:
+    # SQLite hands back CURRENT_TIMESTAMP (UTC) without a zone
+    moment = event.inserted_at
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def rollup_pending(db: Session, now: datetime = None) -> int:
+    """Fold settled events past the watermark into the rollups; returns how many were folded.
+
+    Events settle on inserted_at, the database's clock at insert, not on
+    occurred_at: a queued event can be written long after it happened, and
+    ids are taken at insert. Once a row is older than the settle window,
+    every lower id has been inserted too, and its short flush transaction
+    has committed. Each batch commits together with the advanced watermark,
+    so an interrupted run neither loses nor double counts events.
+    """
+    cutoff = (now or datetime.utcnow()).replace(tzinfo=timezone.utc) - timedelta(seconds=settings.USAGE_ROLLUP_SETTLE_SECONDS)
+    batch_size = settings.USAGE_ROLLUP_BATCH_SIZE
+    folded = 0
+    while True:
+        watermark = get_watermark(db)
+        events = db.execute(
+            select(
+                AuditEvent.id, AuditEvent.occurred_at, AuditEvent.inserted_at,
+                AuditEvent.actor_id, AuditEvent.folder_path, AuditEvent.action, AuditEvent.bytes
+            )
+            .where(AuditEvent.id > watermark.last_event_id)
+            .order_by(AuditEvent.id)
+            .limit(batch_size)
+        ).all()
+        settled = list(itertools.takewhile(lambda event: inserted_utc(event) <= cutoff, events))
+        if not settled:
+            db.commit()
+            return folded
+
+        upsert_rollups(db, fold_events(settled))
+        watermark.last_event_id = settled[-1].id
+        watermark.updated_at = datetime.utcnow()
+        db.commit()
+        folded += len(settled)
+        if len(settled) < batch_size:
+            return folded
+
+
+def rebuild_rollups(db: Session, now: datetime = None) -> int:
+    """Drop every rollup and refold the whole audit log."""
+    watermark = get_watermark(db)
+    db.execute(delete(UsageRollup))
+    watermark.last_event_id = 0
+    db.commit()
+    return rollup_pending(db, now)
+
+
+def rollup_status(db: Session) -> dict:
+    watermark = db.query(RollupWatermark).filter(RollupWatermark.name == WATERMARK_NAME).first()
+    last_event_id = watermark.last_event_id if watermark else 0
+    return {
+        "last_event_id": last_event_id,
+        "updated_at": watermark.updated_at.isoformat() if watermark and watermark.updated_at else None,
+        "pending_events": db.query(func.count(AuditEvent.id)).filter(AuditEvent.id > last_event_id).scalar(),
+    }
@@ -0,0 +1,246 @@
+"""
+Bulk user import
+Rows are validated up front, passwords are hashed on a process pool (bcrypt
+is CPU-bound) while earlier batches are inserted, and users plus their
+user_roles rows go in with one INSERT each per batch. Progress and per-row
+errors live on a UserImportJob so any worker can report them.
+"""
+
+import csv
+import io
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.auth.security import get_password_hash
+from backend.database.db import SessionLocal
+from backend.models.user import User, Role, user_roles
+from backend.models.user_import_job import UserImportJob
+from backend.services.index_versions import USERS_SCOPE, bump_versions
+from backend.services.permissions import refresh_permissions
+
+MAX_IMPORT_ROWS = 50000
+# Rows per lookup query when checking for existing usernames and emails
+LOOKUP_BATCH_SIZE = 1000
+TRUE_VALUES = {"1", "true", "yes", "y", "x"}
+FALSE_VALUES = {"0", "false", "no", "n", ""}
+
+
+def parse_bool(value, default: bool = False) -> bool:
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    normalized = str(value).strip().lower()
+    if normalized in TRUE_VALUES:
+        return True
+    if normalized in FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid boolean '{value}'")
+
+
+def parse_list(value) -> list:
+    """Lists pass through; CSV cells are split on ';'."""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [item.strip() for item in str(value).split(";") if item.strip()]
+
+
+def csv_records(content: str) -> list[dict]:
+    reader = csv.DictReader(io.StringIO(content))
+    return [{(k or "").strip().lower(): (v or "").strip() for k, v in record.items()} for record in reader]
+
+
+def parse_record(record: dict, row: int) -> dict:
+    username = str(record.get("username") or "").strip()
+    password = str(record.get("password") or "")
+    if not username:
+        raise ValueError("Missing username")
+    if not password:
+        raise ValueError("Missing password")
+    quota = record.get("storage_quota_bytes")
+    return {
+        "row": row,
+        "username": username,
+        "password": password,
+        "email": str(record.get("email") or "").strip() or None,
+        "is_admin": parse_bool(record.get("is_admin")),
+        "role_names": [str(name) for name in parse_list(record.get("roles"))],
+        "role_ids": [int(role_id) for role_id in parse_list(record.get("role_ids"))],
+        "storage_quota_bytes": int(quota) if quota not in (None, "") else None,
+    }
+
+
+def _existing_values(db: Session, column, values: set[str]) -> set[str]:
+    found = set()
+    values = sorted(values)
+    for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+        found.update(v for (v,) in db.query(column).filter(column.in_(values[start:start + LOOKUP_BATCH_SIZE])).all())
+    return found
+
+
+def validate_records(db: Session, records: list[dict]) -> tuple[list[dict], list[dict]]:
+    """Parse and check every record; returns (rows ready to insert, per-row errors).
+
+    Rows are numbered from 1 in input order. The database is queried a fixed
+    number of times, not once per row.
+    """
+    rows, errors = [], []
+    for row, record in enumerate(records, start=1):
+        try:
+            rows.append(parse_record(record, row))
+        except (TypeError, ValueError) as e:
+            errors.append({"row": row, "username": record.get("username"), "error": str(e)})
+
+    roles = db.query(Role.id, Role.name).all()
+    role_ids_by_name = {name.lower(): role_id for role_id, name in roles}
+    known_role_ids = {role_id for role_id, _ in roles}
+    taken_usernames = _existing_values(db, User.username, {row["username"] for row in rows})
+    taken_emails = _existing_values(db, User.email, {row["email"] for row in rows if row["email"]})
+
+    valid = []
+    seen_usernames, seen_emails = set(), set()
+    for row in rows:
+        error = None
+        unknown_roles = [name for name in row["role_names"] if name.lower() not in role_ids_by_name]
+        unknown_roles += [str(role_id) for role_id in row["role_ids"] if role_id not in known_role_ids]
+        if row["username"] in taken_usernames:
+            error = "Username already exists"
+        elif row["username"] in seen_usernames:
+            error = "Duplicate username in import"
+        elif row["email"] and (row["email"] in taken_emails or row["email"] in seen_emails):
+            error = "Email already in use"
+        elif unknown_roles:
+            error = f"Unknown roles: {', '.join(unknown_roles)}"
+        if error:
+            errors.append({"row": row["row"], "username": row["username"], "error": error})
+            continue
+        seen_usernames.add(row["username"])
+        if row["email"]:
+            seen_emails.add(row["email"])
+        row["role_ids"] = sorted(set(row["role_ids"]) | {role_ids_by_name[name.lower()] for name in row["role_names"]})
+        valid.append(row)
+    return valid, errors
+
+
+def create_import_job(db: Session, total_rows: int, errors: list[dict], created_by: int) -> UserImportJob:
+    job = UserImportJob(
+        status="pending",
+        total_rows=total_rows,
+        processed_rows=len(errors),
+        error_count=len(errors),
+        errors=sorted(errors, key=lambda e: e["row"]),
+        created_by=created_by
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _insert_users(db: Session, rows: list[dict], hashes: list[str], created_by: int):
+    now = datetime.utcnow()
+    created = db.execute(
+        insert(User).returning(User.id, User.username),
+        [
+            {
+                "username": row["username"],
+                "email": row["email"],
+                "hashed_password": hashed,
+                "is_admin": row["is_admin"],
+                "is_active": True,
+                "created_by": created_by,
+                "created_at": now,
+                "storage_quota_bytes": row["storage_quota_bytes"],
+                "storage_used_bytes": 0,
+            }
+            for row, hashed in zip(rows, hashes)
+        ]
+    ).all()
+    ids = {username: user_id for user_id, username in created}
+    role_rows = [{"user_id": ids[row["username"]], "role_id": role_id} for row in rows for role_id in row["role_ids"]]
+    if role_rows:
+        db.execute(insert(user_roles), role_rows)
+    refresh_permissions(db, ids.values())
+
+
+def insert_batch(db: Session, rows: list[dict], hashes: list[str], created_by: int) -> tuple[int, list[dict]]:
+    """Insert a batch in two statements; on a conflict (a concurrent create) fall back to row by row."""
+    try:
+        with db.begin_nested():
+            _insert_users(db, rows, hashes, created_by)
+        return len(rows), []
+    except IntegrityError:
+        pass
+
+    created, errors = 0, []
+    for row, hashed in zip(rows, hashes):
+        try:
+            with db.begin_nested():
+                _insert_users(db, [row], [hashed], created_by)
+            created += 1
+        except IntegrityError:
+            errors.append({"row": row["row"], "username": row["username"], "error": "Username or email already exists"})
+    return created, errors
+
+
+def run_import_job(job_id: int, rows: list[dict], created_by: int):
+    """Background task body: runs in the threadpool with its own session."""
+    db = SessionLocal()
+    try:
+        job = db.get(UserImportJob, job_id)
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        db.commit()
+
+        try:
+            workers = settings.USER_IMPORT_HASH_WORKERS or os.cpu_count() or 1
+            batch_size = settings.USER_IMPORT_BATCH_SIZE
+            # spawn: forking a process that runs threads (uvicorn, the threadpool) is unsafe
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                # map() keeps hashing ahead while earlier batches are inserted; results arrive in row order
+                hashes = pool.map(get_password_hash, [row["password"] for row in rows], chunksize=16)
+                for start in range(0, len(rows), batch_size):
+                    batch = rows[start:start + batch_size]
+                    created, errors = insert_batch(db, batch, list(itertools.islice(hashes, len(batch))), created_by)
+                    bump_versions(db, [USERS_SCOPE])
+                    job.created_count += created
+                    job.processed_rows += len(batch)
+                    if errors:
+                        job.error_count += len(errors)
+                        job.errors = sorted(job.errors + errors, key=lambda e: e["row"])
+                    db.commit()
+            job.status = "completed"
+        except Exception as e:
+            db.rollback()
+            # Details stay in the server log: database errors echo the failed statement's
+            # parameters, password hashes included, and the job is readable over the API
+            print(f"✗ User import job {job_id} failed: {e}")
+            job.status = "failed"
+            job.errors = job.errors + [{"row": None, "username": None, "error": f"Import aborted: {type(e).__name__}"}]
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+def serialize_job(job: UserImportJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "total_rows": job.total_rows,
+        "processed_rows": job.processed_rows,
+        "created_count": job.created_count,
+        "error_count": job.error_count,
+        "errors": job.errors,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
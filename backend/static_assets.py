@@ -0,0 +1,88 @@
+"""
+In-memory static assets for the SPA
+dist/public is read once per worker at startup with gzip (and brotli, when
+installed) variants precomputed. Hashed Vite bundles are cached as immutable;
+everything else revalidates with its ETag.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from fastapi import Request, Response
+from backend.responses import is_not_modified, preferred_encoding
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Vite output names look like assets/index-B3xk9Qa1.js
+HASHED_ASSET_PATTERN = re.compile(r"^assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# Already-compressed formats gain nothing from another pass
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "application/xml", "image/svg+xml", "application/manifest+json")
+MIN_COMPRESS_BYTES = 512
+
+
+class StaticAsset:
+    def __init__(self, path: str, body: bytes):
+        self.body = body
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self.cache_control = IMMUTABLE_CACHE_CONTROL if HASHED_ASSET_PATTERN.match(path) else REVALIDATE_CACHE_CONTROL
+        self.encodings: dict[str, bytes] = {}
+        if len(body) >= MIN_COMPRESS_BYTES and self.media_type.startswith(COMPRESSIBLE_TYPES):
+            if brotli is not None:
+                self._add_encoding("br", brotli.compress(body, quality=11))
+            self._add_encoding("gzip", gzip.compress(body, compresslevel=9, mtime=0))
+
+    def _add_encoding(self, encoding: str, compressed: bytes):
+        if len(compressed) < len(self.body):
+            self.encodings[encoding] = compressed
+
+
+class StaticAssets:
+    def __init__(self):
+        self._assets: dict[str, StaticAsset] = {}
+
+    def load(self, directory: str) -> int:
+        """Read every file under `directory` into memory; returns the number loaded."""
+        assets = {}
+        if os.path.isdir(directory):
+            for root, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    full_path = os.path.join(root, filename)
+                    relative_path = os.path.relpath(full_path, directory).replace(os.sep, "/")
+                    with open(full_path, "rb") as f:
+                        assets[relative_path] = StaticAsset(relative_path, f.read())
+        self._assets = assets
+        return len(assets)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._assets
+
+    def response(self, request: Request, path: str) -> Response | None:
+        """The asset at `path` negotiated for this request, or None if there is no such asset."""
+        asset = self._assets.get(path)
+        if asset is None:
+            return None
+
+        encoding = preferred_encoding(request.headers.get("accept-encoding", ""), asset.encodings, ("br", "gzip"))
+        # Each encoded variant is a different representation, so it gets its own ETag
+        etag = f'{asset.etag[:-1]}-{encoding}"' if encoding else asset.etag
+        headers = {"ETag": etag, "Cache-Control": asset.cache_control}
+        if asset.encodings:
+            headers["Vary"] = "Accept-Encoding"
+        if is_not_modified(request, etag, cache="static_asset"):
+            return Response(status_code=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            return Response(asset.encodings[encoding], media_type=asset.media_type, headers=headers)
+        return Response(asset.body, media_type=asset.media_type, headers=headers)
+
+
+static_assets = StaticAssets()
@@ -0,0 +1,35 @@
+"""
+Folder tree sync job
+Adds rows for folders that exist only in the bucket (created before the
+folders table, or by writing objects directly) and links files and
+assignments to their folder. Safe to re-run.
+"""
+
+from backend.database.db import SessionLocal
+from backend.services.dedup_service import BLOB_PREFIX
+from backend.services.folder_stats import folder_of_key
+from backend.services.folders import ensure_folders, backfill_folder_ids
+from backend.services.s3_service import s3_service
+
+def main():
+    print("Syncing folder tree from the bucket...")
+    
+    paths = set()
+    for obj in s3_service.iter_objects():
+        key = obj.get('Key', '')
+        if not key or key.startswith(BLOB_PREFIX):
+            continue
+        # "a/b/" markers name the folder itself; any other key lives in its parent
+        paths.add("/" + key.strip('/') if key.endswith('/') else folder_of_key(key))
+    
+    db = SessionLocal()
+    try:
+        ensure_folders(db, list(paths))
+        linked = backfill_folder_ids(db)
+        db.commit()
+        print(f"✓ {len(paths)} folders present, {linked} files/assignments linked")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Compression trade-off benchmark
+Compresses listing-shaped JSON (and msgpack when installed) of several sizes
+with every encoding the compression middleware can negotiate, at the
+configured and a few alternative levels, and reports bytes saved against
+CPU time spent.
+
+    python -m benchmarks.compression --entries 100 1000 10000
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def listing_payload(entries: int) -> list[dict]:
+    """Shaped like a list_files response."""
+    base = datetime(2025, 1, 1)
+    return [
+        {
+            "id": n,
+            "filename": f"report-{n:06d}.pdf",
+            "s3_key": f"departments/finance/reports/report-{n:06d}.pdf",
+            "file_size": 4096 + n * 17,
+            "content_type": "application/pdf",
+            "folder_path": "/departments/finance/reports",
+            "uploaded_at": (base + timedelta(minutes=n)).isoformat(),
+            "owner_username": f"user{n % 40}",
+            "type": "file",
+        }
+        for n in range(entries)
+    ]
+
+
+def level_variants(encoding: str, settings) -> list[tuple[str, int]]:
+    """(setting name, level) pairs to try: the configured level plus a cheap and an expensive one."""
+    name, configured, others = {
+        "gzip": ("COMPRESSION_GZIP_LEVEL", settings.COMPRESSION_GZIP_LEVEL, (1, 9)),
+        "br": ("COMPRESSION_BROTLI_QUALITY", settings.COMPRESSION_BROTLI_QUALITY, (1, 11)),
+        "zstd": ("COMPRESSION_ZSTD_LEVEL", settings.COMPRESSION_ZSTD_LEVEL, (1, 19)),
+    }[encoding]
+    return [(name, level) for level in sorted({configured, *others})]
+
+
+def measure(compressor_class, body: bytes, rounds: int) -> tuple[int, float]:
+    """Compressed size and best CPU seconds over `rounds`, using the middleware's compressor."""
+    best = None
+    size = 0
+    for _ in range(rounds):
+        start = time.process_time()
+        compressor = compressor_class()
+        compressed = compressor.compress(body) + compressor.finish()
+        elapsed = time.process_time() - start
+        size = len(compressed)
+        best = elapsed if best is None else min(best, elapsed)
+    return size, best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bytes vs CPU for response compression")
+    parser.add_argument("--entries", type=int, nargs="+", default=[100, 1000, 10000], help="listing sizes to test")
+    parser.add_argument("--rounds", type=int, default=5, help="timing rounds per case (best is reported)")
+    args = parser.parse_args(argv)
+
+    from backend.config import settings
+    from backend.middleware.compression import COMPRESSORS
+
+    print(f"{'payload':<16} {'encoding':<10} {'level':>5} {'bytes':>10} {'ratio':>7} {'cpu ms':>9} {'MB/s':>8}")
+    for entries in args.entries:
+        payload = listing_payload(entries)
+        bodies = {"json": json.dumps(payload, separators=(",", ":")).encode("utf-8")}
+        if msgpack is not None:
+            bodies["msgpack"] = msgpack.packb(payload, use_bin_type=True)
+
+        for fmt, body in bodies.items():
+            label = f"{fmt} x{entries}"
+            print(f"{label:<16} {'identity':<10} {'-':>5} {len(body):>10} {1.0:>7.2f} {0.0:>9.3f} {'-':>8}")
+            for encoding, compressor_class in COMPRESSORS.items():
+                for setting_name, level in level_variants(encoding, settings):
+                    configured = getattr(settings, setting_name)
+                    setattr(settings, setting_name, level)
+                    try:
+                        size, seconds = measure(compressor_class, body, args.rounds)
+                    finally:
+                        setattr(settings, setting_name, configured)
+                    marker = "*" if level == configured else " "
+                    throughput = len(body) / seconds / 1e6 if seconds > 0 else float("inf")
+                    print(f"{label:<16} {encoding:<10} {level:>4}{marker} {size:>10} {len(body) / size:>7.2f} {seconds * 1000:>9.3f} {throughput:>8.1f}")
+
+    print("\n* = configured level; cpu ms is per response body")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+"""
+Micro-benchmark fixtures
+Settings and engines are module globals, so the environment is set here,
+before any benchmark imports backend. Run from the repository root:
+
+    pytest benchmarks --micro-sizes 1000,10000
+"""
+
+import os
+import tempfile
+
+_workdir = tempfile.mkdtemp(prefix="sftp-micro-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_workdir, 'micro.db')}",
+    "DATABASE_REPLICA_URL": "",
+    "TRACING_ENABLED": "false",
+    "AUDIT_ENABLED": "false",
+})
+
+DEFAULT_SIZES = "1000,10000,100000"
+
+
+def pytest_addoption(parser):
+    parser.addoption("--micro-sizes", default=DEFAULT_SIZES, help="comma-separated keys/folders per synthetic tree")
+
+
+def pytest_generate_tests(metafunc):
+    # Module scope: the synthetic trees and database are built once per size
+    if "size" in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption("micro_sizes").split(",")]
+        metafunc.parametrize("size", sizes, scope="module")
@@ -0,0 +1,321 @@
+"""
+Load test and benchmark harness
+Boots backend.main:app in-process against a local S3 stand-in (moto) and a
+throwaway SQLite database, seeds users, folder assignments and objects, then
+drives concurrent workloads and reports throughput and latency percentiles.
+
+    python -m benchmarks.load_test --save-baseline benchmarks/baseline.json
+    python -m benchmarks.load_test --baseline benchmarks/baseline.json
+
+With --baseline the process exits non-zero when any workload regresses
+beyond --tolerance, so it can gate CI.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.local_s3 import LocalS3
+
+WORKLOADS = ("list", "download-url", "proxy-download", "upload-url", "copy", "delete")
+
+
+def configure_environment(workdir: str, s3_endpoint: str):
+    """Point the backend at the local stand-ins; must run before backend is imported."""
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "DATABASE_REPLICA_URL": "",
+        "S3_ENDPOINT_URL": s3_endpoint,
+        "ORACLE_ACCESS_KEY": "bench",
+        "ORACLE_SECRET_KEY": "bench",
+        "ORACLE_REGION": "us-east-1",
+        "ORACLE_BUCKET_NAME": "bench",
+        "PROXY_DOWNLOAD_ENABLED": "true",
+        "RATE_LIMIT_ENABLED": "false",
+        "TRACING_ENABLED": "false",
+    })
+
+
+def seed(args) -> dict:
+    """Create N users (Contributor role, own home folder), M read assignments each and K objects."""
+    from backend.auth.security import create_access_token, get_password_hash
+    from backend.database.db import SessionLocal, init_db
+    from backend.database.seeds import ensure_seed_data
+    from backend.models import File, FolderAssignment, Role, User
+    from backend.services.folder_stats import rebuild_folder_stats
+    from backend.services.s3_service import s3_service
+
+    init_db()
+    client = s3_service.s3_client
+    bucket = s3_service.bucket_name
+    client.create_bucket(Bucket=bucket)
+
+    rng = random.Random(args.seed)
+    shared_folders = [f"/bench/f{i:04d}" for i in range(args.folders)]
+    body = b"x" * args.object_size
+    keys = [(shared_folders[n % len(shared_folders)], f"obj-{n:06d}.bin") for n in range(args.objects)]
+
+    def put(entry):
+        folder, filename = entry
+        client.put_object(Bucket=bucket, Key=f"{folder.strip('/')}/{filename}", Body=body)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(put, keys))
+
+    db = SessionLocal()
+    try:
+        ensure_seed_data(db)
+        admin = db.query(User).filter(User.username == "admin").one()
+        contributor = db.query(Role).filter(Role.name == "Contributor").one()
+
+        db.add_all([
+            File(
+                filename=filename,
+                s3_key=f"{folder.strip('/')}/{filename}",
+                file_size=len(body),
+                content_type="application/octet-stream",
+                folder_path=folder,
+                owner_id=admin.id
+            )
+            for folder, filename in keys
+        ])
+
+        # bcrypt is deliberately slow, so every benchmark user shares one hash
+        password_hash = get_password_hash("bench-password")
+        users = [
+            User(
+                username=f"bench{i:05d}",
+                email=f"bench{i:05d}@example.com",
+                hashed_password=password_hash,
+                roles=[contributor]
+            )
+            for i in range(args.users)
+        ]
+        db.add_all(users)
+        db.flush()
+
+        files_by_folder: dict[str, list[int]] = {folder: [] for folder in shared_folders}
+        for file_id, folder in db.query(File.id, File.folder_path).all():
+            files_by_folder[folder].append(file_id)
+
+        plan_users = []
+        for i, user in enumerate(users):
+            home = f"/bench/u{i:05d}"
+            readable = rng.sample(shared_folders, min(args.assignments, len(shared_folders)))
+            db.add(FolderAssignment(folder_path=home, user_id=user.id, can_read=True, can_write=True, can_delete=True))
+            db.add_all([FolderAssignment(folder_path=folder, user_id=user.id, can_read=True) for folder in readable])
+            plan_users.append({
+                "headers": {"Authorization": f"Bearer {create_access_token({'sub': user.username})}"},
+                "home": home,
+                "folders": readable,
+                "files": [file_id for folder in readable for file_id in files_by_folder[folder]],
+            })
+        db.commit()
+        rebuild_folder_stats(db)
+    finally:
+        db.close()
+
+    return {"users": plan_users, "created": []}
+
+
+def build_request(workload: str, ctx: dict, n: int, rng: random.Random) -> dict | None:
+    """The n-th request of a workload; None when there is nothing left to do."""
+    if workload == "delete":
+        if not ctx["created"]:
+            return None
+        user, file_id = ctx["created"].pop()
+        return {"method": "DELETE", "url": f"/api/files/{file_id}", "user": user}
+
+    user = rng.choice(ctx["users"])
+    if workload == "list":
+        return {"method": "GET", "url": "/api/files", "params": {"folder_path": rng.choice(user["folders"])}, "user": user}
+    if workload == "download-url":
+        return {"method": "GET", "url": f"/api/files/{rng.choice(user['files'])}/download-url", "user": user}
+    if workload == "proxy-download":
+        return {"method": "GET", "url": f"/api/files/{rng.choice(user['files'])}/content", "user": user}
+    if workload == "upload-url":
+        return {
+            "method": "POST",
+            "url": "/api/files/upload-url",
+            "json": {"filename": f"upload-{n:06d}.bin", "content_type": "application/octet-stream", "folder_path": user["home"]},
+            "user": user,
+        }
+    if workload == "copy":
+        # A fresh destination folder per request keeps s3_keys unique
+        return {
+            "method": "POST",
+            "url": f"/api/files/{rng.choice(user['files'])}/copy",
+            "json": {"destination_folder": f"{user['home']}/copy-{n:06d}"},
+            "user": user,
+        }
+    raise ValueError(f"Unknown workload: {workload}")
+
+
+def record_created(workload: str, ctx: dict, request: dict, payload: dict):
+    """Remember rows created by upload-url and copy so the delete workload has targets."""
+    if workload == "upload-url":
+        ctx["created"].append((request["user"], payload["file_id"]))
+    elif workload == "copy":
+        ctx["created"].append((request["user"], payload["id"]))
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+async def run_workload(client, workload: str, ctx: dict, requests: int, concurrency: int, rng: random.Random) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    failures: set[str] = set()
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for n in counter:
+            request = build_request(workload, ctx, n, rng)
+            if request is None:
+                return
+            start = time.perf_counter()
+            try:
+                response = await client.request(
+                    request["method"],
+                    request["url"],
+                    params=request.get("params"),
+                    json=request.get("json"),
+                    headers=request["user"]["headers"]
+                )
+            except Exception as e:
+                # ASGITransport re-raises unhandled app exceptions; a server would answer 500
+                latencies.append(time.perf_counter() - start)
+                errors += 1
+                if type(e).__name__ not in failures:
+                    failures.add(type(e).__name__)
+                    print(f"✗ {workload}: {type(e).__name__}: {e}")
+                continue
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            else:
+                record_created(workload, ctx, request, response.json() if request["method"] == "POST" else {})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def run_benchmarks(args, ctx: dict) -> dict:
+    import httpx
+    from backend.main import app
+
+    rng = random.Random(args.seed)
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up imports, the connection pool and the S3 client before measuring
+        await run_workload(client, "list", ctx, args.warmup, 1, rng)
+        for workload in args.workloads:
+            results[workload] = await run_workload(client, workload, ctx, args.requests, args.concurrency, rng)
+            print_row(workload, results[workload])
+    return results
+
+
+def print_row(workload: str, result: dict):
+    print(
+        f"{workload:<16} {result['requests']:>8} {result['errors']:>7} {result['throughput_rps']:>10.1f} "
+        f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f}"
+    )
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions against a stored run: more errors, slower p95 or lower throughput."""
+    failures = []
+    for workload, base in baseline["workloads"].items():
+        current = results["workloads"].get(workload)
+        if current is None:
+            continue
+        if current["errors"] > base["errors"]:
+            failures.append(f"{workload}: {current['errors']} errors (baseline {base['errors']})")
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            failures.append(f"{workload}: p95 {current['p95_ms']:.2f}ms > baseline {base['p95_ms']:.2f}ms +{tolerance:.0%}")
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            failures.append(f"{workload}: {current['throughput_rps']:.1f} req/s < baseline {base['throughput_rps']:.1f} req/s -{tolerance:.0%}")
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the API against a local S3 stand-in")
+    parser.add_argument("--users", type=int, default=20, help="benchmark users to create")
+    parser.add_argument("--folders", type=int, default=50, help="shared folders the objects are spread over")
+    parser.add_argument("--assignments", type=int, default=5, help="read assignments per user")
+    parser.add_argument("--objects", type=int, default=1000, help="objects to seed")
+    parser.add_argument("--object-size", type=int, default=4096, help="bytes per seeded object")
+    parser.add_argument("--requests", type=int, default=500, help="requests per workload")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients per workload (keep below the DB pool size)")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured list requests before the run")
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--seed", type=int, default=1234, help="random seed for a reproducible request mix")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="fail if results regress against this results JSON")
+    parser.add_argument("--save-baseline", help="write results JSON here as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    if args.assignments < 1 or args.objects < args.folders:
+        parser.error("need --assignments >= 1 and --objects >= --folders so every user can read some files")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    config = {key: getattr(args, key) for key in ("users", "folders", "assignments", "objects", "object_size", "requests", "concurrency", "seed")}
+
+    with tempfile.TemporaryDirectory() as workdir, LocalS3() as s3_endpoint:
+        configure_environment(workdir, s3_endpoint)
+        print(f"Seeding {args.users} users, {args.objects} objects in {args.folders} folders...")
+        ctx = seed(args)
+        print(f"{'workload':<16} {'requests':>8} {'errors':>7} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        workloads = asyncio.run(run_benchmarks(args, ctx))
+
+    results = {"config": config, "workloads": workloads}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+                f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print("⚠️  Benchmark configuration differs from the baseline; comparison may be meaningless")
+        failures = compare_to_baseline(results, baseline, args.tolerance)
+        if failures:
+            print("✗ Performance regression:")
+            for failure in failures:
+                print(f"  {failure}")
+            return 1
+        print("✓ No regression against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""
+Local S3 stand-in
+Runs moto's S3 server in a background thread so presigned URLs and the
+proxy download path make real HTTP requests without touching Oracle Cloud.
+"""
+
+import socket
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LocalS3:
+    """Context manager yielding the endpoint URL of an in-process moto server."""
+
+    def __init__(self, port: int | None = None):
+        self.port = port or free_port()
+        self._server = None
+
+    def __enter__(self) -> str:
+        try:
+            from moto.server import ThreadedMotoServer
+        except ImportError as e:
+            raise RuntimeError("The benchmark S3 stand-in requires 'moto[server]' (see benchmarks/requirements.txt)") from e
+        self._server = ThreadedMotoServer(ip_address="127.0.0.1", port=self.port, verbose=False)
+        self._server.start()
+        return f"http://127.0.0.1:{self.port}"
+
+    def __exit__(self, *exc_info):
+        if self._server is not None:
+            self._server.stop()
@@ -0,0 +1,66 @@
+"""
+Cold-start benchmark
+Times the one-off deploy step (python -m backend.database.migrate, first run
+and no-op re-run) separately from what every uvicorn worker pays at boot:
+importing backend.main and running its startup handlers. Each measurement
+is a fresh interpreter against a throwaway SQLite database.
+
+    python -m benchmarks.startup --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+WORKER_BOOT = """
+import asyncio, json, time
+start = time.perf_counter()
+from backend.main import app
+imported = time.perf_counter()
+
+async def boot():
+    async with app.router.lifespan_context(app):
+        pass
+
+asyncio.run(boot())
+print(json.dumps({"import_s": imported - start, "startup_s": time.perf_counter() - imported}))
+"""
+
+
+def run_python(args: list[str], env: dict) -> tuple[float, str]:
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], env=env, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, result.stdout
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure migration and worker cold-start time")
+    parser.add_argument("--runs", type=int, default=5, help="worker boots to measure")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}", DATABASE_REPLICA_URL="")
+
+        fresh, _ = run_python(["-m", "backend.database.migrate"], env)
+        rerun, _ = run_python(["-m", "backend.database.migrate"], env)
+        print(f"{'migrate (fresh database)':<28} {fresh * 1000:>10.1f} ms")
+        print(f"{'migrate (up to date)':<28} {rerun * 1000:>10.1f} ms")
+
+        boots = []
+        for _ in range(args.runs):
+            wall, output = run_python(["-c", WORKER_BOOT], env)
+            timings = json.loads(output.strip().splitlines()[-1])
+            boots.append((wall, timings["import_s"], timings["startup_s"]))
+
+    for label, index in (("worker boot (process)", 0), ("  import backend.main", 1), ("  startup handlers", 2)):
+        print(f"{label:<28} {statistics.median(boot[index] for boot in boots) * 1000:>10.1f} ms (median of {args.runs})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Micro-benchmarks for the folder ACL helpers and the listing merge
+Times the pure-Python hot loops of list_files (S3/DB merge, per-folder
+FolderAccess filtering) and the ACL helpers over synthetic trees of
+up to 100k keys, without S3 or network in the way.
+
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:25%
+    pytest benchmarks --micro-sizes 100000 -k merge_listing --benchmark-cprofile=cumtime
+"""
+
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from backend.database.db import SessionLocal, engine, init_db
+from backend.models import FolderAssignment, User
+from backend.routes.files import build_folder_entries, merge_listing, user_can_write_folder
+from backend.services.permissions import FolderAccess, folder_access, refresh_permissions
+
+# Assignments of a typical non-admin user; the ACL loops are O(folders x assignments)
+ACCESSIBLE_FOLDERS = 50
+
+
+def synthetic_listing(size: int) -> tuple[list[dict], dict]:
+    """One folder holding `size` objects and size/100 subfolders; half the objects have DB rows."""
+    owner = SimpleNamespace(username="bench")
+    now = datetime.utcnow()
+    s3_objects = [{"Prefix": f"bench/sub{n:06d}/"} for n in range(max(1, size // 100))]
+    db_files = {}
+    for n in range(size):
+        key = f"bench/obj-{n:06d}.bin"
+        s3_objects.append({"Key": key, "Size": 4096, "LastModified": now})
+        if n % 2 == 0:
+            db_files[key] = SimpleNamespace(
+                id=n, filename=f"obj-{n:06d}.bin", file_size=4096, content_type="application/octet-stream",
+                uploaded_at=now, owner=owner
+            )
+    return s3_objects, db_files
+
+
+def synthetic_folders(size: int, fanout: int = 10) -> list[str]:
+    """`size` folder paths of a balanced tree, e.g. /d3/d7/d1."""
+    folders = []
+    n = 0
+    while len(folders) < size:
+        parts = []
+        value = n
+        while True:
+            parts.append(f"d{value % fanout}")
+            value //= fanout
+            if value == 0:
+                break
+        folders.append("/" + "/".join(reversed(parts)))
+        n += 1
+    return folders
+
+
+def accessible_folders_for(folders: list[str]) -> list[str]:
+    step = max(1, len(folders) // ACCESSIBLE_FOLDERS)
+    return folders[::step][:ACCESSIBLE_FOLDERS]
+
+
+@pytest.fixture(scope="module")
+def folders(size):
+    return synthetic_folders(size)
+
+
+@pytest.fixture(scope="module")
+def accessible(folders):
+    return FolderAccess(accessible_folders_for(folders))
+
+
+@pytest.fixture(scope="module")
+def seeded(size, folders):
+    """A fresh database holding `size` assignment rows across users; yields (session, benchmarked user)."""
+    engine.dispose()
+    if os.path.exists(engine.url.database):
+        os.remove(engine.url.database)
+    init_db()
+    db = SessionLocal()
+    try:
+        users = [User(username=f"micro{i}", hashed_password="-") for i in range(max(1, size // ACCESSIBLE_FOLDERS))]
+        db.add_all(users)
+        db.flush()
+        db.add_all([
+            FolderAssignment(folder_path=folder, user_id=users[n % len(users)].id, can_read=True, can_write=True)
+            for n, folder in enumerate(folders)
+        ])
+        refresh_permissions(db, [user.id for user in users])
+        db.commit()
+        yield db, users[0]
+    finally:
+        db.close()
+
+
+@pytest.mark.benchmark(group="merge_listing")
+def test_merge_listing(benchmark, size):
+    s3_objects, db_files = synthetic_listing(size)
+    files, _ = benchmark(merge_listing, "/bench", "bench/", s3_objects, db_files)
+    assert len(files) == size
+
+
+@pytest.mark.benchmark(group="build_folder_entries")
+def test_build_folder_entries(benchmark, size, accessible):
+    subfolder_names = {f"sub{n:06d}" for n in range(size)}
+    benchmark(build_folder_entries, "/", subfolder_names, accessible)
+
+
+@pytest.mark.benchmark(group="can_read")
+def test_can_read(benchmark, folders, accessible):
+    allowed = benchmark(lambda: [accessible.can_read(folder) for folder in folders])
+    assert all(allowed[folders.index(folder)] for folder in accessible.readable)
+
+
+@pytest.mark.benchmark(group="can_navigate")
+def test_can_navigate(benchmark, folders, accessible):
+    benchmark(lambda: [accessible.can_navigate(folder) for folder in folders])
+
+
+@pytest.mark.benchmark(group="folder_access")
+def test_folder_access(benchmark, seeded):
+    db, user = seeded
+    assert benchmark(folder_access, db, user).readable
+
+
+@pytest.mark.benchmark(group="user_can_write_folder")
+def test_user_can_write_folder(benchmark, seeded, folders):
+    db, user = seeded
+    benchmark(user_can_write_folder, db, user, folders[-1] + "/nested")
@@ -1,3 +1,3 @@
-
+-- dialect: postgresql
 -- Add password_hash column to users table
 ALTER TABLE users ADD COLUMN IF NOT EXISTS password_hash VARCHAR;
@@ -0,0 +1,14 @@
+-- dialect: postgresql
+-- Content-addressed blob storage for deduplicated uploads
+CREATE TABLE IF NOT EXISTS blobs (
+    id SERIAL PRIMARY KEY,
+    content_hash VARCHAR NOT NULL UNIQUE,
+    s3_key VARCHAR NOT NULL UNIQUE,
+    size BIGINT,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP
+);
+
+ALTER TABLE files ADD COLUMN IF NOT EXISTS content_hash VARCHAR;
+ALTER TABLE files ADD COLUMN IF NOT EXISTS blob_id INTEGER REFERENCES blobs(id);
+CREATE INDEX IF NOT EXISTS ix_files_content_hash ON files (content_hash);
@@ -0,0 +1,15 @@
+-- dialect: postgresql
+-- Indexes backing /api/search and folder listings
+-- Trigram GIN indexes serve ILIKE '%term%' and 'term%' on file names and folder paths
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS ix_files_filename_trgm ON files USING gin (filename gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_files_folder_path_trgm ON files USING gin (folder_path gin_trgm_ops);
+
+-- Subtree (LIKE 'prefix/%') and equality lookups on folder paths
+CREATE INDEX IF NOT EXISTS ix_files_folder_path ON files (folder_path);
+CREATE INDEX IF NOT EXISTS ix_files_folder_path_pattern ON files (folder_path text_pattern_ops);
+
+-- Owner and date filters
+CREATE INDEX IF NOT EXISTS ix_files_owner_id ON files (owner_id);
+CREATE INDEX IF NOT EXISTS ix_files_uploaded_at ON files (uploaded_at);
@@ -0,0 +1,10 @@
+-- dialect: postgresql
+-- Per-user and per-folder-assignment storage quotas
+ALTER TABLE users ADD COLUMN IF NOT EXISTS storage_quota_bytes BIGINT;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS storage_used_bytes BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE folder_assignments ADD COLUMN IF NOT EXISTS quota_bytes BIGINT;
+
+-- Seed the usage counters from existing files; afterwards they are maintained incrementally
+UPDATE users SET storage_used_bytes = COALESCE(
+    (SELECT SUM(file_size) FROM files WHERE files.owner_id = users.id), 0
+);
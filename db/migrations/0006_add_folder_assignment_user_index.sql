@@ -0,0 +1,4 @@
+-- transaction: none
+-- Every ACL check filters folder_assignments by user_id; build the index
+-- without blocking writes (plain CREATE INDEX on SQLite)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_folder_assignments_user_id_folder_path ON folder_assignments (user_id, folder_path);
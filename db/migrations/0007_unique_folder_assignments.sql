@@ -0,0 +1,9 @@
+-- One assignment per (folder_path, user_id); bulk assignment upserts on this key.
+-- Duplicates left by the old check-then-insert code are collapsed onto the
+-- oldest row, which is the one the update path has been maintaining.
+DELETE FROM folder_assignments
+WHERE id NOT IN (
+    SELECT MIN(id) FROM folder_assignments GROUP BY folder_path, user_id
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_folder_assignments_folder_path_user_id ON folder_assignments (folder_path, user_id);
@@ -0,0 +1,46 @@
+-- dialect: postgresql
+-- Files and folder assignments reference the folders tree (created from the models).
+-- The tree is backfilled from every folder path already in use; folders that exist
+-- only in the bucket are added by `python -m backend.sync_folders`.
+ALTER TABLE files ADD COLUMN IF NOT EXISTS folder_id INTEGER REFERENCES folders(id);
+ALTER TABLE folder_assignments ADD COLUMN IF NOT EXISTS folder_id INTEGER REFERENCES folders(id);
+CREATE INDEX IF NOT EXISTS ix_files_folder_id ON files (folder_id);
+CREATE INDEX IF NOT EXISTS ix_folder_assignments_folder_id ON folder_assignments (folder_id);
+
+-- Subtree matches (path LIKE '/a/%') can use this index under any collation
+CREATE INDEX IF NOT EXISTS ix_folders_path_pattern ON folders (path text_pattern_ops);
+
+INSERT INTO folders (parent_id, name, path, depth, created_at)
+VALUES (NULL, '', '/', 0, now())
+ON CONFLICT (path) DO NOTHING;
+
+WITH paths AS (
+    SELECT DISTINCT folder_path FROM files WHERE folder_path IS NOT NULL
+    UNION
+    SELECT DISTINCT folder_path FROM folder_assignments
+), parts AS (
+    SELECT array_remove(string_to_array(folder_path, '/'), '') AS a FROM paths
+)
+INSERT INTO folders (name, path, depth, created_at)
+SELECT DISTINCT a[n], '/' || array_to_string(a[1:n], '/'), n, now()
+FROM parts, generate_series(1, COALESCE(array_length(a, 1), 0)) AS n
+ON CONFLICT (path) DO NOTHING;
+
+UPDATE folders AS child
+SET parent_id = parent.id
+FROM folders AS parent
+WHERE child.parent_id IS NULL
+  AND child.depth > 0
+  AND parent.path = CASE WHEN child.depth = 1 THEN '/' ELSE regexp_replace(child.path, '/[^/]+$', '') END;
+
+UPDATE files
+SET folder_id = folders.id
+FROM folders
+WHERE files.folder_id IS NULL
+  AND folders.path = '/' || array_to_string(array_remove(string_to_array(files.folder_path, '/'), ''), '/');
+
+UPDATE folder_assignments
+SET folder_id = folders.id
+FROM folders
+WHERE folder_assignments.folder_id IS NULL
+  AND folders.path = '/' || array_to_string(array_remove(string_to_array(folder_assignments.folder_path, '/'), ''), '/');
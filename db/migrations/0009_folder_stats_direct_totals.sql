@@ -0,0 +1,22 @@
+-- dialect: postgresql
+-- folder_stats rows now hold only the objects directly in each folder; readers sum
+-- subtrees. Convert the rolled-up totals by subtracting each folder's immediate
+-- children (the subquery reads the pre-update values). last_modified is kept:
+-- the maximum over a subtree is unchanged. Other databases: run
+-- `python -m backend.rebuild_folder_stats` after upgrading.
+UPDATE folder_stats AS parent
+SET total_bytes = parent.total_bytes - children.total_bytes,
+    object_count = parent.object_count - children.object_count
+FROM (
+    SELECT
+        CASE
+            WHEN position('/' IN substr(folder_path, 2)) = 0 THEN '/'
+            ELSE left(folder_path, length(folder_path) - position('/' IN reverse(folder_path)))
+        END AS parent_path,
+        SUM(total_bytes) AS total_bytes,
+        SUM(object_count) AS object_count
+    FROM folder_stats
+    WHERE folder_path <> '/'
+    GROUP BY 1
+) AS children
+WHERE parent.folder_path = children.parent_path;
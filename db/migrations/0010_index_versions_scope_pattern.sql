@@ -0,0 +1,5 @@
+-- dialect: postgresql
+-- transaction: none
+-- Listing ETags sum index_versions over a folder's subtree (scope LIKE 'folder:/a/%');
+-- the primary key index only serves that prefix match under the C collation
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_index_versions_scope_pattern ON index_versions (scope text_pattern_ops);
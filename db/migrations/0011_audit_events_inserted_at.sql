@@ -0,0 +1,5 @@
+-- dialect: postgresql
+-- Usage rollups settle on the database's insert time instead of occurred_at,
+-- which is taken when the event is queued. Existing rows get the migration
+-- time, so events not yet rolled up wait one more settle window.
+ALTER TABLE audit_events ADD COLUMN IF NOT EXISTS inserted_at TIMESTAMPTZ NOT NULL DEFAULT now();
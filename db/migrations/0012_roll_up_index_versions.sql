@@ -0,0 +1,26 @@
+-- dialect: postgresql
+-- A folder write now bumps its ancestors too, and a listing's ETag reads its
+-- folder's row instead of summing the subtree. Seed every folder row (and any
+-- missing ancestor) with its subtree sum, the value old ETags were built from.
+WITH folder_rows AS (
+    SELECT string_to_array(substr(scope, 9), '/') AS parts
+    FROM index_versions
+    WHERE scope LIKE 'folder:/%'
+)
+INSERT INTO index_versions (scope, version, updated_at)
+SELECT DISTINCT 'folder:/' || array_to_string(parts[1:n], '/'), 0, now()
+FROM folder_rows, generate_series(0, cardinality(parts)) AS n
+ON CONFLICT (scope) DO NOTHING;
+
+UPDATE index_versions AS target
+SET version = rolled.total, updated_at = now()
+FROM (
+    SELECT 'folder:/' || array_to_string(parts[1:n], '/') AS scope, SUM(version) AS total
+    FROM (
+        SELECT version, string_to_array(substr(scope, 9), '/') AS parts
+        FROM index_versions
+        WHERE scope LIKE 'folder:/%'
+    ) AS folder_rows, generate_series(0, cardinality(parts)) AS n
+    GROUP BY 1
+) AS rolled
+WHERE target.scope = rolled.scope;
@@ -0,0 +1,5 @@
+-- dialect: postgresql
+-- transaction: none
+-- Listing ETags no longer sum index_versions by scope prefix; the pattern
+-- index from 0010 has no readers left
+DROP INDEX CONCURRENTLY IF EXISTS ix_index_versions_scope_pattern;
@@ -0,0 +1,33 @@
+-- dialect: postgresql
+-- folder_stats rows hold subtree totals again (0009 had made them direct), so
+-- a folder's size is one row. Add a row for every ancestor that has none,
+-- then set each row to the sum of the direct rows below it. Other databases:
+-- run `python -m backend.rebuild_folder_stats` after upgrading.
+WITH direct AS (
+    SELECT string_to_array(substr(folder_path, 2), '/') AS parts
+    FROM folder_stats
+    WHERE folder_path <> '/'
+)
+INSERT INTO folder_stats (folder_path, total_bytes, object_count, updated_at)
+SELECT DISTINCT '/' || array_to_string(parts[1:n], '/'), 0, 0, now()
+FROM direct, generate_series(0, cardinality(parts) - 1) AS n
+ON CONFLICT (folder_path) DO NOTHING;
+
+UPDATE folder_stats AS target
+SET total_bytes = rolled.total_bytes,
+    object_count = rolled.object_count,
+    last_modified = rolled.last_modified,
+    updated_at = now()
+FROM (
+    SELECT '/' || array_to_string(parts[1:n], '/') AS folder_path,
+           SUM(total_bytes) AS total_bytes,
+           SUM(object_count) AS object_count,
+           MAX(last_modified) AS last_modified
+    FROM (
+        SELECT total_bytes, object_count, last_modified,
+               CASE WHEN folder_path = '/' THEN '{}'::text[] ELSE string_to_array(substr(folder_path, 2), '/') END AS parts
+        FROM folder_stats
+    ) AS direct, generate_series(0, cardinality(parts)) AS n
+    GROUP BY 1
+) AS rolled
+WHERE target.folder_path = rolled.folder_path;
@@ -0,0 +1,5 @@
+-- dialect: postgresql
+-- transaction: none
+-- /api/search matches folder results against folders.path (ILIKE '%term%'),
+-- so .keep-only folders with no files are found too
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_folders_path_trgm ON folders USING gin (path gin_trgm_ops);
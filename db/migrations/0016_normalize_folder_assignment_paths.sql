@@ -0,0 +1,26 @@
+-- 0007 deduplicated assignments on their raw paths, so "/a", "/a/" and "a"
+-- stayed separate rows for the same user. Paths are normalized the way
+-- ensure_folders stores them (canonical_path: leading "/", no trailing or
+-- repeated "/"; runs of up to 32 slashes), keeping one row per folder and
+-- user: the one already spelled canonically, which the routes have been
+-- updating, else the oldest. Run `python -m backend.rebuild_permissions`
+-- afterwards so effective permissions drop the removed rows.
+DELETE FROM folder_assignments
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY user_id, normalized
+            ORDER BY CASE WHEN folder_path = normalized THEN 0 ELSE 1 END, id
+        ) AS position
+        FROM (
+            SELECT id, user_id, folder_path,
+                '/' || trim(replace(replace(replace(replace(replace(folder_path, '//', '/'), '//', '/'), '//', '/'), '//', '/'), '//', '/'), '/') AS normalized
+            FROM folder_assignments
+        ) AS paths
+    ) AS ranked
+    WHERE position > 1
+);
+
+UPDATE folder_assignments
+SET folder_path = '/' || trim(replace(replace(replace(replace(replace(folder_path, '//', '/'), '//', '/'), '//', '/'), '//', '/'), '//', '/'), '/')
+WHERE folder_path <> '/' || trim(replace(replace(replace(replace(replace(folder_path, '//', '/'), '//', '/'), '//', '/'), '//', '/'), '//', '/'), '/');
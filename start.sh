@@ -11,6 +11,10 @@ fi
 echo "Building frontend..."
 npx vite build
 
+# Apply schema migrations and seed data once, before any worker starts
+echo "Migrating database..."
+uv run python -m backend.database.migrate
+
 # Start the Python backend
 echo "Starting Python backend..."
 uv run uvicorn backend.main:app --host 0.0.0.0 --port 5000 --reload
@@ -0,0 +1,46 @@
+"""
+Test fixtures
+Tests run against a throwaway SQLite database; the environment must be set
+before backend is imported, since settings and engines are module globals.
+"""
+
+import os
+import tempfile
+
+_workdir = tempfile.mkdtemp(prefix="sftp-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_workdir, 'test.db')}",
+    "DATABASE_REPLICA_URL": "",
+    "ORACLE_ACCESS_KEY": "test",
+    "ORACLE_SECRET_KEY": "test",
+    "ORACLE_REGION": "us-east-1",
+    "ORACLE_BUCKET_NAME": "test",
+    "RATE_LIMIT_ENABLED": "false",
+    "TRACING_ENABLED": "false",
+    "AUDIT_ENABLED": "false",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+from backend.auth.security import create_access_token
+from backend.database.db import Base, SessionLocal, engine
+from backend.main import app
+import backend.models  # noqa: F401  (registers every table on Base.metadata)
+
+# Startup events do not run outside a `with` block, so no schema check or static assets
+client = TestClient(app)
+
+
+def bearer(user) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.username})}"}
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
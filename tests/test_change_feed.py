@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+from backend.models import FolderChange
+from backend.services.change_feed import current_cursor, fetch_changes
+
+
+def add_change(db, folder_path: str, age_seconds: float) -> int:
+    change = FolderChange(folder_path=folder_path, operation="upload", created_at=datetime.utcnow() - timedelta(seconds=age_seconds))
+    db.add(change)
+    db.commit()
+    return change.id
+
+
+def test_fetch_changes_holds_back_unsettled_changes(db):
+    settled = add_change(db, "/a", 60)
+    add_change(db, "/a", 0)
+
+    assert [change["cursor"] for change in fetch_changes("/a", 0)] == [settled]
+    assert current_cursor() == settled
+
+
+def test_fetch_changes_never_passes_an_unsettled_id(db):
+    # A lower id still inside the settle window blocks later ids, which
+    # stand in for a transaction that committed out of id order
+    add_change(db, "/a", 0)
+    add_change(db, "/a", 60)
+
+    assert fetch_changes("/a", 0) == []
+    assert current_cursor() == 0
+
+
+def test_fetch_changes_filters_by_folder(db):
+    add_change(db, "/a", 60)
+    nested = add_change(db, "/a/b", 60)
+    add_change(db, "/ab", 60)
+
+    assert [change["cursor"] for change in fetch_changes("/a/b", 0)] == [nested]
+    assert len(fetch_changes("/a", 0, recursive=True)) == 2
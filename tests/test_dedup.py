@@ -0,0 +1,18 @@
+from backend.models import File, Blob, User
+from backend.services.dedup_service import add_blob_reference, release_blob
+
+def test_blob_references_are_counted_in_sql(db):
+    u = User(username="u", hashed_password="-"); db.add(u); db.flush()
+    blob = Blob(content_hash="sha256:x", s3_key=".blobs/x", size=1, ref_count=1)
+    a = File(filename="a", s3_key="f/a", folder_path="/f", owner_id=u.id, blob=blob)
+    db.add_all([blob, a]); db.commit()
+    b = File(filename="b", s3_key="g/a", folder_path="/g", owner_id=u.id)
+    assert add_blob_reference(db, b, a)
+    db.add(b); db.commit()
+    assert db.get(Blob, blob.id).ref_count == 2
+    assert release_blob(db, a) is None
+    db.delete(a); db.commit()
+    assert db.get(Blob, blob.id).ref_count == 1
+    assert release_blob(db, b) == ".blobs/x"
+    db.delete(b); db.commit()
+    assert db.query(Blob).count() == 0
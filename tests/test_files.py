@@ -0,0 +1,84 @@
+import pytest
+from datetime import datetime
+from backend.models import File, FolderAssignment, User
+from backend.services.folders import ensure_folder
+from backend.services.permissions import refresh_permissions
+from backend.services.s3_service import s3_service
+from tests.conftest import bearer, client
+
+KEYS = ["top.txt", "team/docs/report.txt", "other/secret.txt"]
+
+
+def list_objects(prefix: str = "", delimiter: str = None) -> list[dict]:
+    """A delimited listing over KEYS, shaped like s3_service.list_objects."""
+    objects, prefixes = [], set()
+    for key in KEYS:
+        if not key.startswith(prefix):
+            continue
+        rest = key[len(prefix):]
+        if delimiter and delimiter in rest:
+            prefixes.add(prefix + rest.split(delimiter)[0] + delimiter)
+        else:
+            objects.append({"Key": key, "Size": 1, "LastModified": datetime.utcnow()})
+    return objects + [{"Prefix": p} for p in sorted(prefixes)]
+
+
+def test_ancestor_assignment_applies_the_same_rule_everywhere(db, monkeypatch):
+    monkeypatch.setattr(s3_service, "list_objects", list_objects)
+    monkeypatch.setattr(s3_service, "generate_presigned_download_url", lambda key, **kwargs: f"https://s3/{key}")
+    user = User(username="member", hashed_password="-")
+    db.add(user)
+    db.flush()
+    # Only an ancestor of /team/docs is assigned
+    db.add(FolderAssignment(folder_path="/team", user_id=user.id, can_read=True))
+    files = {}
+    for key in KEYS:
+        folder = "/" + key.rpartition("/")[0]
+        files[key] = File(filename=key.rsplit("/", 1)[-1], s3_key=key, file_size=1, owner_id=user.id,
+                          folder_path=folder, folder_id=ensure_folder(db, folder, user.id))
+    db.add_all(files.values())
+    refresh_permissions(db, [user.id])
+    db.commit()
+    headers = bearer(user)
+
+    # Root is only navigated through: the team folder, none of root's files
+    root = client.get("/api/files", params={"folder_path": "/"}, headers=headers).json()
+    assert [(entry["type"], entry["filename"]) for entry in root] == [("folder", "team")]
+    folders = client.get("/api/files/folders", params={"folder_path": "/"}, headers=headers).json()
+    assert [folder["name"] for folder in folders] == ["team"]
+
+    docs = client.get("/api/files", params={"folder_path": "/team/docs"}, headers=headers).json()
+    assert [entry["filename"] for entry in docs] == ["report.txt"]
+    assert client.get("/api/files", params={"folder_path": "/other"}, headers=headers).status_code == 403
+
+    found = client.get("/api/search", params={"q": "t"}, headers=headers).json()
+    assert [f["s3_key"] for f in found["files"]] == ["team/docs/report.txt"]
+    assert [f["path"] for f in found["folders"]] == ["/team", "/team/docs"]
+
+    assert client.get(f"/api/files/{files['team/docs/report.txt'].id}/download-url", headers=headers).status_code == 200
+    assert client.get(f"/api/files/{files['top.txt'].id}/download-url", headers=headers).status_code == 403
+    assert client.get(f"/api/files/{files['other/secret.txt'].id}/download-url", headers=headers).status_code == 403
+
+
+def test_blob_store_is_not_reachable_by_key(db, monkeypatch):
+    blob_key = ".blobs/sha256/ab/cd/0123"
+    monkeypatch.setattr(s3_service, "list_objects", lambda prefix="", delimiter=None: [
+        {"Prefix": ".blobs/"}, {"Prefix": "team/"},
+        {"Key": blob_key, "Size": 1, "LastModified": datetime.utcnow()},
+        {"Key": "team/a.txt", "Size": 1, "LastModified": datetime.utcnow()},
+    ])
+    monkeypatch.setattr(s3_service, "delete_object", lambda key: pytest.fail(f"deleted {key}"))
+    admin = User(username="admin", hashed_password="-", is_admin=True)
+    db.add(admin)
+    db.commit()
+    headers = bearer(admin)
+
+    assert client.get(f"/api/files/download-by-key/{blob_key}", headers=headers).status_code == 400
+    assert client.get(f"/api/files/content-by-key/{blob_key}", headers=headers).status_code == 400
+    assert client.delete(f"/api/files/by-key/{blob_key}", headers=headers).status_code == 400
+    assert client.get("/api/files", params={"folder_path": "/.blobs"}, headers=headers).status_code == 400
+
+    root = client.get("/api/files", params={"folder_path": "/"}, headers=headers).json()
+    assert [entry["filename"] for entry in root] == ["team"]
+    folders = client.get("/api/files/folders", params={"folder_path": "/"}, headers=headers).json()
+    assert [folder["name"] for folder in folders] == ["team"]
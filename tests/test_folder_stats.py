@@ -0,0 +1,50 @@
+import pytest
+from datetime import datetime
+from botocore.exceptions import ClientError
+from backend.models import FolderStats
+from backend.services import folder_stats
+from backend.services.folder_stats import apply_delta, get_folder_stats, rebuild_folder_stats
+
+
+def test_failed_listing_leaves_aggregates_untouched(db, monkeypatch):
+    db.add(FolderStats(folder_path="/", total_bytes=10, object_count=1))
+    db.commit()
+
+    def failing_listing(prefix=""):
+        yield {"Key": "a/one.bin", "Size": 1}
+        raise ClientError({"Error": {"Code": "InternalError", "Message": "boom"}}, "ListObjectsV2")
+
+    monkeypatch.setattr(folder_stats.s3_service, "iter_objects", failing_listing)
+    with pytest.raises(ClientError):
+        rebuild_folder_stats(db)
+    db.rollback()
+
+    assert [(row.folder_path, row.total_bytes) for row in db.query(FolderStats).all()] == [("/", 10)]
+
+
+def test_rebuild_counts_objects_and_skips_markers(db, monkeypatch):
+    objects = [{"Key": "a/one.bin", "Size": 3}, {"Key": "a/b/two.bin", "Size": 4}, {"Key": "c/.keep", "Size": 13}]
+    monkeypatch.setattr(folder_stats.s3_service, "iter_objects", lambda prefix="": iter(objects))
+
+    rebuild_folder_stats(db)
+
+    rows = {row.folder_path: (row.total_bytes, row.object_count) for row in db.query(FolderStats).all()}
+    assert rows == {"/": (7, 2), "/a": (7, 2), "/a/b": (4, 1), "/c": (0, 0)}
+    totals = get_folder_stats(db, ["/", "/a", "/a/b", "/c", "/missing"])
+    assert {path: (t.total_bytes, t.object_count) for path, t in totals.items()} == {
+        "/": (7, 2), "/a": (7, 2), "/a/b": (4, 1), "/c": (0, 0)
+    }
+
+
+def test_deltas_roll_up_into_every_ancestor(db):
+    apply_delta(db, "a/b/", 10, 1, datetime(2024, 1, 2))
+    apply_delta(db, "/a", 5, 1, datetime(2024, 1, 1))
+    apply_delta(db, "/a/b", -4, 0)
+    db.commit()
+
+    totals = get_folder_stats(db, ["/", "/a", "/a/b", "/ab"])
+    assert {path: tuple(t) for path, t in totals.items()} == {
+        "/": (11, 2, datetime(2024, 1, 2)),
+        "/a": (11, 2, datetime(2024, 1, 2)),
+        "/a/b": (6, 1, datetime(2024, 1, 2)),
+    }
@@ -0,0 +1,70 @@
+from backend.models import File, Folder, FolderAssignment, FolderStats, User
+from backend.services.folders import ensure_folder, ensure_folders, folder_ids, prune_candidates, prune_folders
+from backend.services.s3_service import s3_service
+
+
+def test_ensure_folders_on_empty_table(db):
+    ids = ensure_folders(db, ["/a/b", "c/"])
+    db.commit()
+
+    assert set(ids) == {"/a/b", "/c"}
+    paths = {folder.path: folder for folder in db.query(Folder).all()}
+    assert set(paths) == {"/", "/a", "/a/b", "/c"}
+    assert paths["/a/b"].parent_id == paths["/a"].id
+    assert paths["/a"].parent_id == paths["/"].id
+    assert paths["/a/b"].depth == 2
+    assert ids["/a/b"] == paths["/a/b"].id
+
+
+def test_ensure_folders_reuses_existing_rows(db):
+    first = ensure_folder(db, "/a/b")
+    db.commit()
+
+    ids = ensure_folders(db, ["/a/b", "/a/b/c", "/a//d"])
+    db.commit()
+
+    assert ids["/a/b"] == first
+    assert db.query(Folder).count() == 5
+    assert folder_ids(db, ["/a/d", "/missing"]) == {"/a/d": ids["/a//d"]}
+
+
+def test_ensure_folders_with_no_paths(db):
+    assert ensure_folders(db, []) == {}
+    assert folder_ids(db, []) == {}
+
+
+def test_prune_folders_removes_emptied_chain(db, monkeypatch):
+    monkeypatch.setattr(s3_service, "object_exists", lambda key: False)
+    user = User(username="u", hashed_password="-")
+    db.add(user)
+    db.flush()
+    ids = ensure_folders(db, ["/a/b/c", "/a/d"])
+    db.add(File(filename="x", s3_key="a/d/x", folder_path="/a/d", folder_id=ids["/a/d"], owner_id=user.id))
+    db.commit()
+
+    assert prune_folders(db, ["/a/b/c"]) == 2
+    db.commit()
+    assert {folder.path for folder in db.query(Folder).all()} == {"/", "/a", "/a/d"}
+
+
+def test_prune_folders_keeps_folders_still_in_use(db, monkeypatch):
+    monkeypatch.setattr(s3_service, "object_exists", lambda key: key == "kept/.keep")
+    user = User(username="u", hashed_password="-")
+    db.add(user)
+    db.flush()
+    ids = ensure_folders(db, ["/kept", "/assigned", "/filled", "/untracked"])
+    db.add(FolderAssignment(folder_path="/assigned", folder_id=ids["/assigned"], user_id=user.id))
+    db.add(File(filename="x", s3_key="filled/x", folder_path="/filled", owner_id=user.id))
+    db.add(FolderStats(folder_path="/untracked", total_bytes=5, object_count=1))
+    db.commit()
+
+    assert prune_folders(db, ["/kept", "/assigned", "/filled", "/untracked", "/", "/missing"]) == 0
+    assert db.query(Folder).count() == 5
+
+
+def test_prune_candidates_need_a_deleted_marker_or_an_empty_count(db):
+    db.add_all([FolderStats(folder_path="/full", total_bytes=5, object_count=1), FolderStats(folder_path="/drained", total_bytes=0, object_count=0)])
+    db.commit()
+
+    assert prune_candidates(db, ["/full", "/drained/", "/never-counted", "/"]) == ["/drained", "/never-counted"]
+    assert prune_candidates(db, ["/full"], marker_deleted=True) == ["/full"]
@@ -0,0 +1,24 @@
+from backend.models import IndexVersion
+from backend.services.index_versions import bump_folder_versions, subtree_version
+
+
+def test_writes_bump_their_folder_and_ancestors(db):
+    bump_folder_versions(db, "/a/b/c")
+    db.commit()
+
+    assert sorted(row.scope for row in db.query(IndexVersion).all()) == ["folder:/", "folder:/a", "folder:/a/b", "folder:/a/b/c"]
+
+
+def test_subtree_version_changes_for_any_write_below(db):
+    bump_folder_versions(db, "/a")
+    db.commit()
+    before = {path: subtree_version(db, path) for path in ("/", "/a", "/a/b", "/ab")}
+
+    bump_folder_versions(db, "/a/b/c")
+    db.commit()
+    after = {path: subtree_version(db, path) for path in ("/", "/a", "/a/b", "/ab")}
+
+    assert after["/"] > before["/"]
+    assert after["/a"] > before["/a"]
+    assert after["/a/b"] > before["/a/b"]
+    assert after["/ab"] == before["/ab"] == 0
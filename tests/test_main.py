@@ -0,0 +1,26 @@
+from backend.config import settings
+from backend.models import User
+from tests.conftest import bearer, client
+
+
+def test_s3_pool_health_requires_an_admin(db):
+    admin = User(username="admin", email="admin@example.com", hashed_password="-", is_admin=True)
+    user = User(username="user", email="user@example.com", hashed_password="-")
+    db.add_all([admin, user])
+    db.commit()
+
+    assert client.get("/api/health/s3-pool").status_code in (401, 403)
+    assert client.get("/api/health/s3-pool", headers=bearer(user)).status_code == 403
+    response = client.get("/api/health/s3-pool", headers=bearer(admin))
+    assert response.status_code == 200
+    assert "in_flight" in response.json()
+
+
+def test_metrics_require_the_scrape_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code in (200, 503)
@@ -0,0 +1,106 @@
+import os
+import pytest
+from sqlalchemy import inspect, select
+from backend.database import migrate
+from backend.database.db import engine
+from backend.database.migrate import Migration, MigrationError, run_migrations, schema_migrations
+from backend.models import FolderAssignment, User
+from backend.services.folders import canonical_path
+
+MIGRATIONS = {
+    "0001_create_widgets.sql": "-- A plain migration\nCREATE TABLE widgets (id INTEGER PRIMARY KEY, name VARCHAR);\n",
+    "0002_postgres_only.sql": "-- dialect: postgresql\nCREATE EXTENSION IF NOT EXISTS pg_trgm;\n",
+    "0003_widgets_name_index.sql": (
+        "-- transaction: none\n"
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_widgets_name ON widgets (name);\n"
+    ),
+}
+
+
+@pytest.fixture
+def migrations_dir(db, tmp_path, monkeypatch):
+    for name, sql in MIGRATIONS.items():
+        (tmp_path / name).write_text(sql)
+    discover = migrate.discover_migrations
+    monkeypatch.setattr(migrate, "discover_migrations", lambda: discover(str(tmp_path)))
+    yield tmp_path
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS widgets")
+    migrate.migration_metadata.drop_all(bind=engine)
+
+
+def recorded_versions() -> list[str]:
+    with engine.connect() as conn:
+        return list(conn.execute(select(schema_migrations.c.version).order_by(schema_migrations.c.version)).scalars())
+
+
+def test_fresh_database_applies_every_migration(migrations_dir, capsys):
+    assert run_migrations() == ["0001_create_widgets", "0002_postgres_only", "0003_widgets_name_index"]
+
+    assert "- Skipped 0002_postgres_only (dialect: postgresql)" in capsys.readouterr().out
+    assert recorded_versions() == ["0001_create_widgets", "0002_postgres_only", "0003_widgets_name_index"]
+    assert "ix_widgets_name" in {index["name"] for index in inspect(engine).get_indexes("widgets")}
+
+
+def test_rerun_is_a_no_op(migrations_dir):
+    run_migrations()
+    assert run_migrations() == []
+    assert len(recorded_versions()) == 3
+
+
+def test_edited_migration_is_refused(migrations_dir):
+    run_migrations()
+    (migrations_dir / "0001_create_widgets.sql").write_text(MIGRATIONS["0001_create_widgets.sql"] + "-- edited\n")
+
+    with pytest.raises(MigrationError, match="0001_create_widgets"):
+        run_migrations()
+    assert migrate.main([]) == 1
+
+
+def test_dry_run_prints_pending_work_without_applying_it(migrations_dir, capsys):
+    assert migrate.main(["--dry-run"]) == 0
+
+    out = capsys.readouterr().out
+    assert "-- 0001_create_widgets (transaction)" in out
+    assert "-- 0002_postgres_only: skipped on sqlite" in out
+    assert "CREATE INDEX IF NOT EXISTS ix_widgets_name ON widgets (name);" in out
+    assert not inspect(engine).has_table("widgets")
+    assert not inspect(engine).has_table("schema_migrations")
+
+
+def test_concurrently_is_stripped_outside_postgres(migrations_dir):
+    migration = Migration(str(migrations_dir / "0003_widgets_name_index.sql"))
+
+    assert not migration.transactional
+    assert migration.statements("postgresql") == ["CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_widgets_name ON widgets (name)"]
+    assert migration.statements("sqlite") == ["CREATE INDEX IF NOT EXISTS ix_widgets_name ON widgets (name)"]
+    assert migration.applies_to("sqlite")
+
+
+def test_assignment_paths_are_normalized_before_deduplicating(db):
+    migration = Migration(os.path.join(migrate.MIGRATIONS_DIR, "0016_normalize_folder_assignment_paths.sql"))
+    db.add_all([User(id=1, username="one", hashed_password="-"), User(id=2, username="two", hashed_password="-")])
+    db.add_all([
+        FolderAssignment(id=1, folder_path="a/", user_id=1, can_write=True),
+        FolderAssignment(id=2, folder_path="/a", user_id=1, can_write=False),
+        FolderAssignment(id=3, folder_path="/a//", user_id=1, can_write=True),
+        FolderAssignment(id=4, folder_path="b/c", user_id=2),
+        FolderAssignment(id=5, folder_path="//b/c/", user_id=2),
+        FolderAssignment(id=6, folder_path="//", user_id=2),
+    ])
+    db.commit()
+
+    assert migration.applies_to("sqlite")
+    with engine.begin() as conn:
+        for statement in migration.statements("sqlite"):
+            conn.exec_driver_sql(statement)
+
+    db.expire_all()
+    rows = db.query(FolderAssignment).order_by(FolderAssignment.id).all()
+    # The canonically spelled row wins, else the oldest; paths match canonical_path
+    assert [(a.id, a.folder_path, a.user_id, a.can_write) for a in rows] == [
+        (2, "/a", 1, False),
+        (4, "/b/c", 2, False),
+        (6, "/", 2, False),
+    ]
+    assert all(a.folder_path == canonical_path(a.folder_path) for a in rows)
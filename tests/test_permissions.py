@@ -0,0 +1,64 @@
+from backend.models import EffectivePermission, FolderAssignment, Role, User
+from backend.services.permissions import READ, WRITE, SHARE, folder_access, has_folder_permission, has_permission, refresh_permissions
+
+
+def make_user(db, **role_flags) -> User:
+    user = User(username="member", hashed_password="-")
+    if role_flags:
+        user.roles = [Role(name="custom", **role_flags)]
+    db.add(user)
+    db.flush()
+    return user
+
+
+def test_assignments_are_inherited_by_subfolders(db):
+    user = make_user(db)
+    db.add(FolderAssignment(folder_path="/team", user_id=user.id, can_read=True, can_write=True))
+    refresh_permissions(db, [user.id])
+    db.commit()
+
+    assert has_folder_permission(db, user, "/team/docs", WRITE)
+    assert has_folder_permission(db, user, "/team", READ)
+    assert not has_folder_permission(db, user, "/other", READ)
+    assert not has_folder_permission(db, user, "/teamwork", READ)
+    assert has_permission(db, user, "read")
+    assert not has_permission(db, user, "share")
+
+
+def test_refresh_replaces_previous_rows(db):
+    user = make_user(db, can_read=True, can_share=True)
+    assignment = FolderAssignment(folder_path="/a", user_id=user.id, can_read=True)
+    db.add(assignment)
+    refresh_permissions(db, [user.id])
+    db.commit()
+
+    db.delete(assignment)
+    refresh_permissions(db, [user.id, user.id])
+    db.commit()
+
+    assert [row.folder_path for row in db.query(EffectivePermission).filter_by(user_id=user.id)] == ["/"]
+    assert not has_folder_permission(db, user, "/a", READ)
+    assert has_permission(db, user, "share")
+
+
+def test_users_without_rows_are_computed_on_demand(db):
+    user = make_user(db)
+    db.add(FolderAssignment(folder_path="/a", user_id=user.id, can_read=True, can_share=True))
+    db.commit()
+
+    assert db.query(EffectivePermission).count() == 0
+    assert has_folder_permission(db, user, "/a/b", SHARE)
+
+
+def test_folder_access_matches_folder_permissions(db):
+    user = make_user(db)
+    db.add(FolderAssignment(folder_path="/dept/team", user_id=user.id, can_read=True))
+    db.add(FolderAssignment(folder_path="/dept", user_id=user.id, can_read=False, can_write=True))
+    refresh_permissions(db, [user.id])
+    db.commit()
+
+    access = folder_access(db, user)
+    for path in ("/", "/dept", "/dept/team", "/dept/team/x", "/dept/teamwork", "/other"):
+        assert access.can_read(path) == has_folder_permission(db, user, path, READ)
+    assert access.can_navigate("/") and access.can_navigate("/dept")
+    assert not access.can_navigate("/dept/teamwork")
@@ -0,0 +1,57 @@
+import asyncio
+from backend.config import settings
+from backend.middleware.profiling import ProfilingMiddleware
+from backend.models import User
+from tests.conftest import bearer
+
+
+async def call(app, path: str, headers: dict = None) -> dict:
+    """Run one request through the ASGI app; returns its status and body."""
+    scope = {
+        "type": "http",
+        "path": path,
+        "query_string": b"profile=1" if headers else b"",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    response = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        else:
+            response["body"] = message["body"]
+
+    await app(scope, receive, send)
+    return response
+
+
+def test_cprofile_refuses_to_start_while_other_requests_run(db, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    admin = User(username="admin", hashed_password="-", is_admin=True)
+    db.add(admin)
+    db.commit()
+    release = asyncio.Event()
+
+    async def inner(scope, receive, send):
+        if scope["path"] == "/slow":
+            await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def scenario():
+        middleware = ProfilingMiddleware(inner)
+        slow = asyncio.create_task(call(middleware, "/slow"))
+        await asyncio.sleep(0)
+        refused = await call(middleware, "/fast", bearer(admin))
+        release.set()
+        await slow
+        profiled = await call(middleware, "/fast", bearer(admin))
+        return refused, profiled
+
+    refused, profiled = asyncio.run(scenario())
+    assert refused["status"] == 409
+    assert profiled["status"] == 200
+    assert b"function calls" in profiled["body"]
@@ -0,0 +1,38 @@
+from backend.models import File, FolderAssignment, FolderStats, User
+from backend.services.quotas import completion_exceeds_quota
+
+
+def make_upload(db, size: int, folder_path: str = "/team", **user_fields) -> File:
+    user = User(username="uploader", hashed_password="-", **user_fields)
+    db.add(user)
+    db.flush()
+    file = File(filename="f.bin", s3_key=f"{folder_path.strip('/')}/f.bin", folder_path=folder_path, owner_id=user.id, file_size=size)
+    db.add(file)
+    db.flush()
+    return file
+
+
+def test_completion_checks_the_owner_quota(db):
+    file = make_upload(db, 50, storage_quota_bytes=100, storage_used_bytes=60)
+
+    assert completion_exceeds_quota(db, file)
+    file.file_size = 40
+    assert not completion_exceeds_quota(db, file)
+    # Re-completing only counts the growth
+    file.file_size = 90
+    assert not completion_exceeds_quota(db, file, previous_size=60)
+
+
+def test_completion_checks_folder_assignment_quota(db):
+    file = make_upload(db, 30, "/team/sub")
+    db.add(FolderAssignment(folder_path="/team", user_id=file.owner_id, can_write=True, quota_bytes=100))
+    db.add(FolderStats(folder_path="/team", total_bytes=80, object_count=1))
+    db.flush()
+
+    assert completion_exceeds_quota(db, file)
+    file.file_size = 20
+    assert not completion_exceeds_quota(db, file)
+
+
+def test_completion_without_quota(db):
+    assert not completion_exceeds_quota(db, make_upload(db, 10 ** 12))
@@ -0,0 +1,22 @@
+import asyncio
+from backend.middleware import rate_limit
+from backend.middleware.rate_limit import InMemoryBackend
+
+
+def test_prune_uses_each_buckets_own_refill_rate(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(InMemoryBackend, "MAX_KEYS", 2)
+    backend = InMemoryBackend()
+
+    async def scenario():
+        # A slow rule (one token per 100 s) drained to zero, and a fast rule's bucket
+        assert await backend.take_token("login", rate=0.01, burst=1) == 0
+        assert await backend.take_token("list", rate=100, burst=10) == 0
+        clock[0] += 1
+        # Full: pruned under the fast rule, the login bucket must survive
+        assert await backend.take_token("other", rate=100, burst=10) == 0
+        return await backend.take_token("login", rate=0.01, burst=1)
+
+    assert asyncio.run(scenario()) > 0
+    assert set(backend._buckets) == {"login", "other"}
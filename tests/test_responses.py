@@ -0,0 +1,19 @@
+from urllib.parse import unquote
+from starlette.responses import Response
+from backend.responses import content_disposition
+
+
+def test_content_disposition_escapes_quotes_and_control_characters():
+    value = content_disposition('a "b"\\\r\n.txt')
+
+    assert value.startswith('attachment; filename="a _b____.txt"; ')
+    assert "\r" not in value and "\n" not in value
+
+
+def test_content_disposition_round_trips_non_latin_names():
+    name = "報告書 😀.pdf"
+    value = content_disposition(name)
+
+    # Starlette encodes header values as latin-1
+    Response(headers={"Content-Disposition": value})
+    assert unquote(value.split("filename*=UTF-8''", 1)[1]) == name
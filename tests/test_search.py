@@ -0,0 +1,26 @@
+from backend.models import User
+from backend.services.folders import ensure_folder
+from tests.conftest import bearer, client
+
+
+def test_paging_parameters_are_validated(db):
+    admin = User(username="admin", hashed_password="-", is_admin=True)
+    db.add(admin)
+    db.commit()
+
+    for params in ({"offset": -1}, {"limit": 0}, {"limit": 10_000}):
+        assert client.get("/api/search", params=params, headers=bearer(admin)).status_code == 422
+
+
+def test_empty_folders_are_found(db):
+    admin = User(username="admin", hashed_password="-", is_admin=True)
+    db.add(admin)
+    db.flush()
+    # Created through create-folder: a .keep marker and a folder row, no files
+    ensure_folder(db, "/projects/quarterly", admin.id)
+    db.commit()
+
+    found = client.get("/api/search", params={"q": "quarter"}, headers=bearer(admin)).json()
+    assert found == {"files": [], "folders": [{"name": "quarterly", "path": "/projects/quarterly"}]}
+    scoped = client.get("/api/search", params={"q": "quarter", "folder_path": "/other"}, headers=bearer(admin)).json()
+    assert scoped["folders"] == []
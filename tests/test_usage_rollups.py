@@ -0,0 +1,24 @@
+from datetime import datetime, timedelta
+from backend.config import settings
+from backend.models import AuditEvent, UsageRollup
+from backend.services.usage_rollups import rollup_pending
+
+
+def event(event_id: int, occurred_at: datetime) -> AuditEvent:
+    return AuditEvent(id=event_id, occurred_at=occurred_at, actor_id=1, action="download", folder_path="/a", bytes=10)
+
+
+def test_event_committed_late_under_a_lower_id_is_still_rolled_up(db):
+    settled = datetime.utcnow() + timedelta(seconds=settings.USAGE_ROLLUP_SETTLE_SECONDS + 5)
+    queued_long_ago = datetime.utcnow() - timedelta(hours=1)
+
+    # Another worker's batch took id 1 but has not committed; id 2 is visible
+    db.add(event(2, queued_long_ago))
+    db.commit()
+    assert rollup_pending(db) == 0
+
+    db.add(event(1, queued_long_ago))
+    db.commit()
+    assert rollup_pending(db, now=settled) == 2
+    hourly = db.query(UsageRollup).filter(UsageRollup.granularity == "hour").one()
+    assert (hourly.event_count, hourly.bytes_total) == (2, 20)
@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+from backend.models import User, UserImportJob
+from backend.services import user_import
+
+
+class InlinePool(ThreadPoolExecutor):
+    def __init__(self, max_workers=None, mp_context=None):
+        super().__init__(max_workers=1)
+
+
+def test_aborted_import_does_not_expose_statement_parameters(db, monkeypatch):
+    def fail(db, rows, hashes, created_by):
+        raise RuntimeError(f"INSERT failed with parameters {hashes}")
+
+    monkeypatch.setattr(user_import, "ProcessPoolExecutor", InlinePool)
+    monkeypatch.setattr(user_import, "get_password_hash", lambda password: "$2b$12$secret")
+    monkeypatch.setattr(user_import, "insert_batch", fail)
+    admin = User(username="admin", hashed_password="-")
+    db.add(admin)
+    db.flush()
+    job = UserImportJob(total_rows=1, created_by=admin.id)
+    db.add(job)
+    db.commit()
+
+    user_import.run_import_job(job.id, [{"row": 1, "username": "u", "password": "pw"}], admin.id)
+
+    db.expire_all()
+    job = db.get(UserImportJob, job.id)
+    assert job.status == "failed"
+    assert job.errors == [{"row": None, "username": None, "error": "Import aborted: RuntimeError"}]
@@ -0,0 +1,22 @@
+from backend.models import File, User
+from backend.services.quotas import usage_added
+from tests.conftest import bearer, client
+
+
+def test_user_listing_etag_changes_with_storage_usage(db):
+    admin = User(username="admin", email="admin@example.com", hashed_password="-", is_admin=True)
+    db.add(admin)
+    db.commit()
+    first = client.get("/api/users", headers=bearer(admin))
+    etag = first.headers["etag"]
+    assert client.get("/api/users", headers={**bearer(admin), "If-None-Match": etag}).status_code == 304
+
+    # What completing an upload records
+    upload = File(filename="a.bin", s3_key="a.bin", folder_path="/", file_size=10, owner_id=admin.id)
+    db.add(upload)
+    usage_added(db, upload)
+    db.commit()
+
+    response = client.get("/api/users", headers={**bearer(admin), "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["storage_used_bytes"] == 10